@@ -3,6 +3,7 @@ from config import (logger,
                     WALLET_BALANCES,
                     INVESTMENT)
 from utils import get_current_dollar_exchange_rate, get_client
+from balance_book import balance_book
 
 
 class Account:
@@ -83,14 +84,37 @@ class Account:
     def _get_asset_balance_for(self, asset_symbol):
         """Get current asset balance for the given symbol
 
+        Reads from the streamed balance book when it is synced, otherwise
+        asks the REST API.
+
         :type asset_symbol: str
         :param asset_symbol: Asset symbol (e.g. ETH, ADA)
         :rtype: str
         :returns: Amount of total assets for given symbol
         """
 
+        if balance_book.is_synced():
+            return balance_book.get_free(asset_symbol)
+
         return self.client.get_asset_balance(asset=asset_symbol)["free"]
 
+    def to_dict(self):
+        """Get account summary as a dictionary
+
+        :rtype: dict
+        :returns: Asset balances, total and benefit in TL
+        """
+
+        if not self.asset_balances:
+            self.get_balance()
+
+        if not self._total_in_tl:
+            self._total_in_tl = self.calculate_total_in_tl()
+
+        return {"balances": dict(self.asset_balances),
+                "total_tl": self._total_in_tl[0],
+                "benefit_tl": self._total_in_tl[1]}
+
     def __str__(self):
 
         account_summary = "======= Account Summary =======\n"
@@ -0,0 +1,253 @@
+"""PnL and performance analytics over recorded fills
+
+Usage: python analytics.py [--db trader.db] [--start MS] [--end MS] [--by symbol|interval]
+"""
+
+import sqlite3
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from config import TRADE_DB_FILE
+from utils import CheckInterval
+
+
+INTERVAL_NAMES = {value: name for name, value in vars(CheckInterval).items()
+                  if name.startswith("INTERVAL_")}
+
+
+def load_fills(db_file, start=0, end=None):
+    """Load fills of the given time range sorted by symbol and time
+
+    :type db_file: str
+    :param db_file: SQLite database file
+    :type start: int
+    :param start: Start time in milliseconds
+    :type end: int
+    :param end: End time in milliseconds (no limit if None)
+    :rtype: pandas.DataFrame
+    :returns: Fills
+    """
+
+    query = "SELECT * FROM fills WHERE time >= ?"
+    params = [start]
+
+    if end is not None:
+        query += " AND time < ?"
+        params.append(end)
+
+    with sqlite3.connect(db_file) as connection:
+        fills = pd.read_sql_query(query, connection, params=params)
+
+    return fills.sort_values(["symbol", "time"], kind="stable", ignore_index=True)
+
+
+def load_last_prices(db_file):
+    """Load the latest recorded tick price of every symbol
+
+    :type db_file: str
+    :param db_file: SQLite database file
+    :rtype: dict
+    :returns: Dictionary of symbol: price pairs
+    """
+
+    query = ("SELECT symbol, price FROM ticks t WHERE time = "
+             "(SELECT MAX(time) FROM ticks WHERE symbol = t.symbol)")
+
+    with sqlite3.connect(db_file) as connection:
+        return dict(connection.execute(query).fetchall())
+
+
+def compute_fill_pnl(fills, last_prices):
+    """Add position, cash, fee and realized PnL columns to the fills
+
+    Fills must be sorted by symbol and time. Everything is vectorized
+    except the average cost recurrence, which runs as a single pass over
+    plain arrays.
+
+    :type fills: pandas.DataFrame
+    :param fills: Fills sorted by symbol and time
+    :type last_prices: dict
+    :param last_prices: Latest price of every symbol
+    :rtype: pandas.DataFrame
+    :returns: Fills with pos_delta, cash_delta, fee_usdt, realized_pnl,
+        untracked_quantity, position and average_cost (of the open
+        position after the fill) columns
+    """
+
+    fills = fills.copy()
+
+    quantity = fills["quantity"].to_numpy(dtype=float)
+    price = fills["price"].to_numpy(dtype=float)
+    commission = fills["commission"].to_numpy(dtype=float)
+    is_buy = (fills["side"] == "BUY").to_numpy()
+
+    base_asset = fills["symbol"].str.slice(stop=-4)
+    commission_asset = fills["commission_asset"].fillna("")
+    in_base = (commission_asset == base_asset).to_numpy()
+    in_usdt = (commission_asset == "USDT").to_numpy()
+
+    sign = np.where(is_buy, 1.0, -1.0)
+    fills["pos_delta"] = sign * quantity - np.where(in_base, commission, 0.0)
+    fills["cash_delta"] = -sign * quantity * price - np.where(in_usdt, commission, 0.0)
+
+    other_price = (commission_asset + "USDT").map(last_prices).to_numpy(dtype=float)
+    fills["fee_usdt"] = np.select([in_base, in_usdt], [commission * price, commission],
+                                  default=commission * other_price)
+
+    symbol_codes = pd.factorize(fills["symbol"])[0]
+    realized, untracked, position, average_cost = _average_cost_realized(symbol_codes, quantity, price,
+                                                                         fills["pos_delta"].to_numpy(), is_buy)
+    fills["realized_pnl"] = realized
+    fills["untracked_quantity"] = untracked
+    fills["position"] = position
+    fills["average_cost"] = average_cost
+
+    return fills
+
+
+def summarize(fills, last_prices, by="symbol"):
+    """Summarize PnL, fees and volume per symbol or strategy interval
+
+    :type fills: pandas.DataFrame
+    :param fills: Output of compute_fill_pnl
+    :type last_prices: dict
+    :param last_prices: Latest price of every symbol
+    :type by: str
+    :param by: symbol or interval
+    :rtype: pandas.DataFrame
+    :returns: Summary table
+    """
+
+    fills = fills.assign(volume_usdt=fills["quantity"] * fills["price"],
+                         untracked_usdt=fills["untracked_quantity"] * fills["price"])
+
+    summary = fills.groupby(by, dropna=False).agg(fill_count=("quantity", "size"),
+                                                  volume_usdt=("volume_usdt", "sum"),
+                                                  fees_usdt=("fee_usdt", "sum"),
+                                                  realized_pnl=("realized_pnl", "sum"),
+                                                  untracked_sold=("untracked_quantity", "sum"),
+                                                  untracked_usdt=("untracked_usdt", "sum"))
+
+    if by == "symbol":
+        positions = fills.groupby("symbol").agg(position=("position", "last"),
+                                                average_cost=("average_cost", "last"))
+        marks = positions.index.map(last_prices).to_numpy(dtype=float)
+
+        summary["position"] = positions["position"]
+        summary["average_cost"] = positions["average_cost"]
+        summary["last_price"] = marks
+        summary["unrealized_pnl"] = positions["position"] * (marks - positions["average_cost"])
+    else:
+        summary.index = summary.index.map(lambda interval: INTERVAL_NAMES.get(interval, "UNKNOWN"))
+
+    summary["net_pnl"] = (summary["realized_pnl"] + summary.get("unrealized_pnl", 0.0)
+                          - summary["fees_usdt"].fillna(0))
+
+    return summary
+
+
+def fee_breakdown(fills):
+    """Get commission totals per symbol and commission asset
+
+    :type fills: pandas.DataFrame
+    :param fills: Output of compute_fill_pnl
+    :rtype: pandas.DataFrame
+    :returns: Commission and its usdt value per symbol and asset
+    """
+
+    return fills.groupby(["symbol", "commission_asset"]).agg(commission=("commission", "sum"),
+                                                             fee_usdt=("fee_usdt", "sum"))
+
+
+def _average_cost_realized(symbol_codes, quantity, price, pos_delta, is_buy):
+    """Calculate realized PnL of every fill with the average cost method
+
+    Fees are counted separately by fee_usdt, so the average cost only
+    includes the traded price of the quantity added to the position.
+    Sells beyond the tracked position, e.g. of holdings bought before
+    the recorded fills, have no known cost and realize no PnL; their
+    quantity is returned separately.
+
+    :type symbol_codes: numpy.ndarray
+    :param symbol_codes: Integer code of the fill symbol
+    :type quantity: numpy.ndarray
+    :param quantity: Fill quantities
+    :type price: numpy.ndarray
+    :param price: Fill prices
+    :type pos_delta: numpy.ndarray
+    :param pos_delta: Position change of every fill
+    :type is_buy: numpy.ndarray
+    :param is_buy: Whether the fill is a buy
+    :rtype: tuple
+    :returns: Realized PnL and untracked sold quantity per fill, position
+        and average cost after every fill
+    """
+
+    realized = np.zeros(len(quantity))
+    untracked = np.zeros(len(quantity))
+    positions = np.zeros(len(quantity))
+    average_costs = np.zeros(len(quantity))
+
+    current_symbol = -1
+    position = 0.0
+    average_cost = 0.0
+
+    for index, (code, qty, fill_price, delta, buy) in enumerate(zip(symbol_codes.tolist(),
+                                                                   quantity.tolist(),
+                                                                   price.tolist(),
+                                                                   pos_delta.tolist(),
+                                                                   is_buy.tolist())):
+        if code != current_symbol:
+            current_symbol = code
+            position = 0.0
+            average_cost = 0.0
+
+        if buy:
+            if position + delta > 0:
+                average_cost = (average_cost * position + delta * fill_price) / (position + delta)
+            position += delta
+        else:
+            tracked = min(qty, position)
+            realized[index] = tracked * (fill_price - average_cost)
+            untracked[index] = qty - tracked
+            position += delta
+            if position <= 0:
+                position = 0.0
+                average_cost = 0.0
+
+        positions[index] = position
+        average_costs[index] = average_cost
+
+    return realized, untracked, positions, average_costs
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="PnL analytics over recorded fills")
+    parser.add_argument("--db", default=TRADE_DB_FILE, help="SQLite trade database")
+    parser.add_argument("--start", type=int, default=0, help="start time in milliseconds")
+    parser.add_argument("--end", type=int, default=None, help="end time in milliseconds")
+    parser.add_argument("--by", choices=("symbol", "interval"), default="symbol")
+    args = parser.parse_args()
+
+    fills = load_fills(args.db, args.start, args.end)
+
+    if fills.empty:
+        print("No fills recorded.")
+        return
+
+    last_prices = load_last_prices(args.db)
+    fills = compute_fill_pnl(fills, last_prices)
+
+    pd.set_option("display.width", 200)
+
+    print(summarize(fills, last_prices, args.by).to_string(float_format="{:.6f}".format))
+    print()
+    print(fee_breakdown(fills).to_string(float_format="{:.8f}".format))
+
+
+if __name__ == "__main__":
+
+    main()
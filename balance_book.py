@@ -0,0 +1,152 @@
+from threading import Lock, Thread, Event
+
+from config import logger, BALANCE_RECONCILE_INTERVAL
+
+
+class BalanceBook:
+
+    def __init__(self):
+
+        self._lock = Lock()
+        self._free = {}
+        self._locked = {}
+        self._last_update_time = 0
+        self._synced = False
+        self._stop_event = Event()
+        self._reconcile_thread = None
+
+    def is_synced(self):
+        """Check whether the book holds a snapshot of the account
+
+        :rtype: bool
+        :returns: Whether balances can be read from the book
+        """
+
+        return self._synced
+
+    def get_free(self, asset):
+        """Get free balance of the asset
+
+        :type asset: str
+        :param asset: Asset symbol (e.g. ETH, ADA)
+        :rtype: float
+        :returns: Free balance
+        """
+
+        return self._free.get(asset, 0.0)
+
+    def get_locked(self, asset):
+        """Get balance of the asset locked in open orders
+
+        :type asset: str
+        :param asset: Asset symbol (e.g. ETH, ADA)
+        :rtype: float
+        :returns: Locked balance
+        """
+
+        return self._locked.get(asset, 0.0)
+
+    def update_from_account_position(self, event):
+        """Apply an outboundAccountPosition event
+
+        The event carries the full balances of the assets changed by an
+        account update, so they replace the stored values.
+
+        :type event: dict
+        :param event: outboundAccountPosition event
+        """
+
+        update_time = event.get("u", 0)
+
+        with self._lock:
+            if update_time < self._last_update_time:
+                return
+
+            for balance in event.get("B", []):
+                self._free[balance["a"]] = float(balance["f"])
+                self._locked[balance["a"]] = float(balance["l"])
+
+            self._last_update_time = update_time
+
+    def update_from_balance_update(self, event):
+        """Apply a balanceUpdate event (deposit, withdrawal or transfer)
+
+        The event time advances the last update time, so a REST snapshot
+        taken before the delta does not overwrite it.
+
+        :type event: dict
+        :param event: balanceUpdate event
+        """
+
+        with self._lock:
+            asset = event["a"]
+            self._free[asset] = self._free.get(asset, 0.0) + float(event["d"])
+            self._last_update_time = max(self._last_update_time, event.get("E", 0))
+
+    def reconcile(self, client):
+        """Replace the book with the balances returned by the REST API
+
+        A snapshot older than the last pushed update is ignored, since
+        the stream is ahead of it.
+
+        :type client: binance.client.Client
+        :param client: Client used for the account request
+        """
+
+        account_info = client.get_account()
+        update_time = account_info.get("updateTime", 0)
+
+        free = {}
+        locked = {}
+        for balance in account_info.get("balances", []):
+            free[balance["asset"]] = float(balance["free"])
+            locked[balance["asset"]] = float(balance["locked"])
+
+        with self._lock:
+            if update_time < self._last_update_time:
+                logger.debug("Skipping balance reconciliation older than the stream")
+                return
+
+            for asset, amount in free.items():
+                if self._synced and abs(self._free.get(asset, 0.0) - amount) > 1e-8:
+                    logger.warning(f"Balance of {asset} reconciled: "
+                                   f"{self._free.get(asset, 0.0)} -> {amount}")
+
+            self._free = free
+            self._locked = locked
+            self._last_update_time = update_time
+            self._synced = True
+
+    def start_reconciliation(self, client):
+        """Take an initial snapshot and reconcile periodically in the background
+
+        :type client: binance.client.Client
+        :param client: Client used for the account requests
+        """
+
+        self.reconcile(client)
+
+        self._stop_event.clear()
+        self._reconcile_thread = Thread(target=self._reconcile_periodically, args=(client,), daemon=True)
+        self._reconcile_thread.start()
+
+    def stop_reconciliation(self):
+        """Stop the background reconciliation"""
+
+        self._stop_event.set()
+
+    def _reconcile_periodically(self, client):
+        """Reconcile with the REST API every BALANCE_RECONCILE_INTERVAL seconds
+
+        :type client: binance.client.Client
+        :param client: Client used for the account requests
+        """
+
+        while not self._stop_event.wait(BALANCE_RECONCILE_INTERVAL):
+            try:
+                self.reconcile(client)
+            except Exception as exc:
+                logger.error(f"Failed to reconcile balances: {exc}")
+
+
+balance_book = BalanceBook()
@@ -0,0 +1,70 @@
+"""Analytics throughput over synthetic fills
+
+Usage: python -m benchmarks.analytics_bench [fills] [symbols]
+"""
+
+import sys
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from analytics import compute_fill_pnl, summarize, fee_breakdown
+from benchmarks.feed import make_symbols
+
+
+def make_fills(count, symbol_count, seed=0):
+    """Generate random fills sorted by symbol and time
+
+    :type count: int
+    :param count: Number of fills
+    :type symbol_count: int
+    :param symbol_count: Number of symbols
+    :rtype: pandas.DataFrame
+    :returns: Fills in the layout of the fills table
+    """
+
+    generator = np.random.default_rng(seed)
+    symbols = np.array(make_symbols(symbol_count))
+    intervals = np.array([10, 600, 1800, 3600, 43200])
+
+    fills = pd.DataFrame({
+        "order_id": np.arange(count),
+        "symbol": symbols[generator.integers(0, symbol_count, count)],
+        "interval": intervals[generator.integers(0, len(intervals), count)],
+        "side": np.where(generator.random(count) < 0.5, "BUY", "SELL"),
+        "time": np.sort(generator.integers(0, 10 ** 12, count)),
+        "quantity": generator.uniform(1, 100, count),
+        "price": generator.uniform(0.5, 1.5, count),
+        "commission": generator.uniform(0, 0.1, count),
+        "commission_asset": np.where(generator.random(count) < 0.5, "USDT", "BNB")
+    })
+
+    return fills.sort_values(["symbol", "time"], kind="stable", ignore_index=True)
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    symbol_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    fills = make_fills(count, symbol_count)
+    last_prices = {symbol: 1.0 for symbol in make_symbols(symbol_count)}
+    last_prices["BNBUSDT"] = 300.0
+
+    start = perf_counter()
+    fills = compute_fill_pnl(fills, last_prices)
+    computed = perf_counter()
+    summarize(fills, last_prices, "symbol")
+    summarize(fills, last_prices, "interval")
+    fee_breakdown(fills)
+    summarized = perf_counter()
+
+    print(f"Fills: {count}, symbols: {symbol_count}")
+    print(f"compute_fill_pnl: {computed - start:.2f} s")
+    print(f"summaries: {summarized - computed:.2f} s")
+
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,84 @@
+"""Tick processing under a message burst with and without conflation
+
+Submits a burst of ticker messages as fast as possible and measures the
+time until the latest price of every symbol is processed, once by
+calling PriceMonitor._price_msg_handler for every message and once
+through a TickConflator in front of it.
+
+Usage: python -m benchmarks.conflation_bench [--symbols 10 100 1000] [--ticks 100000]
+"""
+
+import argparse
+from time import perf_counter
+from threading import Event
+
+from benchmarks.feed import SyntheticTickerFeed, make_symbols
+from benchmarks.harness import setup_offline
+
+
+def run(symbol_count, ticks):
+    """Process a burst of messages directly and conflated
+
+    :type symbol_count: int
+    :param symbol_count: Number of symbols
+    :type ticks: int
+    :param ticks: Number of ticker messages in the burst
+    :rtype: list
+    :returns: (mode, processed messages, seconds until the latest prices are processed) tuples
+    """
+
+    symbols = make_symbols(symbol_count)
+    feed = SyntheticTickerFeed(symbols)
+    setup_offline(symbols, feed.initial_prices())
+
+    from price_monitor import PriceMonitor
+    from tick_conflator import TickConflator
+
+    monitor = PriceMonitor()
+    messages = feed.messages(ticks)
+
+    start = perf_counter()
+    for message in messages:
+        monitor._price_msg_handler(message)
+    results = [("direct", len(messages), perf_counter() - start)]
+
+    latest_messages = {id(message) for message in {message["s"]: message for message in messages}.values()}
+    done = Event()
+    processed = [0]
+
+    def handler(message):
+        processed[0] += 1
+        monitor._price_msg_handler(message)
+        latest_messages.discard(id(message))
+        if not latest_messages:
+            done.set()
+
+    conflator = TickConflator(handler)
+    conflator.start()
+
+    start = perf_counter()
+    for message in messages:
+        conflator.submit(message)
+    done.wait()
+    results.append(("conflated", processed[0], perf_counter() - start))
+
+    return results
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--ticks", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'mode':10} {'syms':>6} {'messages':>9} {'processed':>10} {'latest(ms)':>11}")
+
+    for symbol_count in args.symbols:
+        for mode, processed, elapsed in run(symbol_count, args.ticks):
+            print(f"{mode:10} {symbol_count:>6} {args.ticks:>9} {processed:>10} {elapsed * 1000:>11.1f}")
+
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,108 @@
+"""Incremental cross-asset correlation cost
+
+Feeds bars of synthetic returns, where every symbol follows the first
+symbol one bar later, to RollingCorrelation and CrossAssetMonitor and
+compares the incremental update with recomputing the correlation matrix
+of the window with numpy.corrcoef on every bar.
+
+Usage: python -m benchmarks.correlation_bench [--symbols 50 500] [--bars 2000] [--window 360]
+"""
+
+import argparse
+
+import numpy as np
+
+from benchmarks.harness import measure, report, print_header
+
+
+class Stats:
+
+    __slots__ = ("latest_price",)
+
+    def __init__(self, latest_price):
+
+        self.latest_price = latest_price
+
+
+def make_returns(bars, symbol_count, seed=0):
+    """Create returns where the others follow symbol 0 with a lag of one bar
+
+    :rtype: numpy.ndarray
+    :returns: Array of shape (bars, symbol_count)
+    """
+
+    rng = np.random.default_rng(seed)
+    leader = rng.normal(0, 0.001, bars)
+    returns = rng.normal(0, 0.001, (bars, symbol_count))
+    returns[1:, 1:] += 0.8 * leader[:-1, None]
+    returns[:, 0] = leader
+
+    return returns
+
+
+def run(symbol_count, bars, window):
+
+    import config
+    config.CROSS_ASSET_WINDOW = window
+
+    from rolling_correlation import RollingCorrelation
+    from cross_asset_monitor import CrossAssetMonitor
+
+    returns = make_returns(bars, symbol_count)
+
+    correlation = RollingCorrelation(symbol_count, window)
+    report("RollingCorrelation.update", symbol_count,
+           measure(correlation.update, [(row,) for row in returns[:bars // 2]]))
+
+    report("numpy.corrcoef of the window", symbol_count,
+           measure(lambda end: np.corrcoef(returns[max(0, end - window):end], rowvar=False),
+                   [(end,) for end in range(window, window + min(200, bars - window))]))
+
+    correlation = RollingCorrelation(symbol_count, window)
+    for row in returns:
+        correlation.update(row)
+    expected = np.corrcoef(returns[-window:], rowvar=False)
+    error = np.abs(correlation.get_correlation() - expected).max()
+
+    report("RollingCorrelation.get_correlation", symbol_count, measure(correlation.get_correlation, [()] * 50))
+    report("RollingCorrelation.get_lead_lag", symbol_count, measure(correlation.get_lead_lag, [()] * 50))
+
+    symbols = [f"SYM{index:04d}USDT" for index in range(symbol_count)]
+    prices = np.cumprod(1 + returns, axis=0)
+    snapshots = [({symbol: Stats(price) for symbol, price in zip(symbols, row)},) for row in prices]
+
+    def update_and_signal(asset_stats):
+        monitor.update(asset_stats)
+        return monitor.get_lead_lag_signals(leaders=[symbols[0]], min_correlation=0.3)
+
+    monitor = CrossAssetMonitor()
+    report("CrossAssetMonitor update + signals", symbol_count, measure(update_and_signal, snapshots))
+
+    signals = update_and_signal(snapshots[-1][0])
+
+    return error, len(signals)
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, nargs="+", default=[50, 500])
+    parser.add_argument("--bars", type=int, default=2000)
+    parser.add_argument("--window", type=int, default=360)
+    args = parser.parse_args()
+
+    import logging
+    from config import logger
+    logger.setLevel(logging.WARNING)
+
+    print_header()
+
+    for symbol_count in args.symbols:
+        error, signal_count = run(symbol_count, args.bars, args.window)
+        print(f"{symbol_count} symbols: max error against numpy.corrcoef {error:.2e}, "
+              f"{signal_count}/{symbol_count - 1} followers detected")
+
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,63 @@
+from itertools import count
+
+
+class FakeClient:
+
+    def __init__(self, prices, balance=1000000.0):
+
+        self._prices = prices
+        self._balance = balance
+        self._order_ids = count(1)
+        self.response = None
+
+    def get_system_status(self):
+
+        return {"status": 0, "msg": "normal"}
+
+    def get_symbol_ticker(self, symbol):
+
+        return {"symbol": symbol, "price": f"{self._prices.get(symbol, 1.0):.8f}"}
+
+    def get_asset_balance(self, asset):
+
+        return {"asset": asset, "free": str(self._balance), "locked": "0"}
+
+    def get_exchange_info(self):
+
+        symbols = []
+        for symbol in self._prices:
+            symbols.append({
+                "symbol": symbol,
+                "filters": [
+                    {"filterType": "PRICE_FILTER", "minPrice": "0.00000100",
+                     "maxPrice": "1000000.00000000", "tickSize": "0.00000100"},
+                    {"filterType": "LOT_SIZE", "minQty": "0.10000000",
+                     "maxQty": "9000000.00000000", "stepSize": "0.10000000"},
+                    {"filterType": "MIN_NOTIONAL", "minNotional": "0.00000000"}
+                ]
+            })
+
+        return {"symbols": symbols}
+
+    def order_market_buy(self, symbol, quantity, **params):
+
+        return self._fill(symbol, quantity, "BUY")
+
+    def order_market_sell(self, symbol, quantity, **params):
+
+        return self._fill(symbol, quantity, "SELL")
+
+    def _fill(self, symbol, quantity, side):
+
+        price = self._prices.get(symbol, 1.0)
+
+        return {
+            "symbol": symbol,
+            "orderId": next(self._order_ids),
+            "side": side,
+            "status": "FILLED",
+            "executedQty": str(quantity),
+            "cummulativeQuoteQty": str(quantity * price),
+            "fills": [{"price": str(price), "qty": str(quantity),
+                       "commission": "0", "commissionAsset": "BNB"}]
+        }
@@ -0,0 +1,125 @@
+"""Fan-out latency of the market data daemon
+
+Starts a MarketDataDaemon on a temporary Unix socket, connects the given
+numbers of subscriber processes and publishes synthetic ticks at a fixed
+rate. The event time field carries the publish time (CLOCK_MONOTONIC in
+microseconds, shared by all processes), so every subscriber measures
+the latency from publish to its callback.
+
+Usage: python -m benchmarks.fan_out_bench [--subscribers 1 10 50] [--ticks 2000] [--rate 1000]
+"""
+
+import os
+import argparse
+import tempfile
+import multiprocessing
+from time import sleep, monotonic_ns
+
+from benchmarks.harness import percentile
+
+
+def subscribe(socket_path, symbols, ticks, ready, results):
+    """Receive ticks in a subscriber process and report latencies
+
+    :type socket_path: str
+    :param socket_path: Daemon socket path
+    :type symbols: list
+    :param symbols: Symbols to subscribe
+    :type ticks: int
+    :param ticks: Number of ticks to receive
+    :type ready: multiprocessing.Event
+    :param ready: Set when the subscription is sent
+    :type results: multiprocessing.Queue
+    :param results: Queue receiving the sorted latencies in microseconds
+    """
+
+    import logging
+    from config import logger
+    from market_data import MarketDataFeed
+
+    logger.setLevel(logging.WARNING)
+    feed = MarketDataFeed(symbols, socket_path)
+    latencies = []
+
+    def on_tick(message):
+        latencies.append(monotonic_ns() // 1000 - message["E"])
+        if len(latencies) == ticks:
+            feed.stop()
+
+    ready.set()
+    feed.run(on_tick)
+    results.put(sorted(latencies))
+
+
+def run(subscriber_count, ticks, rate):
+    """Measure fan-out latency to the given number of subscribers
+
+    :type subscriber_count: int
+    :param subscriber_count: Number of subscriber processes
+    :type ticks: int
+    :param ticks: Number of ticks to publish
+    :type rate: int
+    :param rate: Ticks published per second
+    :rtype: list
+    :returns: Latencies of all subscribers in microseconds
+    """
+
+    import logging
+    from config import logger
+    from market_data import MarketDataDaemon
+
+    logger.setLevel(logging.WARNING)
+    socket_path = os.path.join(tempfile.mkdtemp(prefix="trader-fan-out-"), "market-data.sock")
+    symbols = ["BENCHUSDT"]
+
+    daemon = MarketDataDaemon(socket_path)
+    daemon.start_server()
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = []
+
+    for _ in range(subscriber_count):
+        ready = context.Event()
+        process = context.Process(target=subscribe, args=(socket_path, symbols, ticks, ready, results))
+        process.start()
+        ready.wait()
+        processes.append(process)
+
+    while sum(len(subscribers) for subscribers in daemon._subscribers.values()) < subscriber_count:
+        sleep(0.01)
+
+    interval = 1 / rate
+    for index in range(ticks):
+        daemon.publish({"s": "BENCHUSDT", "E": monotonic_ns() // 1000, "c": 1.0 + index * 1e-6,
+                        "x": 1.0, "p": index * 1e-6, "P": index * 1e-4})
+        sleep(interval)
+
+    latencies = []
+    for _ in processes:
+        latencies.extend(results.get())
+    for process in processes:
+        process.join()
+
+    return sorted(latencies)
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--rate", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'subscribers':>11} {'ticks':>8} {'p50(us)':>10} {'p99(us)':>10} {'max(us)':>10}")
+
+    for subscriber_count in args.subscribers:
+        latencies = run(subscriber_count, args.ticks, args.rate)
+        print(f"{subscriber_count:>11} {len(latencies):>8} {percentile(latencies, 50):>10.1f} "
+              f"{percentile(latencies, 99):>10.1f} {latencies[-1]:>10.1f}")
+
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,76 @@
+import random
+from time import time
+
+
+class SyntheticTickerFeed:
+
+    def __init__(self, symbols, seed=0, volatility=0.001):
+
+        self.symbols = list(symbols)
+        self._random = random.Random(seed)
+        self._volatility = volatility
+        self._prices = {symbol: self._random.uniform(0.01, 100) for symbol in self.symbols}
+        self._prev_day_prices = dict(self._prices)
+
+    def initial_prices(self):
+        """Get starting price of every symbol
+
+        :rtype: dict
+        :returns: Dictionary of symbol: price pairs
+        """
+
+        return dict(self._prices)
+
+    def next_message(self, symbol):
+        """Generate the next 24hr ticker message for the given symbol
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :rtype: dict
+        :returns: Symbol ticker socket message
+        """
+
+        price = self._prices[symbol] * (1 + self._random.gauss(0, self._volatility))
+        self._prices[symbol] = price
+        prev_day_price = self._prev_day_prices[symbol]
+        change = price - prev_day_price
+
+        return {
+            "e": "24hrTicker",
+            "E": int(time() * 1000),
+            "s": symbol,
+            "c": f"{price:.8f}",
+            "x": f"{prev_day_price:.8f}",
+            "p": f"{change:.8f}",
+            "P": f"{change / prev_day_price * 100:.3f}"
+        }
+
+    def messages(self, count):
+        """Generate ticker messages round robin over all symbols
+
+        :type count: int
+        :param count: Number of messages
+        :rtype: list
+        :returns: Symbol ticker socket messages
+        """
+
+        return [self.next_message(self.symbols[index % len(self.symbols)]) for index in range(count)]
+
+
+def make_symbols(count):
+    """Get symbol names for a synthetic market
+
+    The real traded symbols come first so configured thresholds apply.
+
+    :type count: int
+    :param count: Number of symbols
+    :rtype: list
+    :returns: Symbol names
+    """
+
+    symbols = ["ADAUSDT", "VETUSDT"][:count]
+
+    for index in range(count - len(symbols)):
+        symbols.append(f"SYM{index:05d}USDT")
+
+    return symbols
@@ -0,0 +1,136 @@
+import os
+import logging
+import tempfile
+import tracemalloc
+from time import perf_counter
+
+from benchmarks.fake_client import FakeClient
+
+
+def setup_offline(symbols, prices):
+    """Prepare the trader modules to run without network access
+
+    The process moves into a temporary directory so state files are not
+    touched, the shared client is replaced with a FakeClient, evaluator
+    threads are not started (benchmarks drive them explicitly) and every
+    synthetic symbol gets order thresholds and a traded amount.
+
+    :type symbols: list
+    :param symbols: Symbols of the synthetic market
+    :type prices: dict
+    :param prices: Initial prices of the symbols
+    :rtype: str
+    :returns: Working directory of the benchmark
+    """
+
+    workdir = tempfile.mkdtemp(prefix="trader-bench-")
+    os.chdir(workdir)
+
+    import config
+    import utils
+    from utils import CheckInterval
+
+    config.logger.setLevel(logging.WARNING)
+    config.LIMIT_ORDER_INTERVALS = ()   # the fake client only fills market orders
+    config.ORDER_QUEUE_SIZE = 1000000   # measure execution, not backpressure
+
+    utils.client = FakeClient(prices)
+
+    for symbol in symbols:
+        utils.TRADED_ASSET_AMOUNTS.setdefault(symbol, 1000.0)
+        config.ASSET_ORDER_THRESHOLDS.setdefault(symbol, {
+            interval: {"buy": (-0.1, 10), "sell": (0.1, 10)}
+            for interval in (CheckInterval.INTERVAL_10_SEC,
+                             CheckInterval.INTERVAL_10_MIN,
+                             CheckInterval.INTERVAL_30_MIN,
+                             CheckInterval.INTERVAL_1_HOUR,
+                             CheckInterval.INTERVAL_12_HOURS)
+        })
+
+    utils.TRADED_ASSET_AMOUNTS["USDT"] = 1000000.0
+
+    from portfolio import portfolio
+    portfolio.set_amounts(utils.TRADED_ASSET_AMOUNTS)
+
+    from price_evaluator import PriceEvaluator
+    PriceEvaluator._start_evaluators = lambda self: None
+
+    return workdir
+
+
+def percentile(values, percent):
+    """Get percentile of the sorted values
+
+    :type values: list
+    :param values: Sorted values
+    :type percent: float
+    :param percent: Percentile between 0 and 100
+    :rtype: float
+    :returns: Percentile value
+    """
+
+    index = min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))
+
+    return values[index]
+
+
+def measure(function, arguments):
+    """Call function once per argument and collect timing statistics
+
+    Timing and peak memory are measured in separate passes since
+    tracemalloc slows down the measured code.
+
+    :type function: callable
+    :param function: Function to benchmark
+    :type arguments: list
+    :param arguments: Argument tuples, one per call
+    :rtype: dict
+    :returns: Call count, throughput, latency percentiles and peak memory
+    """
+
+    latencies = []
+
+    start = perf_counter()
+    for args in arguments:
+        call_start = perf_counter()
+        function(*args)
+        latencies.append(perf_counter() - call_start)
+    elapsed = perf_counter() - start
+
+    tracemalloc.start()
+    for args in arguments:
+        function(*args)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+
+    return {
+        "calls": len(arguments),
+        "throughput": len(arguments) / elapsed if elapsed else float("inf"),
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "peak_memory": peak_memory
+    }
+
+
+def report(name, symbol_count, result):
+    """Print a benchmark result line
+
+    :type name: str
+    :param name: Benchmark name
+    :type symbol_count: int
+    :param symbol_count: Number of symbols in the market
+    :type result: dict
+    :param result: Result of measure
+    """
+
+    print(f"{name:34} {symbol_count:>6} {result['calls']:>8} "
+          f"{result['throughput']:>12.0f} {result['p50'] * 1e6:>10.1f} "
+          f"{result['p99'] * 1e6:>10.1f} {result['peak_memory'] / 1024:>10.1f}")
+
+
+def print_header():
+
+    print(f"{'benchmark':34} {'syms':>6} {'calls':>8} {'ops/s':>12} "
+          f"{'p50(us)':>10} {'p99(us)':>10} {'peak(KiB)':>10}")
@@ -0,0 +1,167 @@
+"""History downloads against a local HTTP stand-in of the Binance API
+
+Serves synthetic 1m klines and aggregated trades from a local HTTP
+server with a fixed delay per request and points the Binance client at
+it. Measures a cold download with one and several workers, a repeated
+run served from the cache and a top-up of the current day, and checks
+the loaded data against the stand-in.
+
+Usage: python -m benchmarks.history_bench [--symbols 4] [--days 3] [--delay 0.02]
+"""
+
+import os
+import json
+import argparse
+import tempfile
+from time import time, sleep, perf_counter
+from datetime import datetime, timedelta, timezone
+from threading import Thread
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+
+MINUTE_MS = 60 * 1000
+TRADE_SPACING_MS = 10 * 1000
+
+
+def make_kline(open_time):
+
+    price = 1 + (open_time // MINUTE_MS % 1000) / 1000
+    return [open_time, f"{price:.8f}", f"{price * 1.001:.8f}", f"{price * 0.999:.8f}", f"{price:.8f}",
+            "10.0", open_time + MINUTE_MS - 1, "10.0", 5, "5.0", "5.0", "0"]
+
+
+def make_trade(trade_id):
+
+    trade_time = trade_id * TRADE_SPACING_MS
+    return {"a": trade_id, "p": f"{1 + trade_id % 1000 / 1000:.8f}", "q": "1.0",
+            "f": trade_id, "l": trade_id, "T": trade_time, "m": trade_id % 2 == 0, "M": True}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+
+    delay = 0.0
+    requests = 0
+
+    def do_GET(self):
+
+        url = urlparse(self.path)
+        params = {key: int(values[0]) if values[0].isdigit() else values[0]
+                  for key, values in parse_qs(url.query).items()}
+
+        StandInHandler.requests += 1
+        sleep(self.delay)
+
+        now = int(time() * 1000)
+
+        if url.path.endswith("/klines"):
+            limit = params.get("limit", 500)
+            first = -(-params["startTime"] // MINUTE_MS) * MINUTE_MS
+            last = min(params.get("endTime", now), now)
+            body = [make_kline(open_time) for open_time in range(first, last + 1, MINUTE_MS)][:limit]
+        elif url.path.endswith("/aggTrades"):
+            limit = params.get("limit", 500)
+            if "fromId" in params:
+                first_id = params["fromId"]
+                last_id = now // TRADE_SPACING_MS
+            else:
+                first_id = -(-params["startTime"] // TRADE_SPACING_MS)
+                last_id = min(params["endTime"], now) // TRADE_SPACING_MS
+            body = [make_trade(trade_id) for trade_id in range(first_id, min(last_id + 1, first_id + limit))]
+        else:
+            body = {}
+
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stand_in(delay):
+    """Start the stand-in server in a background thread
+
+    :type delay: float
+    :param delay: Seconds added to every request
+    :rtype: str
+    :returns: API URL of the server
+    """
+
+    StandInHandler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+
+    return f"http://127.0.0.1:{server.server_address[1]}/api"
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=4)
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    import logging
+    import config
+    from binance.client import Client
+    from config import logger
+
+    config.REQUEST_WEIGHT_PER_MINUTE = 1000000  # the stand-in has no limits, measure paging and concurrency
+    from rate_limiter import RateLimitedClient
+    from history import HistoryDownloader
+
+    logger.setLevel(logging.WARNING)
+    os.chdir(tempfile.mkdtemp(prefix="trader-history-"))
+
+    Client.API_URL = start_stand_in(args.delay)
+    client = RateLimitedClient(Client())
+
+    symbols = [f"SYM{index}USDT" for index in range(args.symbols)]
+    today = datetime.now(timezone.utc).date()
+    start_day = today - timedelta(days=args.days)
+
+    print(f"{'run':24} {'resolution':>10} {'cached':>7} {'fetched':>8} {'requests':>9} {'seconds':>8}")
+
+    def run(name, downloader, resolution, end_day):
+        requests = StandInHandler.requests
+        start = perf_counter()
+        counts = downloader.download(symbols, resolution, start_day, end_day)
+        print(f"{name:24} {resolution:>10} {counts['cached']:>7} {counts['downloaded']:>8} "
+              f"{StandInHandler.requests - requests:>9} {perf_counter() - start:>8.2f}")
+
+    yesterday = today - timedelta(days=1)
+
+    for resolution in ("1m", "aggTrades"):
+        run("cold, 1 worker", HistoryDownloader(client, cache_dir=f"cold-{resolution}", workers=1),
+            resolution, yesterday)
+
+        downloader = HistoryDownloader(client, cache_dir=resolution, workers=8)
+        run("cold, 8 workers", downloader, resolution, yesterday)
+        run("cached", downloader, resolution, yesterday)
+        run("with today", downloader, resolution, today)
+        sleep(1)
+        run("top-up of today", downloader, resolution, today)
+
+    klines = HistoryDownloader(client, cache_dir="1m").load(symbols[0], "1m", start_day, yesterday)
+    expected = args.days * 24 * 60
+    assert len(klines["open_time"]) == expected, (len(klines["open_time"]), expected)
+    assert (np.diff(klines["open_time"]) == MINUTE_MS).all()
+
+    trades = HistoryDownloader(client, cache_dir="aggTrades").load(symbols[0], "aggTrades", start_day, yesterday)
+    expected = args.days * 24 * 60 * 60 * 1000 // TRADE_SPACING_MS
+    assert len(trades["id"]) == expected, (len(trades["id"]), expected)
+    assert (np.diff(trades["id"]) == 1).all()
+
+    print(f"loaded {len(klines['open_time'])} klines and {len(trades['id'])} trades per symbol, no gaps")
+
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,135 @@
+"""Hot path benchmarks driven by a synthetic ticker feed
+
+Runs PriceMonitor._price_msg_handler, PriceStatistics.process_price,
+PriceEvaluator._evaluate, Strategy.perform, Executor and
+PersistantStats.save against a FakeClient, entirely offline, and
+reports throughput, latency percentiles and peak traced memory.
+
+Usage: python -m benchmarks.hot_path_bench [--symbols 1 100 10000] [--ticks 20000]
+"""
+
+import argparse
+
+from benchmarks.feed import SyntheticTickerFeed, make_symbols
+from benchmarks.harness import setup_offline, measure, report, print_header
+
+
+class TimedOrder:
+
+    def __init__(self, order, latencies):
+
+        self._order = order
+        self._latencies = latencies
+
+    def execute_order(self):
+
+        from time import perf_counter
+
+        start = perf_counter()
+        self._order.execute_order()
+        self._latencies.append(perf_counter() - start)
+
+    def __getattr__(self, name):
+
+        return getattr(self._order, name)
+
+    def __str__(self):
+
+        return str(self._order)
+
+
+def run(symbol_count, ticks, max_evaluate_symbols):
+    """Run all hot path benchmarks for a market of the given size
+
+    :type symbol_count: int
+    :param symbol_count: Number of symbols
+    :type ticks: int
+    :param ticks: Number of ticker messages to feed
+    :type max_evaluate_symbols: int
+    :param max_evaluate_symbols: Largest market evaluated with _evaluate
+    """
+
+    symbols = make_symbols(symbol_count)
+    feed = SyntheticTickerFeed(symbols)
+    setup_offline(symbols, feed.initial_prices())
+
+    from utils import CheckInterval, OrderType
+    from price_monitor import PriceMonitor
+    from persistant_stats import PersistantStats
+    from strategy.strategies import Interval10SecStrategy
+    from market_order.factory import MarketOrderFactory
+    from executor import order_executor
+    from tick import Tick
+
+    monitor = PriceMonitor()
+    statistics = monitor._price_statistics
+    evaluator = statistics._evaluator
+    evaluator._persistant_stats.save_initial_price_data(feed.initial_prices())
+
+    messages = [(message,) for message in feed.messages(ticks)]
+    report("PriceMonitor._price_msg_handler", symbol_count,
+           measure(monitor._price_msg_handler, messages))
+
+    ticks_data = []
+    for (message,) in messages:
+        tick = Tick(message["s"])
+        tick.update_from_message(message)
+        ticks_data.append((tick,))
+    report("PriceStatistics.process_price", symbol_count,
+           measure(statistics.process_price, ticks_data))
+
+    asset_stats = statistics.get_asset_stats()
+
+    if symbol_count <= max_evaluate_symbols:
+        report("PriceEvaluator._evaluate", symbol_count,
+               measure(evaluator._evaluate, [(CheckInterval.INTERVAL_10_SEC, asset_stats)] * 5))
+    else:
+        print(f"{'PriceEvaluator._evaluate':34} {symbol_count:>6} skipped, "
+              f"rewrites the price file per symbol (--max-evaluate-symbols)")
+
+    change_percents = {symbol: 0.2 if index % 2 else -0.2 for index, symbol in enumerate(symbols)}
+    strategy = Interval10SecStrategy()
+    report("Strategy.perform", symbol_count,
+           measure(strategy.perform, [(change_percents, asset_stats)] * 5))
+    order_executor.join()
+
+    latencies = []
+    factory = MarketOrderFactory()
+
+    def add_order(symbol):
+        order = factory.get_order(OrderType.BUY_ORDER)
+        order.set_parameters(symbol, 10, asset_stats[symbol].latest_price)
+        order_executor.add_to_execution_queue(TimedOrder(order, latencies))
+
+    order_symbols = [(symbols[index % symbol_count],) for index in range(min(ticks, 2000))]
+    result = measure(add_order, order_symbols)
+    order_executor.join()
+    latencies.sort()
+    result["p50"] = latencies[len(latencies) // 2]
+    result["p99"] = latencies[int(len(latencies) * 0.99)]
+    report("Executor (add + execute_order)", symbol_count, result)
+
+    persistant_stats = PersistantStats()
+    persistant_stats.save_initial_price_data(feed.initial_prices())
+    saves = [(symbols[index % symbol_count], CheckInterval.INTERVAL_10_SEC, 1.0)
+             for index in range(min(ticks, 200))]
+    report("PersistantStats.save", symbol_count, measure(persistant_stats.save, saves))
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--ticks", type=int, default=20000)
+    parser.add_argument("--max-evaluate-symbols", type=int, default=1000)
+    args = parser.parse_args()
+
+    print_header()
+
+    for symbol_count in args.symbols:
+        run(symbol_count, args.ticks, args.max_evaluate_symbols)
+
+
+if __name__ == "__main__":
+
+    main()
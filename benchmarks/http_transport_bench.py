@@ -0,0 +1,133 @@
+"""Order submission latency through the HTTP transport layer
+
+Runs a local HTTP stand-in for the Binance order endpoint and submits
+orders concurrently with bare requests calls, a default session and the
+pooled session from http_transport, reporting p50/p99 latencies.
+
+Usage: python -m benchmarks.http_transport_bench [total_orders] [workers]
+"""
+
+import sys
+import json
+from time import perf_counter
+from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from http_transport import configure_session, get_requests_params
+
+
+ORDER_RESPONSE = json.dumps({
+    "symbol": "ADAUSDT",
+    "orderId": 1,
+    "status": "FILLED",
+    "fills": [{"price": "1.0", "qty": "10", "commission": "0.01", "commissionAsset": "ADA"}]
+}).encode()
+
+
+class StandInServer(ThreadingHTTPServer):
+
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class OrderHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(ORDER_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(ORDER_RESPONSE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stand_in():
+    """Start the local order endpoint
+
+    :rtype: tuple
+    :returns: Server and order url
+    """
+
+    server = StandInServer(("127.0.0.1", 0), OrderHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api/v3/order"
+
+
+def percentile(values, percent):
+    """Get percentile of the sorted values
+
+    :type values: list
+    :param values: Sorted values
+    :type percent: float
+    :param percent: Percentile between 0 and 100
+    :rtype: float
+    :returns: Percentile value
+    """
+
+    index = min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))
+
+    return values[index]
+
+
+def run(name, post, url, total_orders, workers):
+    """Submit orders concurrently and print latency percentiles
+
+    :type name: str
+    :param name: Benchmark name
+    :type post: callable
+    :param post: Function sending a POST request to the url
+    :type url: str
+    :param url: Order url
+    :type total_orders: int
+    :param total_orders: Number of orders to submit
+    :type workers: int
+    :param workers: Number of concurrent submitters
+    """
+
+    params = {"symbol": "ADAUSDT", "side": "BUY", "type": "MARKET", "quantity": 10}
+
+    def submit(_):
+        start = perf_counter()
+        post(url, data=params, **get_requests_params()).json()
+        return perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        start = perf_counter()
+        latencies = sorted(pool.map(submit, range(total_orders)))
+        elapsed = perf_counter() - start
+
+    print(f"{name:>16}: p50={percentile(latencies, 50) * 1000:.3f} ms "
+          f"p99={percentile(latencies, 99) * 1000:.3f} ms "
+          f"throughput={total_orders / elapsed:.0f} orders/s")
+
+
+def main():
+
+    total_orders = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+    server, url = start_stand_in()
+
+    print(f"Submitting {total_orders} orders with {workers} workers...")
+
+    run("bare requests", requests.post, url, total_orders, workers)
+    run("default session", requests.Session().post, url, total_orders, workers)
+    run("pooled session", configure_session(requests.Session()).post, url, total_orders, workers)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+
+    main()
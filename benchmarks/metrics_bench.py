@@ -0,0 +1,99 @@
+"""Per-tick overhead of the metrics instrumentation
+
+Feeds the same synthetic ticker messages to the instrumented
+PriceMonitor._price_msg_handler and to a copy of it without the tick
+counter, offline as in hot_path_bench, and reports the difference. The
+histogram observation used on slower paths is timed on its own.
+
+Usage: python -m benchmarks.metrics_bench [--symbols 100] [--ticks 20000] [--rounds 5]
+"""
+
+import argparse
+from timeit import timeit
+
+from benchmarks.feed import SyntheticTickerFeed, make_symbols
+from benchmarks.harness import setup_offline, measure, report, print_header
+
+
+def get_uninstrumented_monitor_class():
+    """Get a PriceMonitor whose message handler does not count ticks
+
+    :rtype: type
+    :returns: PriceMonitor subclass
+    """
+
+    from config import LOG_TICKS
+    from price_monitor import PriceMonitor
+    from tick import Tick
+
+    class UninstrumentedPriceMonitor(PriceMonitor):
+
+        def _price_msg_handler(self, message):
+
+            tick = self._ticks.get(message["s"])
+            if tick is None:
+                tick = self._ticks[message["s"]] = Tick(message["s"])
+
+            tick.update_from_message(message)
+
+            if LOG_TICKS:
+                self._log_incoming_message(tick)
+
+            self._price_statistics.process_price(tick)
+
+    return UninstrumentedPriceMonitor
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--ticks", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    symbols = make_symbols(args.symbols)
+    feed = SyntheticTickerFeed(symbols)
+    setup_offline(symbols, feed.initial_prices())
+
+    from price_monitor import PriceMonitor
+    from metrics import Histogram
+
+    messages = [(message,) for message in feed.messages(args.ticks)]
+    monitors = {
+        "instrumented": PriceMonitor(),
+        "uninstrumented": get_uninstrumented_monitor_class()()
+    }
+
+    for monitor in monitors.values():
+        monitor._price_statistics._evaluator._persistant_stats.save_initial_price_data(feed.initial_prices())
+
+    print_header()
+
+    # rounds alternate between the handlers so drift affects both alike
+    best = {}
+    for _ in range(args.rounds):
+        for name, monitor in monitors.items():
+            result = measure(monitor._price_msg_handler, messages)
+            if name not in best or result["p50"] < best[name]["p50"]:
+                best[name] = result
+
+    for name, result in best.items():
+        report(f"_price_msg_handler ({name})", args.symbols, result)
+
+    per_tick = best["instrumented"]["p50"] - best["uninstrumented"]["p50"]
+    print(f"\nPer-tick instrumentation overhead (p50): {per_tick * 1e9:.0f} ns")
+
+    histogram = Histogram("bench_seconds", "Benchmark histogram")
+    iterations = 1000000
+    baseline = timeit(lambda: None, number=iterations)
+    per_observe = (timeit(lambda: histogram.observe(0.003), number=iterations) - baseline) / iterations
+    print(f"Histogram observe overhead: {per_observe * 1e9:.0f} ns")
+
+    if per_tick >= 1e-6:
+        print("Per-tick overhead is above the 1 us budget!")
+
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,67 @@
+"""Local order book update and slippage query cost
+
+Applies random diff depth updates around a mid price to a book loaded
+with the given number of levels per side, then measures expected
+slippage and max quantity queries against it.
+
+Usage: python -m benchmarks.order_book_bench [levels] [updates]
+"""
+
+import sys
+import random
+
+from benchmarks.harness import measure, report, print_header
+
+
+def make_updates(count, levels, mid_price=1.0, tick_size=0.0001, seed=1):
+    """Create depthUpdate events touching random levels near the mid price
+
+    :type count: int
+    :param count: Number of events
+    :type levels: int
+    :param levels: Price levels per side
+    :rtype: list
+    :returns: Events with consecutive update ids
+    """
+
+    rng = random.Random(seed)
+    updates = []
+
+    for update_id in range(1, count + 1):
+        distance = rng.randint(1, levels) * tick_size
+        quantity = "0" if rng.random() < 0.2 else f"{rng.uniform(1, 1000):.2f}"
+        level = [[f"{mid_price - distance:.4f}", quantity]] if update_id % 2 else []
+        ask_level = [] if update_id % 2 else [[f"{mid_price + distance:.4f}", quantity]]
+        updates.append({"U": update_id, "u": update_id, "b": level, "a": ask_level})
+
+    return updates
+
+
+def main():
+
+    levels = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    update_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+
+    from order_book import OrderBook
+
+    tick_size = 0.0001
+    snapshot = {"lastUpdateId": 0,
+                "bids": [[f"{1.0 - i * tick_size:.4f}", "100"] for i in range(1, levels + 1)],
+                "asks": [[f"{1.0 + i * tick_size:.4f}", "100"] for i in range(1, levels + 1)]}
+
+    book = OrderBook("BENCHUSDT")
+    book.load_snapshot(snapshot)
+
+    print_header()
+    report("OrderBook.apply_update", 1,
+           measure(book.apply_update, [(update,) for update in make_updates(update_count, levels)]))
+
+    quantities = [(side, quantity) for side in ("BUY", "SELL") for quantity in (10, 1000, 20000)] * 200
+    report("OrderBook.get_expected_slippage", 1, measure(book.get_expected_slippage, quantities))
+    report("OrderBook.get_max_quantity", 1,
+           measure(book.get_max_quantity, [(side, 0.3) for side, _ in quantities]))
+
+
+if __name__ == "__main__":
+
+    main()
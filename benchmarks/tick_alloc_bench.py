@@ -0,0 +1,62 @@
+"""Per-tick memory allocation of the ticker message handler
+
+Feeds pre-generated ticker messages to PriceMonitor._price_msg_handler
+under tracemalloc and reports the average transient (peak) and retained
+bytes per tick, plus the number of live blocks left behind.
+
+Usage: python -m benchmarks.tick_alloc_bench [symbols] [ticks]
+"""
+
+import sys
+import tracemalloc
+
+from benchmarks.feed import SyntheticTickerFeed, make_symbols
+from benchmarks.harness import setup_offline
+
+
+def main():
+
+    symbol_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    symbols = make_symbols(symbol_count)
+    feed = SyntheticTickerFeed(symbols)
+    setup_offline(symbols, feed.initial_prices())
+
+    from price_monitor import PriceMonitor
+
+    monitor = PriceMonitor()
+    handler = monitor._price_msg_handler
+
+    # warm up so per-symbol state exists before measuring
+    for message in feed.messages(symbol_count):
+        handler(message)
+
+    messages = feed.messages(ticks)
+
+    tracemalloc.start()
+    start_snapshot = tracemalloc.take_snapshot()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    peak_total = 0
+
+    for message in messages:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        handler(message)
+        peak_total += tracemalloc.get_traced_memory()[1] - before
+
+    end_memory = tracemalloc.get_traced_memory()[0]
+    end_snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    block_diff = sum(stat.count_diff for stat in end_snapshot.compare_to(start_snapshot, "filename"))
+
+    print(f"Symbols: {symbol_count}, ticks: {ticks}")
+    print(f"Transient bytes per tick: {peak_total / ticks:.1f}")
+    print(f"Retained bytes per tick: {(end_memory - start_memory) / ticks:.2f}")
+    print(f"Live blocks left behind: {block_diff}")
+
+
+if __name__ == "__main__":
+
+    main()
@@ -6,13 +6,26 @@ from logging.handlers import RotatingFileHandler
 BINANCE_KEY = os.environ.get("BINANCE_API_KEY")
 BINANCE_SCR = os.environ.get("BINANCE_SCR_KEY")
 
-REPORT_FILENAME = "report.txt"
+REPORT_FILENAME = "report.jsonl"
+REPORT_MAX_BYTES = 20971520
+REPORT_BACKUP_COUNT = 10
+REPORT_FLUSH_INTERVAL = 5
 
 PERSISTANT_PRICE_FILE = "last_evaluated_prices.json"
 TRADED_ASSETS_FILE = "traded_asset_amounts.json"
 
+# in-memory state checkpoints used for warm restarts
+STATE_SNAPSHOT_FILE = "state.snap"
+STATE_SNAPSHOT_INTERVAL = 10        # seconds between checkpoints
+STATE_SNAPSHOT_MAX_AGE = 10 * 60    # older snapshots are ignored and the state is built again
+
 LOG_FILENAME = "trader.log"
 
+TRADE_DB_FILE = "trader.db"
+TRADE_DB_BATCH_SIZE = 500
+TRADE_DB_FLUSH_INTERVAL = 1
+TRADE_DB_RECORD_TICKS = True
+
 # Create a custom logger
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -46,6 +59,9 @@ WALLET_BALANCES = {"ETH": 0.1, "ADA": 100}
 # amount of investment in TL
 INVESTMENT = 0
 
+# dollar/TL rate used instead of fetching it (e.g. for offline paper trading)
+FIXED_DOLLAR_EXCHANGE_RATE = None
+
 # initial amount of USDT to start trading
 INITIAL_USDT_INVESTMENT = 120
 
@@ -56,8 +72,140 @@ TRADED_ASSET_AMOUNTS = {
     "USDT": 120
 }
 
+# stop trading if total traded assets as usdt falls this many percent
+# below INITIAL_USDT_INVESTMENT
+MAX_DRAWDOWN_PERCENT = 50
+
+# stop trading if total traded assets as usdt falls this many percent
+# below its highest seen value (None to disable)
+TRAILING_STOP_PERCENT = None
+
+# seconds after which cached exchange filters are reloaded
+EXCHANGE_INFO_REFRESH_INTERVAL = 6 * 60 * 60
+EXCHANGE_INFO_RETRY_DELAY = 60      # seconds before a failed refresh is tried again
+
+# maximum value in usdt allowed to be held per traded asset
+MAX_SYMBOL_EXPOSURE_USDT = {
+
+    "ADAUSDT": 100,
+    "VETUSDT": 100
+}
+
+# Binance REST limits used by the client-side rate limiter
+REQUEST_WEIGHT_PER_MINUTE = 1200
+ORDERS_PER_10_SEC = 50
+RATE_LIMIT_MAX_RETRIES = 3          # 418/429 responses retried before the error is raised
+
+# HTTP transport settings shared by all REST consumers
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 16
+HTTP_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+HTTP_MAX_RETRIES = 3
+HTTP_BACKOFF_FACTOR = 0.2
+HTTP_BACKOFF_MAX = 5
+
+# "binance" for real orders, "paper" for the simulated exchange
+EXCHANGE_MODE = "binance"
+
+# "binance" for live ticker sockets, "replay" for ticks recorded in REPLAY_DB_FILE
+PRICE_SOURCE = "binance"
+REPLAY_DB_FILE = "replay.db"
+REPLAY_SPEED = 1.0  # 0 replays as fast as possible
+
+# paper trading settings
+PAPER_BALANCES = {"USDT": 120}
+PAPER_LATENCY = (0.05, 0.2)  # (min, max) seconds per order
+PAPER_SLIPPAGE_BPS = 5       # slippage of the last fill in basis points
+PAPER_COMMISSION_RATE = 0.001
+PAPER_MAX_FILLS = 3
+PAPER_MIN_FILL_RATIO = 1.0   # below 1 allows partially executed orders
+
+# modules with additional strategies registered with strategy_registry.register
+STRATEGY_PLUGINS = []
+
+# local order books from the diff depth stream
+USE_DEPTH_STREAM = False
+DEPTH_UPDATE_INTERVAL = 100         # milliseconds
+DEPTH_SNAPSHOT_LIMIT = 1000
+DEPTH_BOOK_CAPACITY = 2048          # preallocated price levels per side
+DEPTH_RESYNC_DELAY = 1              # seconds before refetching a stale snapshot
+DEPTH_RESYNC_MAX_DELAY = 60         # seconds between snapshot requests after repeated errors
+DEPTH_MAX_BUFFERED_EVENTS = 1000    # latest diffs kept while a book waits for a snapshot
+MAX_EXPECTED_SLIPPAGE_PERCENT = 0.3
+
+# market data daemon (python market_data.py), used with PRICE_SOURCE = "daemon"
+MARKET_DATA_SOCKET = "/tmp/trader-market-data.sock"
+MARKET_DATA_SYMBOLS = []            # symbols published by the daemon, ASSETS_TO_TRADE if empty
+MARKET_DATA_MAX_BACKLOG = 1024 * 1024   # bytes buffered for a slow subscriber before dropping it
+MARKET_DATA_RECONNECT_DELAY = 1
+
+# ticker socket supervision
+STREAM_GAP_THRESHOLD = 3            # seconds between ticks treated as a gap to backfill
+STREAM_STALE_TIMEOUT = 30           # seconds without messages before reconnecting
+STREAM_BACKOFF_BASE = 1
+STREAM_BACKOFF_MAX = 60
+STREAM_BACKFILL_MAX_SECONDS = 60 * 60
+
+# keep only the latest ticker message per symbol while earlier ones are
+# processed (live and daemon sources, replays always process every tick)
+CONFLATE_TICKS = True
+
+# historical klines and aggregated trades (python history.py)
+HISTORY_CACHE_DIR = "history"
+HISTORY_DOWNLOAD_WORKERS = 4
+
+# executor queue
+ORDER_QUEUE_SIZE = 100
+ORDER_QUEUE_HIGH_WATERMARK = 0.8    # fraction of the queue size where buy decisions are skipped
+ORDER_MAX_AGE = 5                   # seconds before a queued order is re-evaluated
+ORDER_MAX_PRICE_DRIFT_PERCENT = 0.2 # adverse price move dropping an expired order
+
+# limit order execution, used by the intervals in LIMIT_ORDER_INTERVALS
+LIMIT_ORDER_POST_ONLY = True    # place LIMIT_MAKER orders rejected if they would take
+LIMIT_ORDER_OFFSET_BPS = 2      # distance of the limit price from the last price
+LIMIT_ORDER_TIMEOUT = 5         # seconds before an open order is amended or cancelled
+LIMIT_ORDER_MAX_AMENDS = 2
+LIMIT_ORDER_POLL_INTERVAL = 0.5
+PAPER_MAKER_COMMISSION_RATE = 0.001
+
+# apply fills from the user data stream instead of order responses
+USE_USER_DATA_STREAM = False
+
+# seconds between REST reconciliations of the streamed balances
+BALANCE_RECONCILE_INTERVAL = 15 * 60
+
+# prefix of client order ids marking orders placed by this process
+CLIENT_ORDER_PREFIX = "trader-"
+
+# log every incoming ticker message and statistics update
+LOG_TICKS = False
+
+# port of the local /metrics endpoint (None to disable)
+METRICS_PORT = 9108
+
+# profiling mode settings (python trader.py --profile)
+PROFILE_SAMPLE_INTERVAL = 0.01
+PROFILE_DUMP_INTERVAL = 60
+PROFILE_STACKS_FILE = "profile_stacks.folded"
+PROFILE_TIMINGS_FILE = "profile_timings.txt"
+
+# tick to fill tracing (python trader.py --trace or TRACING_ENABLED)
+TRACING_ENABLED = False
+TRACE_FILE = "trace.json"
+TRACE_MAX_EVENTS = 200000           # oldest events are discarded beyond this
+
 from utils import CheckInterval
 
+# intervals placing limit orders instead of market orders, e.g. (CheckInterval.INTERVAL_10_SEC,)
+LIMIT_ORDER_INTERVALS = ()
+
+# rolling correlations of the returns between evaluations of CROSS_ASSET_INTERVAL
+CROSS_ASSET_INTERVAL = CheckInterval.INTERVAL_10_SEC
+CROSS_ASSET_WINDOW = 360            # bars, one hour of 10 second bars
+CROSS_ASSET_MIN_BARS = 30           # bars before signals are given
+CROSS_ASSET_LEADERS = [ASSETS_TO_TRADE[0]]  # monitored symbols whose moves are tested as leading the others
+CROSS_ASSET_MIN_CORRELATION = 0.3   # lead-lag correlation needed for a signal
+
 ASSET_ORDER_THRESHOLDS = {
 
     "ADAUSDT": {
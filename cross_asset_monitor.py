@@ -0,0 +1,173 @@
+from threading import Lock
+
+import numpy as np
+
+from config import (logger,
+                    CROSS_ASSET_WINDOW,
+                    CROSS_ASSET_MIN_BARS,
+                    CROSS_ASSET_LEADERS,
+                    CROSS_ASSET_MIN_CORRELATION)
+from rolling_correlation import RollingCorrelation
+
+
+class LeadLagSignal:
+
+    __slots__ = ("leader", "follower", "correlation", "expected_change_percent")
+
+    def __init__(self, leader, follower, correlation, expected_change_percent):
+
+        self.leader = leader
+        self.follower = follower
+        self.correlation = correlation
+        self.expected_change_percent = expected_change_percent
+
+    def __str__(self):
+
+        return (f"{self.leader} leads {self.follower} (correlation {self.correlation:.2f}), "
+                f"expected change {self.expected_change_percent:.3f}%")
+
+
+class CrossAssetMonitor:
+
+    def __init__(self):
+
+        self._lock = Lock()
+        self._symbols = []
+        self._indexes = {}
+        self._prices = None
+        self._correlation = None
+
+    def update(self, asset_stats):
+        """Add the returns since the previous update as a new bar
+
+        The window starts again when a symbol appears, so every bar has
+        the returns of the same symbols.
+
+        :type asset_stats: dict
+        :param asset_stats: Asset price statistics
+        """
+
+        with self._lock:
+            if len(asset_stats) != len(self._symbols) or any(symbol not in self._indexes for symbol in asset_stats):
+                self._reset(sorted(asset_stats))
+
+            prices = np.fromiter((asset_stats[symbol].latest_price for symbol in self._symbols),
+                                 dtype=np.float64, count=len(self._symbols))
+
+            if self._prices is not None:
+                valid = (self._prices > 0) & (prices > 0)
+                returns = np.divide(prices, self._prices, out=np.ones_like(prices), where=valid) - 1
+                self._correlation.update(returns)
+
+            self._prices = prices
+
+    def get_correlation(self, symbol, other_symbol):
+        """Get the correlation of the returns of two symbols
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :type other_symbol: str
+        :param other_symbol: Asset symbol
+        :rtype: float
+        :returns: Correlation or None before CROSS_ASSET_MIN_BARS bars
+        """
+
+        matrix = self.get_correlation_matrix()
+        if matrix is None or symbol not in self._indexes or other_symbol not in self._indexes:
+            return None
+
+        return float(matrix[self._indexes[symbol], self._indexes[other_symbol]])
+
+    def get_correlation_matrix(self):
+        """Get the correlation matrix of the returns in the window
+
+        Rows and columns follow get_symbols.
+
+        :rtype: numpy.ndarray
+        :returns: Correlation matrix or None before CROSS_ASSET_MIN_BARS bars
+        """
+
+        with self._lock:
+            if not self._is_ready():
+                return None
+
+            return self._correlation.get_correlation()
+
+    def get_symbols(self):
+        """Get the symbols in matrix order
+
+        :rtype: list
+        :returns: Asset symbols
+        """
+
+        return list(self._symbols)
+
+    def get_lead_lag_signals(self, leaders=CROSS_ASSET_LEADERS, min_correlation=CROSS_ASSET_MIN_CORRELATION):
+        """Get the moves of followers expected from the latest moves of leaders
+
+        A symbol follows the leader with the strongest correlation between
+        the leader's returns and its own returns one bar later, if it is
+        at least min_correlation. The expected change is the leader's
+        latest return scaled by the lagged regression beta.
+
+        :type leaders: list
+        :param leaders: Leading symbols
+        :type min_correlation: float
+        :param min_correlation: Minimum absolute lead-lag correlation
+        :rtype: dict
+        :returns: Dictionary of follower: LeadLagSignal pairs
+        """
+
+        with self._lock:
+            leader_indexes = np.array([self._indexes[leader] for leader in leaders if leader in self._indexes],
+                                      dtype=np.int64)
+            if not self._is_ready() or not len(leader_indexes):
+                return {}
+
+            correlation, beta = self._correlation.get_lead_lag(leader_indexes)
+            latest_returns = self._correlation.get_latest_returns().copy()
+            symbols = self._symbols
+
+        rows = np.arange(len(leader_indexes))
+        correlation[rows, leader_indexes] = 0
+
+        strongest = np.abs(correlation).argmax(axis=0)
+        followers = np.arange(len(symbols))
+        strongest_correlation = correlation[strongest, followers]
+
+        signals = {}
+        for follower in np.flatnonzero(np.abs(strongest_correlation) >= min_correlation):
+            row = strongest[follower]
+            leader = leader_indexes[row]
+            expected_change = beta[row, follower] * latest_returns[leader] * 100
+            signal = LeadLagSignal(symbols[leader], symbols[follower],
+                                   float(strongest_correlation[follower]), float(expected_change))
+            signals[signal.follower] = signal
+
+        return signals
+
+    def _is_ready(self):
+
+        return self._correlation is not None and self._correlation.count >= CROSS_ASSET_MIN_BARS
+
+    def _reset(self, symbols):
+        """Start a new window for the given symbols
+
+        :type symbols: list
+        :param symbols: Asset symbols
+        """
+
+        logger.info(f"Tracking cross-asset correlations of {len(symbols)} symbols...")
+
+        missing_leaders = [leader for leader in CROSS_ASSET_LEADERS if leader not in symbols]
+        if missing_leaders:
+            logger.warning(f"Cross-asset leaders {', '.join(missing_leaders)} are not monitored, "
+                           f"no signals are given for them")
+
+        self._symbols = symbols
+        self._indexes = {symbol: index for index, symbol in enumerate(symbols)}
+        self._prices = None
+        self._correlation = RollingCorrelation(len(symbols), CROSS_ASSET_WINDOW)
+
+
+cross_asset_monitor = CrossAssetMonitor()
@@ -0,0 +1,161 @@
+from queue import Queue
+from functools import partial
+from threading import Thread, Timer
+
+from binance.streams import ThreadedWebsocketManager
+
+from config import (logger,
+                    DEPTH_SNAPSHOT_LIMIT,
+                    DEPTH_RESYNC_DELAY,
+                    DEPTH_RESYNC_MAX_DELAY,
+                    DEPTH_UPDATE_INTERVAL)
+from order_book import OrderBook
+from utils import get_client
+
+
+class DepthMonitor:
+
+    def __init__(self):
+
+        self._books = {}
+        self._socket_mgr = None
+        self._resync_queue = Queue()
+        self._resync_errors = {}
+
+    def start_monitoring(self, symbols):
+        """Start diff depth sockets and maintain a local order book per symbol
+
+        :type symbols: list
+        :param symbols: Asset symbols
+        """
+
+        logger.info("Start monitoring order book depth...")
+
+        resync_thread = Thread(target=self._resync_books, daemon=True)
+        resync_thread.start()
+
+        self._socket_mgr = ThreadedWebsocketManager()
+        self._socket_mgr.start()
+
+        for symbol in symbols:
+            book = self._books[symbol] = OrderBook(symbol)
+            self._socket_mgr.start_depth_socket(callback=partial(self._depth_msg_handler, book),
+                                                symbol=symbol,
+                                                interval=DEPTH_UPDATE_INTERVAL)
+
+    def stop_monitoring(self):
+        """Close the depth sockets"""
+
+        if self._socket_mgr is not None:
+            logger.info("Stop monitoring order book depth...")
+            self._socket_mgr.stop()
+
+    def get_expected_slippage(self, symbol, side, quantity):
+        """Get expected slippage percent of a market order for the symbol
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :type side: str
+        :param side: BUY/SELL
+        :type quantity: float
+        :param quantity: Order quantity
+        :rtype: float
+        :returns: Slippage percent or None if there is no synced book
+        """
+
+        book = self._books.get(symbol)
+
+        if book is None:
+            return None
+
+        return book.get_expected_slippage(side, quantity)
+
+    def get_max_quantity(self, symbol, side, max_slippage_percent):
+        """Get the largest quantity of the symbol filled within the slippage
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :type side: str
+        :param side: BUY/SELL
+        :type max_slippage_percent: float
+        :param max_slippage_percent: Allowed slippage percent
+        :rtype: float
+        :returns: Maximum quantity or None if there is no synced book
+        """
+
+        book = self._books.get(symbol)
+
+        if book is None:
+            return None
+
+        return book.get_max_quantity(side, max_slippage_percent)
+
+    def _depth_msg_handler(self, book, message):
+        """Apply a depth update, requesting a snapshot on gaps
+
+        Updates are buffered in the book until the snapshot is loaded by
+        the resync thread, so the socket callback never waits for REST.
+
+        :type book: OrderBook
+        :param book: Local order book of the symbol
+        :type message: dict
+        :param message: Socket message dictionary
+        """
+
+        if message.get("e") == "error":
+            logger.error(f"Error received from {book.symbol} depth socket: {message.get('m')}")
+            book.invalidate()
+            return
+
+        if not book.apply_update(message) and book.start_resync():
+            self._resync_queue.put(book)
+
+    def _resync_books(self):
+        """Load snapshots into the books queued for resync
+
+        A book whose snapshot is stale is queued again after
+        DEPTH_RESYNC_DELAY seconds. The delay doubles with every
+        consecutive REST error of the symbol, up to DEPTH_RESYNC_MAX_DELAY.
+        """
+
+        while True:
+            book = self._resync_queue.get()
+
+            if self._resync(book):
+                book.finish_resync()
+                continue
+
+            # try again after more updates are buffered, without giving up the resync slot
+            errors = self._resync_errors.get(book.symbol, 0)
+            delay = min(DEPTH_RESYNC_MAX_DELAY, DEPTH_RESYNC_DELAY * 2 ** errors)
+            retry_timer = Timer(delay, self._resync_queue.put, args=(book,))
+            retry_timer.daemon = True
+            retry_timer.start()
+
+    def _resync(self, book):
+        """Load a REST snapshot into the book
+
+        :type book: OrderBook
+        :param book: Local order book of the symbol
+        :rtype: bool
+        :returns: Whether the book is synced
+        """
+
+        logger.info(f"Loading order book snapshot for {book.symbol}...")
+
+        try:
+            snapshot = get_client().get_order_book(symbol=book.symbol, limit=DEPTH_SNAPSHOT_LIMIT)
+        except Exception as exc:
+            logger.error(f"Failed to get order book snapshot for {book.symbol}: {exc}")
+            self._resync_errors[book.symbol] = self._resync_errors.get(book.symbol, 0) + 1
+            return False
+
+        self._resync_errors.pop(book.symbol, None)
+
+        if not book.load_snapshot(snapshot):
+            logger.info(f"Order book snapshot for {book.symbol} is behind the stream, retrying...")
+            return False
+
+        return True
+
+depth_monitor = DepthMonitor()
@@ -0,0 +1,169 @@
+import uuid
+
+from config import logger, CLIENT_ORDER_PREFIX
+from utils import update_traded_asset_amounts
+
+
+QUOTE_ASSET = "USDT"
+
+# True while a user data stream applies the fills of executionReport events
+user_stream_active = False
+
+
+def set_user_stream_active(active):
+    """Set whether fills reach the ledger through the user data stream
+
+    :type active: bool
+    :param active: Whether a user data stream is running
+    """
+
+    global user_stream_active
+
+    user_stream_active = active
+
+
+def is_user_stream_active():
+    """Check whether fills reach the ledger through the user data stream
+
+    Order responses are applied to the ledger directly otherwise.
+
+    :rtype: bool
+    :returns: Whether a user data stream is running
+    """
+
+    return user_stream_active
+
+
+def new_client_order_id():
+    """Create a client order id marking orders placed by this process
+
+    :rtype: str
+    :returns: Client order id
+    """
+
+    return f"{CLIENT_ORDER_PREFIX}{uuid.uuid4().hex[:20]}"
+
+
+def is_own_order(client_order_id):
+    """Check whether the order was placed by this process
+
+    :type client_order_id: str
+    :param client_order_id: Client order id of the order
+    :rtype: bool
+    :returns: Whether the id has the configured prefix
+    """
+
+    return bool(client_order_id) and client_order_id.startswith(CLIENT_ORDER_PREFIX)
+
+
+def aggregate_fills(order_result):
+    """Aggregate all fills of an order response
+
+    :type order_result: dict
+    :param order_result: Result of the order execution
+    :rtype: dict
+    :returns: Executed quantity, quote quantity, volume weighted average
+        price and total commission per asset
+    """
+
+    executed_quantity = 0.0
+    quote_quantity = 0.0
+    commissions = {}
+
+    for fill in order_result.get("fills", []):
+        quantity = float(fill["qty"])
+        executed_quantity += quantity
+        quote_quantity += quantity * float(fill["price"])
+
+        commission_asset = fill.get("commissionAsset")
+        commissions[commission_asset] = commissions.get(commission_asset, 0.0) + float(fill.get("commission", 0))
+
+    if not order_result.get("fills"):
+        executed_quantity = float(order_result.get("executedQty", 0))
+        quote_quantity = float(order_result.get("cummulativeQuoteQty", 0))
+
+    average_price = quote_quantity / executed_quantity if executed_quantity else 0.0
+
+    return {"executed_quantity": executed_quantity,
+            "quote_quantity": quote_quantity,
+            "average_price": average_price,
+            "commissions": commissions}
+
+
+def apply_execution(symbol, side, executed_quantity, quote_quantity, commissions):
+    """Update traded asset amounts with the exact result of an execution
+
+    Commissions paid in the base asset or USDT are deducted from the
+    ledger; commissions in other assets (e.g. BNB) are only logged.
+
+    :type symbol: str
+    :param symbol: Asset symbol
+    :type side: str
+    :param side: BUY/SELL
+    :type executed_quantity: float
+    :param executed_quantity: Executed base asset quantity
+    :type quote_quantity: float
+    :param quote_quantity: Executed USDT quantity
+    :type commissions: dict
+    :param commissions: Commission amounts per asset
+    """
+
+    base_asset = symbol[:-len(QUOTE_ASSET)]
+    base_commission = commissions.get(base_asset, 0.0)
+    quote_commission = commissions.get(QUOTE_ASSET, 0.0)
+
+    for asset, commission in commissions.items():
+        if asset not in (base_asset, QUOTE_ASSET) and commission:
+            logger.info(f"Commission of {commission} {asset} paid for {symbol}")
+
+    if side == "BUY":
+        asset_delta = executed_quantity - base_commission
+        usdt_delta = -quote_quantity - quote_commission
+    else:
+        asset_delta = -executed_quantity - base_commission
+        usdt_delta = quote_quantity - quote_commission
+
+    update_traded_asset_amounts(symbol, asset_delta, usdt_delta)
+
+
+def process_order_result(order_result):
+    """Apply an order response with all its fills to the ledger
+
+    :type order_result: dict
+    :param order_result: Result of the order execution
+    :rtype: dict
+    :returns: Aggregated fills of the order
+    """
+
+    execution = aggregate_fills(order_result)
+
+    logger.info(f"Order {order_result.get('orderId')} executed {execution['executed_quantity']} "
+                f"{order_result['symbol']} at average price {execution['average_price']}")
+
+    apply_execution(order_result["symbol"], order_result["side"],
+                    execution["executed_quantity"], execution["quote_quantity"],
+                    execution["commissions"])
+
+    return execution
+
+
+def process_execution_report(event):
+    """Apply a trade from a user data stream executionReport event
+
+    Only trades of orders placed by this process are applied.
+
+    :type event: dict
+    :param event: executionReport event
+    """
+
+    if event.get("x") != "TRADE" or not is_own_order(event.get("c")):
+        return
+
+    last_quantity = float(event["l"])
+    last_price = float(event["L"])
+    commissions = {event.get("N"): float(event.get("n") or 0)}
+
+    logger.info(f"Execution report for order {event['i']}: {event['S']} "
+                f"{last_quantity} {event['s']} at {last_price}")
+
+    apply_execution(event["s"], event["S"], last_quantity, last_quantity * last_price, commissions)
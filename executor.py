@@ -1,35 +1,154 @@
-from queue import Queue
-from threading import Thread
+from time import time, perf_counter
+from heapq import heappush, heappop, heapify
+from itertools import count
+from threading import Thread, Condition
 
-from config import logger
+from config import logger, ORDER_QUEUE_SIZE, ORDER_QUEUE_HIGH_WATERMARK
+from metrics import (executor_queue_depth,
+                     order_round_trip_seconds,
+                     order_queue_wait_seconds,
+                     orders_expired_total,
+                     orders_rejected_total)
+from tracing import tracer
+
+
+class OrderPriority:
+
+    SELL = 0
+    BUY  = 1
 
 
 class Executor:
 
     def __init__(self):
 
-        self.order_queue = Queue()
+        self._condition = Condition()
+        self._order_heap = []
+        self._sequence = count()
+        self._unfinished_orders = 0
         self._executor_thread = Thread(target=self.execute, daemon=True)
         self._executor_thread.start()
 
     def add_to_execution_queue(self, order):
         """Add order to the queue
 
+        When the queue is full, the order replaces the lowest priority
+        queued order if it has a higher priority, otherwise it is rejected.
+
         :type order: MarketOrder
         :param order: Order to add to the execution queue
+        :rtype: bool
+        :returns: Whether the order is accepted
         """
 
         logger.info(f"Adding order[{order}] to queue...")
-        self.order_queue.put(order)
+
+        entry = (order.priority, next(self._sequence), order)
+
+        with self._condition:
+            if len(self._order_heap) >= ORDER_QUEUE_SIZE:
+                lowest = max(self._order_heap)
+                if lowest[0] <= entry[0]:
+                    logger.warning(f"Order queue is full, rejecting order[{order}]")
+                    orders_rejected_total.inc()
+                    return False
+
+                logger.warning(f"Order queue is full, dropping order[{lowest[2]}]")
+                orders_rejected_total.inc()
+                self._order_heap.remove(lowest)
+                heapify(self._order_heap)
+                self._unfinished_orders -= 1
+
+            order.queued_at = time()
+            heappush(self._order_heap, entry)
+            self._unfinished_orders += 1
+            executor_queue_depth.set(len(self._order_heap))
+            self._condition.notify_all()
+
+        return True
+
+    def is_congested(self):
+        """Check whether the queue is above ORDER_QUEUE_HIGH_WATERMARK
+
+        Strategies stop adding buy orders while the queue is congested.
+
+        :rtype: bool
+        :returns: Whether the queue is congested
+        """
+
+        return len(self._order_heap) >= ORDER_QUEUE_SIZE * ORDER_QUEUE_HIGH_WATERMARK
+
+    def drop_orders(self, priority):
+        """Remove queued orders with the given priority
+
+        :type priority: int
+        :param priority: OrderPriority of the orders to remove
+        """
+
+        with self._condition:
+            remaining = [entry for entry in self._order_heap if entry[0] != priority]
+            dropped_count = len(self._order_heap) - len(remaining)
+
+            self._order_heap = remaining
+            heapify(self._order_heap)
+            self._unfinished_orders -= dropped_count
+            executor_queue_depth.set(len(self._order_heap))
+            self._condition.notify_all()
+
+        if dropped_count:
+            logger.info(f"Dropped {dropped_count} queued orders")
+
+    def get_queued_orders(self):
+        """Get the orders waiting in the queue in execution order
+
+        :rtype: list
+        :returns: Queued orders
+        """
+
+        with self._condition:
+            return [order for _, _, order in sorted(self._order_heap)]
+
+    def join(self):
+        """Block until all queued orders are executed or dropped"""
+
+        with self._condition:
+            while self._unfinished_orders:
+                self._condition.wait()
 
     def execute(self):
-        """Get next order from the queue and execute"""
+        """Get the highest priority order from the queue and execute
+
+        Orders older than their deadline are re-evaluated against the
+        latest price and dropped if the price moved against them.
+        """
 
         while True:
-            order = self.order_queue.get()
-            logger.info(f"Executing order[{order}]...")
-            order.execute_order()
-            self.order_queue.task_done()
+            with self._condition:
+                while not self._order_heap:
+                    self._condition.wait()
+
+                _, _, order = heappop(self._order_heap)
+                executor_queue_depth.set(len(self._order_heap))
+
+            dequeued_at = time()
+            order_queue_wait_seconds.observe(dequeued_at - order.queued_at)
+            tracer.record("queue_wait", order.correlation_id, order.queued_at, dequeued_at, symbol=order.symbol)
+
+            try:
+                if order.is_expired() and not order.revalidate():
+                    logger.info(f"Order[{order}] expired before execution, dropping...")
+                    orders_expired_total.inc()
+                else:
+                    logger.info(f"Executing order[{order}]...")
+
+                    start = perf_counter()
+                    with tracer.span("execute_order", order.correlation_id, symbol=order.symbol):
+                        order.execute_order()
+                    order_round_trip_seconds.observe(perf_counter() - start)
+            finally:
+                with self._condition:
+                    self._unfinished_orders -= 1
+                    self._condition.notify_all()
 
 
-order_executor = Executor()
\ No newline at end of file
+order_executor = Executor()
@@ -0,0 +1,353 @@
+"""Historical klines and aggregated trades with an on-disk cache
+
+Usage: python history.py SYMBOL [SYMBOL ...] --start YYYY-MM-DD [--end YYYY-MM-DD] [--resolution 1m]
+
+Data is cached per (symbol, resolution, day) as one .npz file of column
+arrays under HISTORY_CACHE_DIR/SYMBOL/RESOLUTION/YYYY-MM-DD.npz, with the
+resolution "aggTrades" for aggregated trades. Every file records the time
+up to which it is complete, so finished days are served from disk and
+the current day is topped up from where the last download stopped.
+Days are downloaded concurrently by HISTORY_DOWNLOAD_WORKERS threads
+through the rate limited client.
+"""
+
+import os
+import argparse
+import tempfile
+from time import time
+from datetime import date, datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from config import (logger,
+                    EXCHANGE_MODE,
+                    HISTORY_CACHE_DIR,
+                    HISTORY_DOWNLOAD_WORKERS)
+from utils import get_client, create_public_client
+
+
+DAY_MS = 24 * 60 * 60 * 1000
+HOUR_MS = 60 * 60 * 1000
+
+KLINES_LIMIT = 1000
+AGG_TRADES_LIMIT = 1000
+
+# aggregated trades younger than this are not cached yet
+AGG_TRADES_SETTLE_MS = 5000
+
+AGG_TRADES = "aggTrades"
+KLINE_RESOLUTIONS = ("1m", "3m", "5m", "15m", "30m", "1h", "2h", "4h", "6h", "8h", "12h", "1d")
+
+# (column name, index in a kline row, dtype)
+KLINE_COLUMNS = (("open_time", 0, np.int64),
+                 ("open", 1, np.float64),
+                 ("high", 2, np.float64),
+                 ("low", 3, np.float64),
+                 ("close", 4, np.float64),
+                 ("volume", 5, np.float64),
+                 ("close_time", 6, np.int64),
+                 ("quote_volume", 7, np.float64),
+                 ("trades", 8, np.int64),
+                 ("taker_buy_volume", 9, np.float64),
+                 ("taker_buy_quote_volume", 10, np.float64))
+
+# (column name, key in an aggregated trade, dtype)
+AGG_TRADE_COLUMNS = (("id", "a", np.int64),
+                     ("price", "p", np.float64),
+                     ("quantity", "q", np.float64),
+                     ("first_trade_id", "f", np.int64),
+                     ("last_trade_id", "l", np.int64),
+                     ("time", "T", np.int64),
+                     ("is_buyer_maker", "m", np.bool_))
+
+
+def get_day_start(day):
+    """Get the start of a UTC day in milliseconds
+
+    :type day: date
+    :param day: Day
+    :rtype: int
+    :returns: Milliseconds since the epoch
+    """
+
+    return int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def get_days(start_day, end_day):
+    """Get the days from start_day to end_day, both included
+
+    :type start_day: date
+    :param start_day: First day
+    :type end_day: date
+    :param end_day: Last day
+    :rtype: list
+    :returns: Days
+    """
+
+    return [start_day + timedelta(days=offset) for offset in range((end_day - start_day).days + 1)]
+
+
+def get_columns(resolution):
+    """Get the column definitions of the resolution
+
+    :type resolution: str
+    :param resolution: Kline interval or "aggTrades"
+    :rtype: tuple
+    :returns: (column name, source key, dtype) tuples
+    """
+
+    if resolution == AGG_TRADES:
+        return AGG_TRADE_COLUMNS
+    if resolution in KLINE_RESOLUTIONS:
+        return KLINE_COLUMNS
+
+    raise ValueError(f"Unknown resolution {resolution}")
+
+
+def to_columns(rows, columns):
+    """Convert klines or aggregated trades to column arrays
+
+    :type rows: list
+    :param rows: Kline rows or aggregated trade dictionaries
+    :type columns: tuple
+    :param columns: Column definitions
+    :rtype: dict
+    :returns: Dictionary of column name: array pairs
+    """
+
+    return {name: np.array([row[key] for row in rows], dtype=dtype) for name, key, dtype in columns}
+
+
+class HistoryDownloader:
+
+    def __init__(self, client=None, cache_dir=HISTORY_CACHE_DIR, workers=HISTORY_DOWNLOAD_WORKERS):
+
+        self._client = client
+        self._cache_dir = cache_dir
+        self._workers = workers
+
+    def download(self, symbols, resolution, start_day, end_day):
+        """Bring the cache of the symbols and days up to date
+
+        :type symbols: list
+        :param symbols: Asset symbols
+        :type resolution: str
+        :param resolution: Kline interval or "aggTrades"
+        :type start_day: date
+        :param start_day: First day
+        :type end_day: date
+        :param end_day: Last day, included
+        :rtype: dict
+        :returns: Number of days served from the cache and downloaded
+        """
+
+        get_columns(resolution)
+
+        if self._client is None:
+            # the simulated exchange has no history, so paper mode uses a public client
+            self._client = get_client() if EXCHANGE_MODE != "paper" else create_public_client()
+
+        keys = [(symbol, day) for symbol in symbols for day in get_days(start_day, end_day)]
+
+        with ThreadPoolExecutor(max_workers=self._workers) as pool:
+            downloaded = list(pool.map(lambda key: self._update_day(key[0], resolution, key[1]), keys))
+
+        counts = {"cached": downloaded.count(False), "downloaded": downloaded.count(True)}
+        logger.info(f"History of {len(symbols)} symbols for {resolution}: "
+                    f"{counts['cached']} days cached, {counts['downloaded']} days downloaded")
+
+        return counts
+
+    def load(self, symbol, resolution, start_day, end_day):
+        """Get the data of the days, downloading what is missing
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :type resolution: str
+        :param resolution: Kline interval or "aggTrades"
+        :type start_day: date
+        :param start_day: First day
+        :type end_day: date
+        :param end_day: Last day, included
+        :rtype: dict
+        :returns: Dictionary of column name: array pairs in time order
+        """
+
+        self.download([symbol], resolution, start_day, end_day)
+
+        parts = [self._read_day(self._get_path(symbol, resolution, day))[0]
+                 for day in get_days(start_day, end_day)]
+
+        return {name: np.concatenate([part[name] for part in parts if part is not None] or
+                                     [np.array([], dtype=dtype)])
+                for name, _, dtype in get_columns(resolution)}
+
+    def _update_day(self, symbol, resolution, day):
+        """Download the part of the day missing from its cache file
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :type resolution: str
+        :param resolution: Kline interval or "aggTrades"
+        :type day: date
+        :param day: Day
+        :rtype: bool
+        :returns: Whether anything was requested from the API
+        """
+
+        path = self._get_path(symbol, resolution, day)
+        columns, fetched_until = self._read_day(path)
+
+        day_start = get_day_start(day)
+        day_end = day_start + DAY_MS
+        now = int(time() * 1000)
+
+        if columns is None:
+            fetched_until = day_start
+
+        if fetched_until >= day_end or fetched_until >= now:
+            return False
+
+        if resolution == AGG_TRADES:
+            end = min(day_end, now - AGG_TRADES_SETTLE_MS)
+            rows = self._fetch_agg_trades(symbol, fetched_until, end)
+            fetched_until = max(fetched_until, end)
+        else:
+            end = min(day_end, now)
+            rows = self._fetch_klines(symbol, resolution, fetched_until, end)
+            if end == day_end:
+                fetched_until = day_end
+            elif rows:
+                fetched_until = rows[-1][6] + 1
+
+        new_columns = to_columns(rows, get_columns(resolution))
+        if columns is not None:
+            new_columns = {name: np.concatenate([columns[name], values]) for name, values in new_columns.items()}
+
+        self._write_day(path, new_columns, fetched_until)
+
+        return True
+
+    def _fetch_klines(self, symbol, resolution, start, end):
+        """Get the klines closed before end
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :type resolution: str
+        :param resolution: Kline interval
+        :type start: int
+        :param start: Start time in milliseconds
+        :type end: int
+        :param end: End time in milliseconds
+        :rtype: list
+        :returns: Kline rows
+        """
+
+        rows = []
+
+        while True:
+            page = self._client.get_klines(symbol=symbol, interval=resolution,
+                                           startTime=start, endTime=end - 1, limit=KLINES_LIMIT)
+            rows.extend(row for row in page if row[6] < end)
+
+            if len(page) < KLINES_LIMIT:
+                return rows
+
+            start = page[-1][0] + 1
+
+    def _fetch_agg_trades(self, symbol, start, end):
+        """Get the aggregated trades between start and end
+
+        The API limits time ranges to an hour, so the range is walked in
+        hourly windows and each window is paged by trade id.
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :type start: int
+        :param start: Start time in milliseconds
+        :type end: int
+        :param end: End time in milliseconds, excluded
+        :rtype: list
+        :returns: Aggregated trades
+        """
+
+        trades = []
+
+        for window_start in range(start, end, HOUR_MS):
+            window_end = min(end, window_start + HOUR_MS)
+            page = self._client.get_aggregate_trades(symbol=symbol, startTime=window_start,
+                                                     endTime=window_end - 1, limit=AGG_TRADES_LIMIT)
+
+            while page:
+                in_window = [trade for trade in page if trade["T"] < window_end]
+                trades.extend(in_window)
+
+                if len(page) < AGG_TRADES_LIMIT or len(in_window) < len(page):
+                    break
+
+                page = self._client.get_aggregate_trades(symbol=symbol, fromId=page[-1]["a"] + 1,
+                                                         limit=AGG_TRADES_LIMIT)
+
+        return trades
+
+    def _get_path(self, symbol, resolution, day):
+
+        return os.path.join(self._cache_dir, symbol, resolution, f"{day.isoformat()}.npz")
+
+    def _read_day(self, path):
+        """Read a cache file
+
+        :type path: str
+        :param path: Cache file path
+        :rtype: tuple
+        :returns: Columns and the time they are complete until, (None, None) if not cached
+        """
+
+        if not os.path.exists(path):
+            return None, None
+
+        with np.load(path) as data:
+            fetched_until = int(data["fetched_until"])
+            columns = {name: data[name] for name in data.files if name != "fetched_until"}
+
+        return columns, fetched_until
+
+    def _write_day(self, path, columns, fetched_until):
+        """Replace a cache file atomically
+
+        :type path: str
+        :param path: Cache file path
+        :type columns: dict
+        :param columns: Dictionary of column name: array pairs
+        :type fetched_until: int
+        :param fetched_until: Time in milliseconds the data is complete until
+        """
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # a unique temporary file, so concurrent downloads of a day never mix their writes
+        descriptor, temp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.",
+                                                 dir=os.path.dirname(path))
+        try:
+            with os.fdopen(descriptor, "wb") as cache_file:
+                np.savez(cache_file, fetched_until=np.int64(fetched_until), **columns)
+
+            os.replace(temp_path, path)
+        except Exception:
+            os.unlink(temp_path)
+            raise
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--resolution", default="1m",
+                        help=f"kline interval or {AGG_TRADES}")
+    parser.add_argument("--start", type=date.fromisoformat, required=True)
+    parser.add_argument("--end", type=date.fromisoformat,
+                        default=datetime.now(timezone.utc).date())
+    args = parser.parse_args()
+
+    HistoryDownloader().download(args.symbols, args.resolution, args.start, args.end)
@@ -0,0 +1,84 @@
+import random
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import (HTTP_POOL_CONNECTIONS,
+                    HTTP_POOL_MAXSIZE,
+                    HTTP_TIMEOUT,
+                    HTTP_MAX_RETRIES,
+                    HTTP_BACKOFF_FACTOR,
+                    HTTP_BACKOFF_MAX)
+
+
+session = None
+
+
+class JitteredRetry(Retry):
+
+    def get_backoff_time(self):
+        """Get exponential backoff time with full jitter
+
+        :rtype: float
+        :returns: Seconds to sleep before the next retry
+        """
+
+        backoff = super().get_backoff_time()
+
+        return random.uniform(0, min(backoff, HTTP_BACKOFF_MAX))
+
+
+def configure_session(http_session):
+    """Mount pooled adapters with jittered retries on the given session
+
+    Only idempotent requests are retried, so orders are never sent twice.
+
+    :type http_session: requests.Session
+    :param http_session: Session to configure
+    :rtype: requests.Session
+    :returns: Configured session
+    """
+
+    retry = JitteredRetry(total=HTTP_MAX_RETRIES,
+                          connect=HTTP_MAX_RETRIES,
+                          read=HTTP_MAX_RETRIES,
+                          status=HTTP_MAX_RETRIES,
+                          status_forcelist=(500, 502, 503, 504),
+                          backoff_factor=HTTP_BACKOFF_FACTOR,
+                          raise_on_status=False)
+
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS,
+                          pool_maxsize=HTTP_POOL_MAXSIZE,
+                          max_retries=retry)
+
+    http_session.mount("https://", adapter)
+    http_session.mount("http://", adapter)
+    http_session.headers.update({"Connection": "keep-alive"})
+
+    return http_session
+
+
+def get_session():
+    """Get shared session for REST consumers other than the Binance client
+
+    :rtype: requests.Session
+    :returns: Pooled keep-alive session
+    """
+
+    global session
+
+    if session is None:
+        session = configure_session(requests.Session())
+
+    return session
+
+
+def get_requests_params():
+    """Get request parameters passed to every Binance client call
+
+    :rtype: dict
+    :returns: Request parameters
+    """
+
+    return {"timeout": HTTP_TIMEOUT}
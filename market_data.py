@@ -0,0 +1,327 @@
+"""Market data daemon sharing one Binance feed with local trader processes
+
+Usage: python market_data.py
+
+The daemon owns the symbol ticker sockets of MARKET_DATA_SYMBOLS and
+publishes every tick as a fixed size record over the Unix domain socket
+MARKET_DATA_SOCKET. Traders with PRICE_SOURCE = "daemon" subscribe to it
+instead of opening their own sockets.
+"""
+
+import os
+import json
+import socket
+import struct
+from time import sleep
+from threading import Lock, Thread, Event
+
+from config import (logger,
+                    ASSETS_TO_TRADE,
+                    MARKET_DATA_SOCKET,
+                    MARKET_DATA_SYMBOLS,
+                    MARKET_DATA_MAX_BACKLOG,
+                    MARKET_DATA_RECONNECT_DELAY)
+
+
+# symbol, event time, close, previous day close, change, change percent
+TICK_RECORD = struct.Struct("<16sqdddd")
+
+
+def pack_tick(message):
+    """Pack a symbol ticker socket message into a tick record
+
+    :type message: dict
+    :param message: Socket message dictionary
+    :rtype: bytes
+    :returns: Tick record
+    """
+
+    return TICK_RECORD.pack(message["s"].encode(), message["E"], float(message["c"]),
+                            float(message["x"]), float(message["p"]), float(message["P"]))
+
+
+class Subscriber:
+
+    def __init__(self, connection, symbols):
+
+        self.connection = connection
+        self.symbols = symbols
+        self.backlog = bytearray()
+
+    def send(self, record):
+        """Send a record without blocking, keeping what does not fit
+
+        :type record: bytes
+        :param record: Tick record
+        :rtype: bool
+        :returns: False if the backlog exceeds MARKET_DATA_MAX_BACKLOG
+        """
+
+        if self.backlog:
+            self.backlog += record
+            data = bytes(self.backlog)
+        else:
+            data = record
+
+        try:
+            sent = self.connection.send(data)
+        except BlockingIOError:
+            sent = 0
+
+        self.backlog = bytearray(data[sent:])
+
+        return len(self.backlog) <= MARKET_DATA_MAX_BACKLOG
+
+
+class MarketDataDaemon:
+
+    def __init__(self, socket_path=MARKET_DATA_SOCKET):
+
+        self._socket_path = socket_path
+        self._lock = Lock()
+        self._subscribers = {}
+        self._latest_records = {}
+        self._server = None
+
+    def start_server(self):
+        """Listen for subscribers on the Unix domain socket"""
+
+        if os.path.exists(self._socket_path):
+            os.unlink(self._socket_path)
+
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self._socket_path)
+        self._server.listen(128)
+
+        logger.info(f"Publishing market data on {self._socket_path}...")
+
+        Thread(target=self._accept, daemon=True).start()
+
+    def start_monitoring(self, symbols):
+        """Consume the Binance symbol ticker sockets and publish their ticks
+
+        :type symbols: list
+        :param symbols: Asset symbols
+        """
+
+        from binance.streams import ThreadedWebsocketManager
+        from stream_supervisor import StreamSupervisor
+        from utils import get_client
+
+        socket_mgr = ThreadedWebsocketManager()
+        socket_mgr.start()
+
+        StreamSupervisor(socket_mgr, symbols, self.publish, get_client()).start()
+        socket_mgr.join()
+
+    def publish(self, message):
+        """Send a tick to the subscribers of its symbol
+
+        Subscribers are written to without blocking; a subscriber whose
+        backlog grows over MARKET_DATA_MAX_BACKLOG is disconnected.
+
+        :type message: dict
+        :param message: Symbol ticker socket message
+        """
+
+        record = pack_tick(message)
+        symbol = message["s"]
+
+        with self._lock:
+            self._latest_records[symbol] = record
+            subscribers = self._subscribers.get(symbol, ())
+
+            for subscriber in list(subscribers):
+                try:
+                    if subscriber.send(record):
+                        continue
+                    logger.warning("Disconnecting slow market data subscriber")
+                except OSError:
+                    logger.info("Market data subscriber disconnected")
+
+                self._remove(subscriber)
+
+    def _accept(self):
+        """Accept subscribers and handle their requests"""
+
+        while True:
+            connection, _ = self._server.accept()
+            Thread(target=self._handle_request, args=(connection,), daemon=True).start()
+
+    def _handle_request(self, connection):
+        """Read the request line of a new connection
+
+        {"type": "snapshot", "symbols": [...]} gets the latest record of
+        every symbol and is closed. {"type": "subscribe", "symbols": [...]}
+        gets the latest records followed by every new tick.
+
+        :type connection: socket.socket
+        :param connection: Accepted connection
+        """
+
+        try:
+            with connection.makefile("rb") as request_file:
+                request = json.loads(request_file.readline())
+        except (OSError, ValueError) as exc:
+            logger.error(f"Invalid market data request: {exc}")
+            connection.close()
+            return
+
+        symbols = request.get("symbols") or list(self._latest_records)
+
+        with self._lock:
+            snapshot = b"".join(self._latest_records[symbol] for symbol in symbols
+                                if symbol in self._latest_records)
+
+            if request.get("type") == "subscribe":
+                # the snapshot goes through the non-blocking backlog, ahead of new ticks
+                connection.setblocking(False)
+
+                subscriber = Subscriber(connection, symbols)
+                try:
+                    subscriber.send(snapshot)
+                except OSError as exc:
+                    logger.error(f"Failed to send market data snapshot: {exc}")
+                    connection.close()
+                    return
+
+                for symbol in symbols:
+                    self._subscribers.setdefault(symbol, []).append(subscriber)
+
+        if request.get("type") != "subscribe":
+            try:
+                connection.sendall(snapshot)
+            except OSError as exc:
+                logger.error(f"Failed to send market data snapshot: {exc}")
+            connection.close()
+            return
+
+        logger.info(f"Market data subscriber added for {len(symbols)} symbols")
+
+    def _remove(self, subscriber):
+        """Remove a subscriber from all symbols and close it
+
+        :type subscriber: Subscriber
+        :param subscriber: Subscriber to remove
+        """
+
+        for symbol in subscriber.symbols:
+            subscribers = self._subscribers.get(symbol, [])
+            if subscriber in subscribers:
+                subscribers.remove(subscriber)
+
+        subscriber.connection.close()
+
+
+class MarketDataFeed:
+
+    def __init__(self, symbols, socket_path=MARKET_DATA_SOCKET):
+
+        self._symbols = list(symbols)
+        self._socket_path = socket_path
+        self._stop_event = Event()
+        self._connection = None
+
+    def run(self, callback):
+        """Pass ticks from the market data daemon to the callback
+
+        Ticks are given as symbol ticker socket messages with float
+        values. The connection is opened again if the daemon goes away.
+
+        :type callback: callable
+        :param callback: Socket message handler
+        """
+
+        self._stop_event.clear()
+
+        while not self._stop_event.is_set():
+            try:
+                self._connection = self._connect("subscribe")
+                logger.info(f"Subscribed to market data on {self._socket_path}")
+                self._receive(self._connection, callback)
+            except OSError as exc:
+                if not self._stop_event.is_set():
+                    logger.error(f"Market data connection failed: {exc}")
+
+            if not self._stop_event.is_set():
+                sleep(MARKET_DATA_RECONNECT_DELAY)
+
+    def stop(self):
+        """Stop receiving ticks"""
+
+        self._stop_event.set()
+
+        if self._connection is not None:
+            self._connection.close()
+
+    def get_latest_prices(self):
+        """Get the latest price of every symbol from the daemon
+
+        :rtype: dict
+        :returns: Dictionary of symbol: price pairs
+        """
+
+        latest_prices = {}
+
+        with self._connect("snapshot") as connection:
+            self._receive(connection, lambda message: latest_prices.__setitem__(message["s"], message["c"]))
+
+        return latest_prices
+
+    def _connect(self, request_type):
+        """Connect to the daemon and send the request
+
+        :type request_type: str
+        :param request_type: subscribe or snapshot
+        :rtype: socket.socket
+        :returns: Connection
+        """
+
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(self._socket_path)
+        connection.sendall(json.dumps({"type": request_type, "symbols": self._symbols}).encode() + b"\n")
+
+        return connection
+
+    def _receive(self, connection, callback):
+        """Read tick records until the connection is closed
+
+        :type connection: socket.socket
+        :param connection: Connection to the daemon
+        :type callback: callable
+        :param callback: Socket message handler
+        """
+
+        record_size = TICK_RECORD.size
+        symbols = {}
+        pending = b""
+
+        while True:
+            data = connection.recv(65536)
+            if not data:
+                return
+
+            data = pending + data if pending else data
+            complete = len(data) - len(data) % record_size
+
+            for raw_symbol, event_time, close, prev_day, change, change_percent in TICK_RECORD.iter_unpack(
+                    data[:complete]):
+                symbol = symbols.get(raw_symbol)
+                if symbol is None:
+                    symbol = symbols[raw_symbol] = raw_symbol.rstrip(b"\0").decode()
+
+                callback({"e": "24hrTicker", "E": event_time, "s": symbol,
+                          "c": close, "x": prev_day, "p": change, "P": change_percent})
+
+            pending = data[complete:]
+
+
+if __name__ == "__main__":
+
+    daemon = MarketDataDaemon()
+    daemon.start_server()
+
+    try:
+        daemon.start_monitoring(MARKET_DATA_SYMBOLS or ASSETS_TO_TRADE)
+    except KeyboardInterrupt:
+        logger.info("Market data daemon stopped manually!")
@@ -1,23 +1,33 @@
+from config import LIMIT_ORDER_INTERVALS
 from utils import OrderType
 from market_order.orders import (MarketBuyOrder,
                                  MarketSellOrder,
+                                 LimitBuyOrder,
+                                 LimitSellOrder,
                                  MarketNoOrder)
 
 
 class MarketOrderFactory:
 
-    def get_order(self, order_type):
+    def get_order(self, order_type, interval=None):
         """"Create order according to order types
 
+        Intervals listed in LIMIT_ORDER_INTERVALS get limit orders,
+        others get market orders.
+
         :type order_type: OrderType
         :param order_type: Type of order either buy, sell or no order
+        :type interval: CheckInterval
+        :param interval: Interval of the strategy creating the order
         """
 
+        use_limit_order = interval in LIMIT_ORDER_INTERVALS
+
         order = None
         if order_type == OrderType.BUY_ORDER:
-            order = MarketBuyOrder()
+            order = LimitBuyOrder() if use_limit_order else MarketBuyOrder()
         elif order_type == OrderType.SELL_ORDER:
-            order = MarketSellOrder()
+            order = LimitSellOrder() if use_limit_order else MarketSellOrder()
         else:
             order = MarketNoOrder()
 
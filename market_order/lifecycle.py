@@ -0,0 +1,272 @@
+from time import time
+from threading import Lock, Thread, Timer, Event
+
+from binance.exceptions import BinanceAPIException, BinanceOrderException
+
+from config import (logger,
+                    LIMIT_ORDER_TIMEOUT,
+                    LIMIT_ORDER_MAX_AMENDS,
+                    LIMIT_ORDER_POLL_INTERVAL)
+from utils import get_client
+from execution import process_order_result, is_user_stream_active
+from metrics import limit_order_amends_total, limit_order_cancels_total
+from reporter import reporter
+from trade_store import trade_store
+from tracing import tracer
+
+
+FINAL_STATUSES = {"FILLED", "CANCELED", "EXPIRED", "REJECTED"}
+
+
+class TrackedOrder:
+
+    __slots__ = ("order", "order_id", "client_order_id", "placed_at", "status", "executed_quantity")
+
+    def __init__(self, order, order_result):
+
+        self.order = order
+        self.order_id = order_result["orderId"]
+        self.client_order_id = order_result["clientOrderId"]
+        self.placed_at = time()
+        self.status = order_result["status"]
+        self.executed_quantity = float(order_result.get("executedQty", 0))
+
+    def update(self, status, executed_quantity):
+        """Update state of the order from the exchange
+
+        :type status: str
+        :param status: Order status
+        :type executed_quantity: float
+        :param executed_quantity: Cumulative executed quantity
+        """
+
+        self.status = status
+        self.executed_quantity = executed_quantity
+
+
+class OrderLifecycleManager:
+
+    def __init__(self):
+
+        self.client = get_client()
+        self._lock = Lock()
+        self._orders = {}
+        self._stop_event = Event()
+        self._monitor_thread = Thread(target=self._monitor, daemon=True)
+        self._monitor_thread.start()
+
+    def track(self, order, order_result):
+        """Start tracking a placed limit order
+
+        :type order: LimitOrder
+        :param order: Order that placed the exchange order
+        :type order_result: dict
+        :param order_result: Response of the order placement
+        """
+
+        tracked = TrackedOrder(order, order_result)
+
+        with self._lock:
+            self._orders[tracked.client_order_id] = tracked
+
+        if tracked.status in FINAL_STATUSES:
+            self._finalize(tracked)
+
+    def retry_later(self, order):
+        """Add the order to the executor queue again after the poll interval
+
+        :type order: LimitOrder
+        :param order: Order to place again
+        """
+
+        Timer(LIMIT_ORDER_POLL_INTERVAL, self._add_again, args=(order,)).start()
+
+    def on_execution_report(self, event):
+        """Update a tracked order from a user data stream executionReport event
+
+        :type event: dict
+        :param event: executionReport event
+        """
+
+        with self._lock:
+            tracked = self._orders.get(event.get("C")) or self._orders.get(event.get("c"))
+
+        if tracked is not None:
+            tracked.update(event["X"], float(event["z"]))
+
+    def stop(self):
+        """Stop checking tracked orders and wait for a running check to end"""
+
+        self._stop_event.set()
+        self._monitor_thread.join()
+
+    def cancel_all(self):
+        """Cancel every open tracked order without replacing it
+
+        The monitor thread is stopped first, so the orders are not
+        checked by two threads at once.
+        """
+
+        self.stop()
+
+        with self._lock:
+            tracked_orders = list(self._orders.values())
+
+        for tracked in tracked_orders:
+            tracked.order.amend_count = LIMIT_ORDER_MAX_AMENDS
+            try:
+                self._cancel(tracked)
+            except Exception as exc:
+                logger.error(f"Failed to cancel order {tracked.order_id}: {exc}")
+
+    def get_state(self):
+        """Get the tracked orders to follow them again after a restart
+
+        :rtype: list
+        :returns: Order states with the exchange ids of their open orders
+        """
+
+        with self._lock:
+            tracked_orders = list(self._orders.values())
+
+        return [dict(tracked.order.get_state(),
+                     order_id=tracked.order_id,
+                     client_order_id=tracked.client_order_id,
+                     executed_quantity=tracked.executed_quantity) for tracked in tracked_orders]
+
+    def restore_state(self, states):
+        """Track the open orders of a previous run again
+
+        Their status is refreshed by the next poll or execution report.
+
+        :type states: list
+        :param states: Order states returned by get_state
+        """
+
+        from market_order.orders import restore_order
+
+        for state in states:
+            logger.info(f"Resuming tracking of order {state['order_id']}...")
+            self.track(restore_order(state), {"orderId": state["order_id"],
+                                              "clientOrderId": state["client_order_id"],
+                                              "status": "NEW",
+                                              "executedQty": state["executed_quantity"]})
+
+    def _monitor(self):
+        """Check tracked orders every LIMIT_ORDER_POLL_INTERVAL seconds"""
+
+        while not self._stop_event.wait(LIMIT_ORDER_POLL_INTERVAL):
+
+            with self._lock:
+                tracked_orders = list(self._orders.values())
+
+            for tracked in tracked_orders:
+                try:
+                    self._check(tracked)
+                except Exception as exc:
+                    logger.error(f"Failed to check order {tracked.order_id}: {exc}")
+
+    def _check(self, tracked):
+        """Finalize a done order or cancel it after LIMIT_ORDER_TIMEOUT
+
+        Order state is pushed by the user data stream when it is running,
+        otherwise it is polled.
+
+        :type tracked: TrackedOrder
+        :param tracked: Tracked order
+        """
+
+        if not is_user_stream_active():
+            state = self.client.get_order(symbol=tracked.order.symbol, orderId=tracked.order_id)
+            tracked.update(state["status"], float(state["executedQty"]))
+
+        if tracked.status in FINAL_STATUSES:
+            self._finalize(tracked)
+        elif time() - tracked.placed_at > LIMIT_ORDER_TIMEOUT:
+            self._cancel(tracked)
+
+    def _cancel(self, tracked):
+        """Cancel the order and place the remaining amount again if amends are left
+
+        :type tracked: TrackedOrder
+        :param tracked: Tracked order
+        """
+
+        order = tracked.order
+
+        try:
+            state = self.client.cancel_order(symbol=order.symbol, orderId=tracked.order_id)
+        except (BinanceAPIException, BinanceOrderException) as exc:
+            logger.info(f"Failed to cancel order {tracked.order_id}: {exc}")
+            state = self.client.get_order(symbol=order.symbol, orderId=tracked.order_id)
+
+        tracked.update(state["status"], float(state["executedQty"]))
+
+        if tracked.status not in FINAL_STATUSES:
+            return
+
+        self._finalize(tracked)
+
+        if tracked.status == "FILLED" or order.remaining_amount <= 0:
+            return
+
+        if order.amend_count < LIMIT_ORDER_MAX_AMENDS:
+            order.amend_count += 1
+            limit_order_amends_total.inc()
+            logger.info(f"Amending order[{order}] at the latest price...")
+            self._add_again(order)
+        else:
+            limit_order_cancels_total.inc()
+            logger.info(f"Order[{order}] cancelled on timeout")
+
+    def _add_again(self, order):
+        """Add the order to the executor queue again
+
+        :type order: LimitOrder
+        :param order: Order with a remaining amount
+        """
+
+        if not order.add():
+            logger.error(f"Order[{order}] was not accepted by the executor queue, dropped")
+
+    def _finalize(self, tracked):
+        """Stop tracking the order and account for its trades
+
+        Only the thread removing the order from the tracked orders
+        accounts for it, so its fills are applied once.
+
+        :type tracked: TrackedOrder
+        :param tracked: Tracked order in a final status
+        """
+
+        with self._lock:
+            if self._orders.pop(tracked.client_order_id, None) is None:
+                return
+
+        order = tracked.order
+        order.update_remaining_amount(tracked.executed_quantity)
+
+        if not tracked.executed_quantity:
+            return
+
+        trades = self.client.get_my_trades(symbol=order.symbol, orderId=tracked.order_id)
+        order_result = {"symbol": order.symbol,
+                        "orderId": tracked.order_id,
+                        "side": order.side,
+                        "transactTime": max((trade["time"] for trade in trades), default=int(time() * 1000)),
+                        "fills": [{"price": trade["price"],
+                                   "qty": trade["qty"],
+                                   "commission": trade["commission"],
+                                   "commissionAsset": trade["commissionAsset"]} for trade in trades]}
+
+        logger.info(f"Order[{order}] executed {tracked.executed_quantity} with id: [{tracked.order_id}]")
+
+        if not is_user_stream_active():
+            process_order_result(order_result)
+        reporter.log_execution_result(order_result)
+        trade_store.record_fills(order_result, order.interval)
+        tracer.instant("fill", order.correlation_id, symbol=order.symbol, order_id=tracked.order_id,
+                       fills=len(trades))
+
+
+order_lifecycle = OrderLifecycleManager()
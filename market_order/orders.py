@@ -1,39 +1,139 @@
+from time import time
+
 from binance.exceptions import (BinanceAPIException,
                                 BinanceOrderException)
 
-from config import logger
-from utils import update_traded_asset_amounts, get_client
-from executor import order_executor
+from config import (logger,
+                    ORDER_MAX_AGE,
+                    ORDER_MAX_PRICE_DRIFT_PERCENT,
+                    LIMIT_ORDER_POST_ONLY,
+                    LIMIT_ORDER_OFFSET_BPS,
+                    LIMIT_ORDER_MAX_AMENDS)
+from utils import get_client
+from execution import new_client_order_id, process_order_result, is_user_stream_active
+from executor import order_executor, OrderPriority
+from market_order.lifecycle import order_lifecycle
+from portfolio import portfolio
+from pre_trade import pre_trade_checker
 from reporter import reporter
+from trade_store import trade_store
+from tracing import tracer
 
 
 class MarketOrder:
 
+    side = None
+    priority = OrderPriority.BUY
+    client = None
+
     def __init__(self):
 
         self.symbol = None
         self.amount = 0.0
-        self.client = get_client()
+        self.interval = None
+        self.created_at = None
+        self.queued_at = None
+        self.correlation_id = None
+
+        # the client is shared by all orders and resolved once
+        if MarketOrder.client is None:
+            MarketOrder.client = get_client()
 
-    def set_parameters(self, symbol=None, amount=None, current_price=None):
+    def set_parameters(self, symbol=None, amount=None, current_price=None, interval=None):
         """Perform determined strategy according to price change percents
 
         :type symbol: str
         :param symbol: Asset symbol
         :type amount: float
         :param amount: Amount of asset to buy or sell
+        :type current_price: float
+        :param current_price: Asset price at decision time
+        :type interval: CheckInterval
+        :param interval: Interval of the strategy creating the order
         """
 
         logger.info(f"Setting parameters... Symbol: {symbol}, Amount: {amount}, Price: {current_price}")
         self.symbol = symbol
         self.amount = amount
         self.current_price = current_price
+        self.interval = interval
+        self.created_at = time()
+        self.correlation_id = tracer.get_correlation_id(symbol)
 
     def add(self):
-        """Add order to the Executer queue"""
+        """Add order to the Executer queue
+
+        :rtype: bool
+        :returns: Whether the order is accepted by the queue
+        """
 
         logger.info(f"Adding an order to executor queue...")
-        order_executor.add_to_execution_queue(self)
+
+        with tracer.span("order_add", self.correlation_id, symbol=self.symbol):
+            return order_executor.add_to_execution_queue(self)
+
+    def is_expired(self):
+        """Check whether the order is older than ORDER_MAX_AGE
+
+        :rtype: bool
+        :returns: Whether the order passed its deadline
+        """
+
+        return time() - self.created_at > ORDER_MAX_AGE
+
+    def revalidate(self):
+        """Re-evaluate an expired order against the latest price
+
+        The order is kept with the latest price and a new deadline unless
+        the price moved against it by more than ORDER_MAX_PRICE_DRIFT_PERCENT.
+
+        :rtype: bool
+        :returns: Whether the order is still valid
+        """
+
+        latest_price = portfolio.get_latest_price(self.symbol)
+
+        if latest_price is None or not self.current_price:
+            return False
+
+        drift_percent = (latest_price - self.current_price) / self.current_price * 100
+        if self.side == "SELL":
+            drift_percent = -drift_percent
+
+        if drift_percent > ORDER_MAX_PRICE_DRIFT_PERCENT:
+            return False
+
+        self.current_price = latest_price
+        self.created_at = time()
+
+        return True
+
+    def get_state(self):
+        """Get the order parameters to create it again after a restart
+
+        :rtype: dict
+        :returns: Order state
+        """
+
+        return {"type": type(self).__name__,
+                "symbol": self.symbol,
+                "amount": self.amount,
+                "current_price": self.current_price,
+                "interval": self.interval,
+                "created_at": self.created_at}
+
+    def set_state(self, state):
+        """Set the order parameters from a state returned by get_state
+
+        :type state: dict
+        :param state: Order state
+        """
+
+        self.symbol = state["symbol"]
+        self.amount = state["amount"]
+        self.current_price = state["current_price"]
+        self.interval = state["interval"]
+        self.created_at = state["created_at"]
 
     def execute_order(self):
         """Run order_market_buy/sell commands from Binance API"""
@@ -42,15 +142,20 @@ class MarketOrder:
 
 class MarketBuyOrder(MarketOrder):
 
+    side = "BUY"
+
     def execute_order(self):
 
         try:
-            buy_result = self.client.order_market_buy(symbol=self.symbol, quantity=self.amount)
+            buy_result = self.client.order_market_buy(symbol=self.symbol, quantity=self.amount,
+                                                      newClientOrderId=new_client_order_id())
             logger.info(f"Order[{self}] executed successfully with id: [{buy_result['orderId']}]")
-            usdt_spent = self.amount * self.current_price
-            commission = float(buy_result["fills"][0].get("commission", 0))
-            update_traded_asset_amounts(self.symbol, self.amount - commission, usdt_spent * (-1))
+            if not is_user_stream_active():
+                process_order_result(buy_result)
             reporter.log_execution_result(buy_result)
+            trade_store.record_fills(buy_result, self.interval)
+            tracer.instant("fill", self.correlation_id, symbol=self.symbol, order_id=buy_result["orderId"],
+                           fills=len(buy_result.get("fills", [])))
         except BinanceAPIException as e_api:
             logger.error(e_api)
         except BinanceOrderException as e_order:
@@ -65,15 +170,21 @@ class MarketBuyOrder(MarketOrder):
 
 class MarketSellOrder(MarketOrder):
 
+    side = "SELL"
+    priority = OrderPriority.SELL
+
     def execute_order(self):
 
         try:
-            sell_result = self.client.order_market_sell(symbol=self.symbol, quantity=self.amount)
+            sell_result = self.client.order_market_sell(symbol=self.symbol, quantity=self.amount,
+                                                        newClientOrderId=new_client_order_id())
             logger.info(f"Order[{self}] executed successfully with id: [{sell_result['orderId']}]")
-            commission = float(sell_result["fills"][0].get("commission", 0))
-            usdt_earned = (self.amount * self.current_price) - commission
-            update_traded_asset_amounts(self.symbol, self.amount * (-1), usdt_earned)
+            if not is_user_stream_active():
+                process_order_result(sell_result)
             reporter.log_execution_result(sell_result)
+            trade_store.record_fills(sell_result, self.interval)
+            tracer.instant("fill", self.correlation_id, symbol=self.symbol, order_id=sell_result["orderId"],
+                           fills=len(sell_result.get("fills", [])))
         except BinanceAPIException as e_api:
             logger.error(e_api)
         except BinanceOrderException as e_order:
@@ -86,9 +197,136 @@ class MarketSellOrder(MarketOrder):
         return f"SELL:{self.symbol}:{self.amount}:{self.current_price}"
 
 
+class LimitOrder(MarketOrder):
+
+    def __init__(self):
+
+        super().__init__()
+        self.remaining_amount = 0.0
+        self.amend_count = 0
+        self.limit_price = None
+
+    def set_parameters(self, symbol=None, amount=None, current_price=None, interval=None):
+
+        super().set_parameters(symbol, amount, current_price, interval)
+        self.remaining_amount = amount
+
+    def get_state(self):
+
+        state = super().get_state()
+        state["remaining_amount"] = self.remaining_amount
+        state["amend_count"] = self.amend_count
+
+        return state
+
+    def set_state(self, state):
+
+        super().set_state(state)
+        self.remaining_amount = state["remaining_amount"]
+        self.amend_count = state["amend_count"]
+
+    def execute_order(self):
+        """Place a limit order for the remaining amount and track it until it is done"""
+
+        if self.remaining_amount <= 0:
+            return
+
+        try:
+            result = self.place()
+            logger.info(f"Order[{self}] placed with id: [{result['orderId']}]")
+            order_lifecycle.track(self, result)
+        except (BinanceAPIException, BinanceOrderException) as exc:
+            if self._would_take(exc) and self.amend_count < LIMIT_ORDER_MAX_AMENDS:
+                logger.info(f"Order[{self}] would take liquidity, placing again later")
+                self.amend_count += 1
+                order_lifecycle.retry_later(self)
+            else:
+                logger.error(exc)
+        except Exception as exp:
+            logger.error(exp)
+
+    def _would_take(self, exc):
+        """Check whether a post-only order was rejected for crossing the book
+
+        Other -2010 rejects, like insufficient balance, are not retried.
+
+        :type exc: BinanceAPIException
+        :param exc: Exception raised by the order placement
+        :rtype: bool
+        :returns: Whether the order would immediately match and take
+        """
+
+        return (LIMIT_ORDER_POST_ONLY and exc.code == -2010 and
+                "immediately match" in (exc.message or ""))
+
+    def place(self):
+        """Send a limit order priced around the latest price
+
+        :rtype: dict
+        :returns: Order response
+        """
+
+        self.limit_price = self.get_limit_price()
+
+        params = {"symbol": self.symbol,
+                  "side": self.side,
+                  "quantity": self.remaining_amount,
+                  "price": f"{self.limit_price:.8f}",
+                  "newClientOrderId": new_client_order_id()}
+
+        if LIMIT_ORDER_POST_ONLY:
+            params["type"] = "LIMIT_MAKER"
+        else:
+            params["type"] = "LIMIT"
+            params["timeInForce"] = "GTC"
+
+        return self.client.create_order(**params)
+
+    def get_limit_price(self):
+        """Get limit price at LIMIT_ORDER_OFFSET_BPS from the latest price
+
+        Buy orders are placed below and sell orders above the latest price,
+        so they rest in the book instead of crossing the spread.
+
+        :rtype: float
+        :returns: Limit price rounded to the tick size
+        """
+
+        latest_price = portfolio.get_latest_price(self.symbol) or self.current_price
+        direction = -1 if self.side == "BUY" else 1
+        price = latest_price * (1 + direction * LIMIT_ORDER_OFFSET_BPS / 10000)
+
+        return pre_trade_checker.round_price(self.symbol, price)
+
+    def update_remaining_amount(self, executed_quantity):
+        """Reduce the remaining amount by the executed quantity
+
+        :type executed_quantity: float
+        :param executed_quantity: Quantity executed by the last placed order
+        """
+
+        self.remaining_amount = pre_trade_checker.round_quantity(self.symbol,
+                                                                 self.remaining_amount - executed_quantity)
+
+    def __str__(self):
+
+        return f"LIMIT_{self.side}:{self.symbol}:{self.remaining_amount}:{self.limit_price or self.current_price}"
+
+
+class LimitBuyOrder(LimitOrder):
+
+    side = "BUY"
+
+
+class LimitSellOrder(LimitOrder):
+
+    side = "SELL"
+    priority = OrderPriority.SELL
+
+
 class MarketNoOrder(MarketOrder):
 
-    def set_parameters(self, symbol=None, amount=None, current_price=None):
+    def set_parameters(self, symbol=None, amount=None, current_price=None, interval=None):
         pass
 
     def add(self):
@@ -96,3 +334,22 @@ class MarketNoOrder(MarketOrder):
 
     def __str__(self):
         return ""
+
+
+ORDER_CLASSES = {order_class.__name__: order_class
+                 for order_class in (MarketBuyOrder, MarketSellOrder, LimitBuyOrder, LimitSellOrder)}
+
+
+def restore_order(state):
+    """Create an order from a state returned by MarketOrder.get_state
+
+    :type state: dict
+    :param state: Order state
+    :rtype: MarketOrder
+    :returns: Order with the saved parameters
+    """
+
+    order = ORDER_CLASSES[state["type"]]()
+    order.set_state(state)
+
+    return order
@@ -0,0 +1,260 @@
+from bisect import bisect_left
+from threading import Lock, Thread
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import logger
+
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 60)
+
+
+class Counter:
+
+    def __init__(self, name, description):
+
+        self.name = name
+        self.description = description
+        self.value = 0
+        self._lock = Lock()
+
+    def inc(self, amount=1):
+        """Increase counter
+
+        Several threads increment the same counters, e.g. every evaluator
+        thread rejecting orders, so the update is locked.
+
+        :type amount: float
+        :param amount: Amount to add
+        """
+
+        with self._lock:
+            self.value += amount
+
+    def expose(self):
+        """Get counter in Prometheus text format
+
+        :rtype: str
+        :returns: Exposition lines
+        """
+
+        return (f"# HELP {self.name} {self.description}\n"
+                f"# TYPE {self.name} counter\n"
+                f"{self.name} {self.value}\n")
+
+
+class Gauge(Counter):
+
+    def set(self, value):
+        """Set gauge value
+
+        :type value: float
+        :param value: Current value
+        """
+
+        self.value = value
+
+    def expose(self):
+
+        return (f"# HELP {self.name} {self.description}\n"
+                f"# TYPE {self.name} gauge\n"
+                f"{self.name} {self.value}\n")
+
+
+class Histogram:
+
+    def __init__(self, name, description, buckets=DEFAULT_BUCKETS):
+
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self._lock = Lock()
+
+    def observe(self, value):
+        """Record an observation
+
+        Histograms like evaluator_lateness_seconds are shared by the
+        evaluator threads, so the update is locked.
+
+        :type value: float
+        :param value: Observed value in seconds
+        """
+
+        bucket = bisect_left(self.buckets, value)
+
+        with self._lock:
+            self.counts[bucket] += 1
+            self.total += value
+
+    def expose(self):
+        """Get histogram in Prometheus text format
+
+        :rtype: str
+        :returns: Exposition lines
+        """
+
+        lines = [f"# HELP {self.name} {self.description}",
+                 f"# TYPE {self.name} histogram"]
+
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+
+        cumulative += self.counts[-1]
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {cumulative}')
+        lines.append(f"{self.name}_sum {self.total}")
+        lines.append(f"{self.name}_count {cumulative}")
+
+        return "\n".join(lines) + "\n"
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+
+        self._metrics = []
+        self._server = None
+
+    def counter(self, name, description):
+        """Create and register a counter
+
+        :type name: str
+        :param name: Metric name
+        :type description: str
+        :param description: Metric help text
+        :rtype: Counter
+        :returns: Registered counter
+        """
+
+        return self._register(Counter(name, description))
+
+    def gauge(self, name, description):
+        """Create and register a gauge
+
+        :type name: str
+        :param name: Metric name
+        :type description: str
+        :param description: Metric help text
+        :rtype: Gauge
+        :returns: Registered gauge
+        """
+
+        return self._register(Gauge(name, description))
+
+    def histogram(self, name, description, buckets=DEFAULT_BUCKETS):
+        """Create and register a histogram
+
+        :type name: str
+        :param name: Metric name
+        :type description: str
+        :param description: Metric help text
+        :type buckets: tuple
+        :param buckets: Upper bounds of histogram buckets
+        :rtype: Histogram
+        :returns: Registered histogram
+        """
+
+        return self._register(Histogram(name, description, buckets))
+
+    def expose(self):
+        """Get all metrics in Prometheus text format
+
+        :rtype: str
+        :returns: Exposition text
+        """
+
+        return "".join(metric.expose() for metric in self._metrics)
+
+    def start_server(self, port, host="127.0.0.1"):
+        """Serve metrics on /metrics from a daemon thread
+
+        :type port: int
+        :param port: Port to listen on
+        :type host: str
+        :param host: Address to bind
+        """
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+
+                body = registry.expose().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+
+        thread = Thread(target=self._server.serve_forever, daemon=True)
+        thread.start()
+
+    def _register(self, metric):
+
+        self._metrics.append(metric)
+
+        return metric
+
+
+registry = MetricsRegistry()
+
+ticks_total = registry.counter("trader_ticks_total", "Ticker messages received")
+tick_errors_total = registry.counter("trader_tick_errors_total", "Error messages from ticker sockets")
+ticks_conflated_total = registry.counter("trader_ticks_conflated_total",
+                                         "Ticker messages replaced by a newer message before processing")
+ticks_dropped_total = registry.counter("trader_ticks_dropped_total",
+                                       "Ticker messages older than the latest message of their symbol")
+tick_batch_size = registry.histogram("trader_tick_batch_size",
+                                     "Symbols processed per conflated batch",
+                                     buckets=(1, 2, 5, 10, 50, 100, 500, 1000))
+decision_tick_age_seconds = registry.histogram("trader_decision_tick_age_seconds",
+                                               "Age of the newest tick evaluated when strategies decide")
+evaluator_lateness_seconds = registry.histogram("trader_evaluator_lateness_seconds",
+                                                "Delay of evaluator wakeups beyond their interval")
+stream_reconnects_total = registry.counter("trader_stream_reconnects_total",
+                                           "Ticker socket reconnect attempts")
+stream_gaps_total = registry.counter("trader_stream_gaps_total",
+                                     "Ticker stream gaps detected from event times")
+stream_downtime_seconds = registry.histogram("trader_stream_downtime_seconds",
+                                             "Ticker stream downtime per incident",
+                                             buckets=(1, 5, 10, 30, 60, 300, 900, 3600))
+executor_queue_depth = registry.gauge("trader_executor_queue_depth", "Orders waiting in executor queue")
+order_queue_wait_seconds = registry.histogram("trader_order_queue_wait_seconds",
+                                              "Time orders wait in the executor queue")
+orders_expired_total = registry.counter("trader_orders_expired_total",
+                                        "Orders dropped after their deadline")
+orders_rejected_total = registry.counter("trader_orders_rejected_total",
+                                         "Orders rejected or dropped because the executor queue was full")
+order_round_trip_seconds = registry.histogram("trader_order_round_trip_seconds",
+                                              "Order execution round trip time")
+rate_limit_order_wait_seconds = registry.histogram("trader_rate_limit_order_wait_seconds",
+                                                   "Time order requests wait for the rate limiter")
+rate_limit_info_wait_seconds = registry.histogram("trader_rate_limit_info_wait_seconds",
+                                                  "Time informational requests wait for the rate limiter")
+rate_limit_throttled_total = registry.counter("trader_rate_limit_throttled_total",
+                                              "Requests delayed by the rate limiter")
+rate_limit_errors_total = registry.counter("trader_rate_limit_errors_total",
+                                           "418/429 responses from Binance")
+limit_order_amends_total = registry.counter("trader_limit_order_amends_total",
+                                            "Limit orders cancelled and placed again at a new price")
+limit_order_cancels_total = registry.counter("trader_limit_order_cancels_total",
+                                             "Limit orders cancelled on timeout without replacement")
+persistence_write_seconds = registry.histogram("trader_persistence_write_seconds",
+                                               "Time to write last evaluated prices")
+state_snapshot_write_seconds = registry.histogram("trader_state_snapshot_write_seconds",
+                                                  "Time to write the state snapshot")
@@ -0,0 +1,300 @@
+from threading import Lock
+
+import numpy as np
+
+from config import DEPTH_BOOK_CAPACITY, DEPTH_MAX_BUFFERED_EVENTS
+
+
+class BookSide:
+
+    def __init__(self, descending, capacity=DEPTH_BOOK_CAPACITY):
+
+        # bids are stored with negated prices so both sides are ascending
+        # and the best price is always at index 0
+        self._sign = -1.0 if descending else 1.0
+        self._keys = np.empty(capacity)
+        self._quantities = np.empty(capacity)
+        self._count = 0
+
+    def clear(self):
+        """Remove all price levels"""
+
+        self._count = 0
+
+    def update(self, price, quantity):
+        """Set quantity of a price level, removing it if the quantity is 0
+
+        The level is found with a binary search; inserting and removing
+        shift the levels behind it inside the preallocated arrays.
+
+        :type price: float
+        :param price: Price level
+        :type quantity: float
+        :param quantity: New quantity at the level
+        """
+
+        key = self._sign * price
+        count = self._count
+        position = int(np.searchsorted(self._keys[:count], key))
+        exists = position < count and self._keys[position] == key
+
+        if quantity == 0:
+            if exists:
+                self._keys[position:count - 1] = self._keys[position + 1:count]
+                self._quantities[position:count - 1] = self._quantities[position + 1:count]
+                self._count -= 1
+        elif exists:
+            self._quantities[position] = quantity
+        else:
+            if count == len(self._keys):
+                self._grow()
+
+            self._keys[position + 1:count + 1] = self._keys[position:count]
+            self._quantities[position + 1:count + 1] = self._quantities[position:count]
+            self._keys[position] = key
+            self._quantities[position] = quantity
+            self._count += 1
+
+    def get_levels(self):
+        """Get price levels from the best price on
+
+        :rtype: tuple
+        :returns: Prices and quantities as NumPy arrays
+        """
+
+        return self._sign * self._keys[:self._count], self._quantities[:self._count]
+
+    def get_best_price(self):
+        """Get the best price of the side
+
+        :rtype: float
+        :returns: Best price or None if the side is empty
+        """
+
+        return self._sign * self._keys[0] if self._count else None
+
+    def _grow(self):
+        """Double the capacity of the arrays"""
+
+        self._keys = np.concatenate((self._keys, np.empty(len(self._keys))))
+        self._quantities = np.concatenate((self._quantities, np.empty(len(self._quantities))))
+
+    def __len__(self):
+
+        return self._count
+
+
+class OrderBook:
+
+    def __init__(self, symbol):
+
+        self.symbol = symbol
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.last_update_id = None
+        self._lock = Lock()
+        self._synced = False
+        self._resyncing = False
+        self._buffered_events = []
+
+    def is_synced(self):
+        """Check whether the book follows the depth stream without gaps
+
+        :rtype: bool
+        :returns: Whether the book is synced
+        """
+
+        return self._synced
+
+    def invalidate(self):
+        """Mark the book for resync with a new snapshot"""
+
+        with self._lock:
+            self._synced = False
+
+    def start_resync(self):
+        """Mark the book as waiting for a snapshot
+
+        :rtype: bool
+        :returns: False if a snapshot is already being loaded
+        """
+
+        with self._lock:
+            if self._resyncing:
+                return False
+
+            self._resyncing = True
+            return True
+
+    def finish_resync(self):
+        """Allow a new snapshot to be requested for the book"""
+
+        with self._lock:
+            self._resyncing = False
+
+    def apply_update(self, event):
+        """Apply a depthUpdate event
+
+        Events received before the book is synced are buffered to be
+        applied on top of the next snapshot.
+
+        :type event: dict
+        :param event: depthUpdate event
+        :rtype: bool
+        :returns: False if the book needs a new snapshot
+        """
+
+        with self._lock:
+            return self._apply_event(event)
+
+    def _apply_event(self, event):
+
+        if not self._synced:
+            self._buffered_events.append(event)
+
+            # diffs older than the latest ones are covered by the next snapshot
+            if len(self._buffered_events) > DEPTH_MAX_BUFFERED_EVENTS:
+                del self._buffered_events[:-DEPTH_MAX_BUFFERED_EVENTS]
+            return False
+
+        if event["u"] <= self.last_update_id:
+            return True
+
+        if event["U"] > self.last_update_id + 1:
+            self._synced = False
+            self._buffered_events = [event]
+            return False
+
+        self._apply_levels(event["b"], event["a"])
+        self.last_update_id = event["u"]
+
+        return True
+
+    def load_snapshot(self, snapshot):
+        """Rebuild the book from a REST snapshot and the buffered events
+
+        :type snapshot: dict
+        :param snapshot: Order book snapshot with lastUpdateId, bids and asks
+        :rtype: bool
+        :returns: Whether the book is synced after the snapshot, False
+            if the buffered events show the snapshot is stale
+        """
+
+        with self._lock:
+            return self._load_snapshot(snapshot)
+
+    def _load_snapshot(self, snapshot):
+
+        self.bids.clear()
+        self.asks.clear()
+        self._apply_levels(snapshot["bids"], snapshot["asks"])
+        self.last_update_id = snapshot["lastUpdateId"]
+        self._synced = True
+
+        buffered_events, self._buffered_events = self._buffered_events, []
+
+        for index, event in enumerate(buffered_events):
+            if not self._apply_event(event):
+                self._buffered_events.extend(buffered_events[index + 1:])
+                return False
+
+        return True
+
+    def get_expected_slippage(self, side, quantity):
+        """Get slippage of a market order walking the book
+
+        :type side: str
+        :param side: BUY/SELL
+        :type quantity: float
+        :param quantity: Order quantity
+        :rtype: float
+        :returns: Percent difference between the average fill price and
+            the best price, inf if the book is not deep enough, None if
+            the book is not synced
+        """
+
+        with self._lock:
+            if not self._synced:
+                return None
+
+            return self._get_expected_slippage(side, quantity)
+
+    def _get_expected_slippage(self, side, quantity):
+
+        prices, quantities = (self.asks if side == "BUY" else self.bids).get_levels()
+
+        if not len(prices):
+            return float("inf")
+
+        cumulative_quantities = np.cumsum(quantities)
+        last_level = int(np.searchsorted(cumulative_quantities, quantity))
+
+        if last_level == len(prices):
+            return float("inf")
+
+        filled_before = cumulative_quantities[last_level - 1] if last_level else 0.0
+        cost = np.dot(prices[:last_level], quantities[:last_level]) + (quantity - filled_before) * prices[last_level]
+        average_price = cost / quantity
+
+        return abs(average_price - prices[0]) / prices[0] * 100
+
+    def get_max_quantity(self, side, max_slippage_percent):
+        """Get the largest quantity filled within the given slippage
+
+        :type side: str
+        :param side: BUY/SELL
+        :type max_slippage_percent: float
+        :param max_slippage_percent: Allowed slippage percent
+        :rtype: float
+        :returns: Maximum quantity or None if the book is not synced
+        """
+
+        with self._lock:
+            if not self._synced:
+                return None
+
+            return self._get_max_quantity(side, max_slippage_percent)
+
+    def _get_max_quantity(self, side, max_slippage_percent):
+
+        prices, quantities = (self.asks if side == "BUY" else self.bids).get_levels()
+
+        if not len(prices):
+            return 0.0
+
+        direction = 1 if side == "BUY" else -1
+        limit_price = prices[0] * (1 + direction * max_slippage_percent / 100)
+
+        cumulative_quantities = np.cumsum(quantities)
+        cumulative_costs = np.cumsum(prices * quantities)
+
+        # the average price stays within the limit while it is below(buy)/above(sell) it
+        within_limit = direction * (cumulative_costs - limit_price * cumulative_quantities) <= 0
+        full_levels = int(np.argmin(within_limit)) if not within_limit.all() else len(prices)
+
+        if full_levels == len(prices):
+            return float(cumulative_quantities[-1])
+
+        filled_before = cumulative_quantities[full_levels - 1] if full_levels else 0.0
+        cost_before = cumulative_costs[full_levels - 1] if full_levels else 0.0
+        level_price = prices[full_levels]
+
+        # solve cost_before + q * level_price = limit_price * (filled_before + q)
+        partial = (limit_price * filled_before - cost_before) / (level_price - limit_price)
+
+        return float(filled_before + partial)
+
+    def _apply_levels(self, bids, asks):
+        """Apply price level updates to both sides
+
+        :type bids: list
+        :param bids: [price, quantity] pairs as strings
+        :type asks: list
+        :param asks: [price, quantity] pairs as strings
+        """
+
+        for price, quantity in bids:
+            self.bids.update(float(price), float(quantity))
+
+        for price, quantity in asks:
+            self.asks.update(float(price), float(quantity))
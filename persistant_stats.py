@@ -1,8 +1,10 @@
 import os
 import json
+from time import perf_counter
 from threading import Lock
 
 from config import logger, PERSISTANT_PRICE_FILE
+from metrics import persistence_write_seconds
 from utils import CheckInterval
 
 
@@ -58,6 +60,9 @@ class PersistantStats:
     def save_initial_price_data(self, initial_asset_prices):
         """Save initial data for referencing in the first evaluations
 
+        Prices loaded from PERSISTANT_PRICE_FILE or a state snapshot are
+        kept, so only symbols without a reference price are set.
+
         :type initial_asset_prices: dict
         :param initial_asset_prices: Initial asset price data in the following format
             {
@@ -68,11 +73,33 @@ class PersistantStats:
 
         for symbol, latest_price in initial_asset_prices.items():
             logger.debug(f"Saving initial price {latest_price} for symbol {symbol}...")
-            self._persistant_prices[CheckInterval.INTERVAL_10_SEC][symbol]   = latest_price
-            self._persistant_prices[CheckInterval.INTERVAL_10_MIN][symbol]   = latest_price
-            self._persistant_prices[CheckInterval.INTERVAL_30_MIN][symbol]   = latest_price
-            self._persistant_prices[CheckInterval.INTERVAL_1_HOUR][symbol]   = latest_price
-            self._persistant_prices[CheckInterval.INTERVAL_12_HOURS][symbol] = latest_price
+            for interval_prices in self._persistant_prices.values():
+                interval_prices.setdefault(symbol, latest_price)
+
+    def get_prices(self):
+        """Get a copy of the reference prices of all intervals
+
+        :rtype: dict
+        :returns: Dictionary of interval: {symbol: price} pairs
+        """
+
+        with self._write_lock:
+            return {interval: dict(prices) for interval, prices in self._persistant_prices.items()}
+
+    def restore(self, persistant_prices):
+        """Add reference prices from a state snapshot
+
+        PERSISTANT_PRICE_FILE is written on every evaluation, so prices
+        loaded from it are never older and are kept.
+
+        :type persistant_prices: dict
+        :param persistant_prices: Dictionary of interval: {symbol: price} pairs
+        """
+
+        for interval, prices in persistant_prices.items():
+            interval_prices = self._persistant_prices.setdefault(interval, {})
+            for symbol, price in prices.items():
+                interval_prices.setdefault(symbol, price)
 
     def save(self, symbol, interval, latest_price):
         """Save prices to json file
@@ -91,5 +118,9 @@ class PersistantStats:
         with self._write_lock:
             self._persistant_prices[interval][symbol] = latest_price
 
+            start = perf_counter()
+
             with open(PERSISTANT_PRICE_FILE, "w", encoding="utf8") as prices_file:
-                json.dump(self._persistant_prices, prices_file, indent=4)
\ No newline at end of file
+                json.dump(self._persistant_prices, prices_file, indent=4)
+
+            persistence_write_seconds.observe(perf_counter() - start)
\ No newline at end of file
@@ -0,0 +1,151 @@
+from threading import Lock
+
+from config import (logger,
+                    ASSETS_TO_TRADE,
+                    INITIAL_USDT_INVESTMENT,
+                    TRADED_ASSET_AMOUNTS,
+                    MAX_DRAWDOWN_PERCENT,
+                    TRAILING_STOP_PERCENT)
+
+
+class Portfolio:
+
+    def __init__(self):
+
+        self._lock = Lock()
+        self._amounts = dict(TRADED_ASSET_AMOUNTS)
+        self._latest_prices = {}
+        self._total_as_usdt = self._amounts.get("USDT", 0.0)
+        self._peak_total_as_usdt = float(INITIAL_USDT_INVESTMENT)
+        self._unpriced_assets = set(ASSETS_TO_TRADE)
+
+        self._drawdown_floor = None
+        if MAX_DRAWDOWN_PERCENT is not None:
+            self._drawdown_floor = INITIAL_USDT_INVESTMENT * (1 - MAX_DRAWDOWN_PERCENT / 100)
+
+        self._trailing_ratio = None
+        if TRAILING_STOP_PERCENT is not None:
+            self._trailing_ratio = 1 - TRAILING_STOP_PERCENT / 100
+
+    def set_amounts(self, traded_asset_amounts):
+        """Set traded asset amounts and revalue the portfolio
+
+        :type traded_asset_amounts: dict
+        :param traded_asset_amounts: Traded asset amounts including USDT
+        """
+
+        with self._lock:
+            self._amounts = dict(traded_asset_amounts)
+            self._revalue()
+
+    def update_price(self, symbol, latest_price):
+        """Update total value with the latest price of the given symbol
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :type latest_price: float
+        :param latest_price: Asset latest price
+        """
+
+        with self._lock:
+            previous_price = self._latest_prices.get(symbol)
+            self._latest_prices[symbol] = latest_price
+
+            if previous_price is None:
+                self._unpriced_assets.discard(symbol)
+                previous_price = 0.0
+
+            self._total_as_usdt += self._amounts.get(symbol, 0.0) * (latest_price - previous_price)
+            self._update_peak()
+
+    def apply_fill(self, symbol, amount, usdt_update_value):
+        """Update total value with the result of an executed order
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :type amount: float
+        :param amount: Asset amount bought(+) or sold(-)
+        :type usdt_update_value: float
+        :param usdt_update_value: USDT earned or spent from trade
+        """
+
+        with self._lock:
+            self._amounts[symbol] = self._amounts.get(symbol, 0.0) + amount
+            self._amounts["USDT"] = self._amounts.get("USDT", 0.0) + usdt_update_value
+
+            self._total_as_usdt += amount * self._latest_prices.get(symbol, 0.0) + usdt_update_value
+            self._update_peak()
+
+    def get_latest_price(self, symbol):
+        """Get the latest price received for the symbol
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :rtype: float
+        :returns: Latest price or None if no price is received yet
+        """
+
+        return self._latest_prices.get(symbol)
+
+    def get_total_as_usdt(self):
+        """Get total value of traded assets as usdt
+
+        :rtype: float
+        :returns: Total assets as usdt
+        """
+
+        return self._total_as_usdt
+
+    def get_change_percent(self):
+        """Get change of total value relative to the initial investment
+
+        :rtype: float
+        :returns: Change percentage
+        """
+
+        return ((self._total_as_usdt - INITIAL_USDT_INVESTMENT) / INITIAL_USDT_INVESTMENT) * 100
+
+    def is_stop_condition_reached(self):
+        """Check drawdown and trailing stop rules against the running total
+
+        Returns False until every traded asset has received a price.
+
+        :rtype: bool
+        :returns: Whether stop trading or not
+        """
+
+        if self._unpriced_assets:
+            return False
+
+        total = self._total_as_usdt
+
+        if self._drawdown_floor is not None and total < self._drawdown_floor:
+            logger.info(f"Total {total} usdt is below drawdown floor {self._drawdown_floor}")
+            return True
+
+        if self._trailing_ratio is not None and total < self._peak_total_as_usdt * self._trailing_ratio:
+            logger.info(f"Total {total} usdt is below trailing stop of "
+                        f"peak {self._peak_total_as_usdt}")
+            return True
+
+        return False
+
+    def _revalue(self):
+        """Recalculate total value from amounts and latest prices"""
+
+        total = self._amounts.get("USDT", 0.0)
+
+        for symbol, price in self._latest_prices.items():
+            total += self._amounts.get(symbol, 0.0) * price
+
+        self._total_as_usdt = total
+        self._update_peak()
+
+    def _update_peak(self):
+        """Track the highest total value once all assets are priced"""
+
+        if not self._unpriced_assets and self._total_as_usdt > self._peak_total_as_usdt:
+            self._peak_total_as_usdt = self._total_as_usdt
+
+
+portfolio = Portfolio()
@@ -0,0 +1,211 @@
+from time import time
+from decimal import Decimal, ROUND_DOWN
+from threading import Lock
+
+from config import (logger,
+                    EXCHANGE_INFO_REFRESH_INTERVAL,
+                    EXCHANGE_INFO_RETRY_DELAY,
+                    MAX_SYMBOL_EXPOSURE_USDT)
+from utils import get_client
+
+
+class PreTradeChecker:
+
+    def __init__(self):
+
+        self._lock = Lock()
+        self._symbol_filters = {}
+        self._last_refresh = None
+        self._last_failure = None
+
+    def get_valid_quantity(self, symbol, amount, decision, current_price, current_amount):
+        """Round order quantity to the step size and run local checks
+
+        Orders violating LOT_SIZE, MIN_NOTIONAL or exposure limits are
+        rejected before they are sent to Binance.
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :type amount: float
+        :param amount: Asset amount to buy/sell
+        :type decision: str
+        :param decision: BUY/SELL
+        :type current_price: float
+        :param current_price: Asset latest price
+        :type current_amount: float
+        :param current_amount: Traded amount currently held for the asset
+        :rtype: float
+        :returns: Rounded quantity or None if the order is rejected
+        """
+
+        filters = self.get_filters_for(symbol)
+
+        if filters is None:
+            logger.info(f"No exchange filters for {symbol}, order rejected!")
+            return None
+
+        quantity = self.round_quantity(symbol, amount)
+
+        if quantity < filters["min_qty"] or quantity > filters["max_qty"]:
+            logger.info(f"Quantity {quantity} for {symbol} is out of lot size range "
+                        f"[{filters['min_qty']}, {filters['max_qty']}]")
+            return None
+
+        if quantity * current_price < filters["min_notional"]:
+            logger.info(f"Notional {quantity * current_price} for {symbol} is below "
+                        f"minimum {filters['min_notional']}")
+            return None
+
+        if decision == "BUY" and symbol in MAX_SYMBOL_EXPOSURE_USDT:
+            exposure = (current_amount + quantity) * current_price
+            if exposure > MAX_SYMBOL_EXPOSURE_USDT[symbol]:
+                logger.info(f"Exposure {exposure} for {symbol} exceeds cap "
+                            f"{MAX_SYMBOL_EXPOSURE_USDT[symbol]}")
+                return None
+
+        return quantity
+
+    def round_quantity(self, symbol, amount):
+        """Round quantity down to the step size of the symbol
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :type amount: float
+        :param amount: Asset amount
+        :rtype: float
+        :returns: Rounded quantity, unchanged if there are no filters for the symbol
+        """
+
+        filters = self.get_filters_for(symbol)
+
+        if filters is None:
+            return amount
+
+        return self._round_down(amount, filters["step_size"])
+
+    def round_price(self, symbol, price):
+        """Round price down to the tick size of the symbol
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :type price: float
+        :param price: Asset price
+        :rtype: float
+        :returns: Rounded price, unchanged if there are no filters for the symbol
+        """
+
+        filters = self.get_filters_for(symbol)
+
+        if filters is None:
+            return price
+
+        return self._round_down(price, filters["tick_size"])
+
+    def get_filters_for(self, symbol):
+        """Get cached exchange filters for the given symbol
+
+        Exchange info is loaded on first access and refreshed after
+        EXCHANGE_INFO_REFRESH_INTERVAL seconds. The cached filters are
+        kept if a refresh fails, and the refresh is tried again after
+        EXCHANGE_INFO_RETRY_DELAY seconds.
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :rtype: dict
+        :returns: Filter values of the symbol or None if unknown
+        """
+
+        if self._is_stale():
+            with self._lock:
+                # another evaluator may have refreshed while this one waited
+                if self._is_stale():
+                    self._refresh()
+
+        return self._symbol_filters.get(symbol)
+
+    def _is_stale(self):
+
+        if self._last_failure is not None and time() - self._last_failure < EXCHANGE_INFO_RETRY_DELAY:
+            return False
+
+        return self._last_refresh is None or time() - self._last_refresh > EXCHANGE_INFO_REFRESH_INTERVAL
+
+    def _refresh(self):
+        """Load exchange info and index filters by symbol, keeping the
+        cached filters on errors
+        """
+
+        logger.info("Loading exchange filters...")
+
+        try:
+            exchange_info = get_client().get_exchange_info()
+        except Exception as exc:
+            logger.error(f"Failed to load exchange filters, keeping the cached ones: {exc}")
+            self._last_failure = time()
+            return
+
+        symbol_filters = {}
+
+        for symbol_info in exchange_info["symbols"]:
+            symbol_filters[symbol_info["symbol"]] = self._parse_filters(symbol_info["filters"])
+
+        self._symbol_filters = symbol_filters
+        self._last_refresh = time()
+        self._last_failure = None
+
+    def _parse_filters(self, filters):
+        """Convert filter list of a symbol to a flat dictionary
+
+        :type filters: list
+        :param filters: Filter list from exchange info
+        :rtype: dict
+        :returns: Filter values of the symbol
+        """
+
+        parsed = {
+            "min_qty": 0.0,
+            "max_qty": float("inf"),
+            "step_size": 0.0,
+            "min_notional": 0.0,
+            "min_price": 0.0,
+            "max_price": 0.0,
+            "tick_size": 0.0
+        }
+
+        for exchange_filter in filters:
+            filter_type = exchange_filter["filterType"]
+
+            if filter_type == "LOT_SIZE":
+                parsed["min_qty"] = float(exchange_filter["minQty"])
+                parsed["max_qty"] = float(exchange_filter["maxQty"])
+                parsed["step_size"] = float(exchange_filter["stepSize"])
+            elif filter_type in ("MIN_NOTIONAL", "NOTIONAL"):
+                parsed["min_notional"] = float(exchange_filter["minNotional"])
+            elif filter_type == "PRICE_FILTER":
+                parsed["min_price"] = float(exchange_filter["minPrice"])
+                parsed["max_price"] = float(exchange_filter["maxPrice"])
+                parsed["tick_size"] = float(exchange_filter["tickSize"])
+
+        return parsed
+
+    def _round_down(self, value, step):
+        """Round value down to a multiple of step
+
+        :type value: float
+        :param value: Value to round
+        :type step: float
+        :param step: Step size (0 disables rounding)
+        :rtype: float
+        :returns: Rounded value
+        """
+
+        if not step:
+            return value
+
+        step = Decimal(str(step))
+        rounded = (Decimal(str(value)) / step).to_integral_value(rounding=ROUND_DOWN) * step
+
+        return float(rounded)
+
+
+pre_trade_checker = PreTradeChecker()
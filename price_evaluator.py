@@ -1,10 +1,17 @@
-from time import sleep
+from time import time, sleep, perf_counter
 from threading import Thread
 
-from config import logger, ASSETS_TO_TRADE
+from config import logger, ASSETS_TO_TRADE, PRICE_SOURCE, CROSS_ASSET_INTERVAL
 from utils import CheckInterval, get_client
+from portfolio import portfolio
 from persistant_stats import PersistantStats
-from strategy.factory import StrategyFactory
+from trade_store import trade_store
+from metrics import evaluator_lateness_seconds, decision_tick_age_seconds
+from strategy.registry import strategy_registry
+from strategy.strategies import MarketSnapshot
+from state_snapshot import state_snapshot
+from tracing import tracer
+from cross_asset_monitor import cross_asset_monitor
 
 
 class PriceEvaluator:
@@ -13,9 +20,17 @@ class PriceEvaluator:
 
         self._price_statistics = price_statistics
         self._persistant_stats = PersistantStats()
-        self._strategy_factory = StrategyFactory()
+        self._snapshots = {}
+        self._last_evaluated_at = {}
+        self._next_delays = {}
+
+        restored = state_snapshot.get_restored_state()
+
+        if restored is not None:
+            self._restore(restored)
+        else:
+            self._save_initial_prices(ASSETS_TO_TRADE)
 
-        self._save_initial_prices()
         self._start_evaluators()
 
     def evaluate_ten_seconds_stats(self):
@@ -27,7 +42,7 @@ class PriceEvaluator:
 
         while True:
 
-            sleep(CheckInterval.INTERVAL_10_SEC)
+            self._wait_for(CheckInterval.INTERVAL_10_SEC)
             asset_stats = self._price_statistics.get_asset_stats()
 
             logger.info("Evaluating price change for 10 seconds interval...")
@@ -44,7 +59,7 @@ class PriceEvaluator:
         logger.info("Starting 10 minutes evaluator...")
 
         while True:
-            sleep(CheckInterval.INTERVAL_10_MIN)
+            self._wait_for(CheckInterval.INTERVAL_10_MIN)
             asset_stats = self._price_statistics.get_asset_stats()
 
             logger.info("Evaluating latest price for 10 minutes interval...")
@@ -62,7 +77,7 @@ class PriceEvaluator:
 
         while True:
 
-            sleep(CheckInterval.INTERVAL_30_MIN)
+            self._wait_for(CheckInterval.INTERVAL_30_MIN)
             asset_stats = self._price_statistics.get_asset_stats()
 
             logger.info("Evaluating latest price for 30 minutes interval...")
@@ -80,7 +95,7 @@ class PriceEvaluator:
 
         while True:
 
-            sleep(CheckInterval.INTERVAL_1_HOUR)
+            self._wait_for(CheckInterval.INTERVAL_1_HOUR)
             asset_stats = self._price_statistics.get_asset_stats()
 
             logger.info("Evaluating latest price for 1 hour interval...")
@@ -98,7 +113,7 @@ class PriceEvaluator:
 
         while True:
 
-            sleep(CheckInterval.INTERVAL_12_HOURS)
+            self._wait_for(CheckInterval.INTERVAL_12_HOURS)
             asset_stats = self._price_statistics.get_asset_stats()
 
             logger.info("Evaluating latest price for 12 hours interval...")
@@ -120,19 +135,57 @@ class PriceEvaluator:
         """
 
         change_percents = {}
+        correlation_ids = {}
+        evaluated_at = time()
 
         for symbol in asset_stats:
-            latest_price = asset_stats[symbol].get("latest_price")
-            change_percent = self._calculate_change_percent_for(symbol, interval, latest_price)
-            change_percents[symbol] = change_percent
+            correlation_id = self._trace_tick(symbol, interval, asset_stats[symbol], evaluated_at)
+
+            with tracer.span("evaluate", correlation_id, symbol=symbol, interval=interval):
+                latest_price = asset_stats[symbol].latest_price
+                change_percent = self._calculate_change_percent_for(symbol, interval, latest_price)
+                change_percents[symbol] = change_percent
+
+                logger.info(f"{symbol} price change percent for "
+                            f"interval {interval} is {change_percent}")
 
-            logger.info(f"{symbol} price change percent for "
-                        f"interval {interval} is {change_percent}")
+                trade_store.record_evaluation(symbol, interval, latest_price, change_percent)
+                self._save(symbol, interval, latest_price)
 
-            self._save(symbol, interval, latest_price)
+            if correlation_id is not None:
+                correlation_ids[symbol] = correlation_id
+
+        tracer.set_correlation_ids(correlation_ids)
 
         return change_percents
 
+    def _trace_tick(self, symbol, interval, asset_stats, evaluated_at):
+        """Start the trace of the tick evaluated for the symbol
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :type interval: CheckInterval
+        :param interval: Price evaluation interval
+        :type asset_stats: AssetStats
+        :param asset_stats: Statistics of the symbol
+        :type evaluated_at: float
+        :param evaluated_at: Start time of the evaluation
+        :rtype: str
+        :returns: Correlation id or None if tracing is off
+        """
+
+        if not tracer.enabled or not asset_stats.event_time:
+            return None
+
+        correlation_id = tracer.new_correlation_id()
+
+        tracer.record("tick", correlation_id, asset_stats.event_time / 1000, asset_stats.received_at,
+                      symbol=symbol, price=asset_stats.latest_price)
+        tracer.record("tick_to_evaluation", correlation_id, asset_stats.received_at, evaluated_at,
+                      symbol=symbol, interval=interval)
+
+        return correlation_id
+
     def _execute_strategy(self, interval, change_percents, asset_stats):
         """Determine and perform strategy according to interval and
         price change percentages.
@@ -145,8 +198,88 @@ class PriceEvaluator:
         :param asset_stats: Asset price statistics
         """
 
-        strategy = self._strategy_factory.get_strategy(interval)
-        strategy.perform(change_percents, asset_stats)
+        snapshot = self._snapshots.get(interval)
+        if snapshot is None:
+            snapshot = self._snapshots[interval] = MarketSnapshot(interval)
+
+        lead_lag_signals = None
+        if interval == CROSS_ASSET_INTERVAL:
+            cross_asset_monitor.update(asset_stats)
+            lead_lag_signals = cross_asset_monitor.get_lead_lag_signals()
+
+        snapshot.update(change_percents, asset_stats, lead_lag_signals)
+
+        for strategy in strategy_registry.get_strategies(interval):
+            # a failing strategy must not stop the evaluator thread of the interval
+            try:
+                strategy.perform_many(snapshot)
+            except Exception as exc:
+                logger.error(f"Strategy {type(strategy).__name__} failed for interval {interval}: {exc}")
+
+        newest_tick_at = max((stats.received_at for stats in asset_stats.values()), default=0.0)
+        if newest_tick_at:
+            decision_tick_age_seconds.observe(time() - newest_tick_at)
+
+    def get_reference_prices(self):
+        """Get the last evaluated prices of all intervals
+
+        :rtype: dict
+        :returns: Dictionary of interval: {symbol: price} pairs
+        """
+
+        return self._persistant_stats.get_prices()
+
+    def get_last_evaluated_times(self):
+        """Get the start time of the current period of every interval
+
+        :rtype: dict
+        :returns: Dictionary of interval: time pairs
+        """
+
+        return dict(self._last_evaluated_at)
+
+    def _wait_for(self, interval):
+        """Sleep for the given interval and record wakeup lateness
+
+        After a warm restart the first wait only covers the part of the
+        interval left from the previous run.
+
+        :type interval: CheckInterval
+        :param interval: Price evaluation interval
+        """
+
+        delay = self._next_delays.pop(interval, interval)
+
+        start = perf_counter()
+        sleep(delay)
+        evaluator_lateness_seconds.observe(perf_counter() - start - delay)
+
+        self._last_evaluated_at[interval] = time()
+
+    def _restore(self, restored):
+        """Continue the evaluation periods and reference prices of a state snapshot
+
+        Symbols missing from the snapshot get initial prices as on a cold start.
+
+        :type restored: RestoredState
+        :param restored: State loaded at startup
+        """
+
+        logger.info("Restoring evaluator state from snapshot...")
+
+        self._persistant_stats.restore(restored.reference_prices)
+
+        for symbol, asset_stats in restored.asset_stats.items():
+            portfolio.update_price(symbol, asset_stats.latest_price)
+
+        now = time()
+        for interval, evaluated_at in restored.last_evaluated_at.items():
+            self._last_evaluated_at[interval] = evaluated_at
+            self._next_delays[interval] = min(interval, max(0, interval - (now - evaluated_at)))
+
+        missing_symbols = [symbol for symbol in ASSETS_TO_TRADE if symbol not in restored.asset_stats]
+        if missing_symbols:
+            self._save_initial_prices(missing_symbols)
 
     def _start_evaluators(self):
         """Start evaluator methods as different threads"""
@@ -157,6 +290,14 @@ class PriceEvaluator:
                       self.evaluate_one_hour_stats,
                       self.evaluate_twelve_hours_stats]
 
+        now = time()
+        for interval in (CheckInterval.INTERVAL_10_SEC,
+                         CheckInterval.INTERVAL_10_MIN,
+                         CheckInterval.INTERVAL_30_MIN,
+                         CheckInterval.INTERVAL_1_HOUR,
+                         CheckInterval.INTERVAL_12_HOURS):
+            self._last_evaluated_at.setdefault(interval, now)
+
         for evaluator in evaluators:
             thread = Thread(target=evaluator, daemon=True)
             thread.start()
@@ -179,15 +320,31 @@ class PriceEvaluator:
 
         return round(change_percent, 3)
 
-    def _save_initial_prices(self):
-        """Save initial price data"""
+    def _save_initial_prices(self, symbols):
+        """Save initial price data
+
+        With the market data daemon as price source, prices known by the
+        daemon are taken from it instead of the REST API.
+
+        :type symbols: list
+        :param symbols: Asset symbols
+        """
 
         client = get_client()
         initial_asset_prices = {}
 
-        for asset_symbol in ASSETS_TO_TRADE:
-            asset_price = client.get_symbol_ticker(symbol=asset_symbol).get("price")
-            initial_asset_prices[asset_symbol] = float(asset_price)
+        if PRICE_SOURCE == "daemon":
+            from market_data import MarketDataFeed
+            try:
+                initial_asset_prices = MarketDataFeed(symbols).get_latest_prices()
+            except OSError as exc:
+                logger.warning(f"Market data daemon is not available, getting initial prices from the API: {exc}")
+
+        for asset_symbol in symbols:
+            if asset_symbol not in initial_asset_prices:
+                asset_price = client.get_symbol_ticker(symbol=asset_symbol).get("price")
+                initial_asset_prices[asset_symbol] = float(asset_price)
+            portfolio.update_price(asset_symbol, initial_asset_prices[asset_symbol])
 
         logger.info("Saving initial price data...")
 
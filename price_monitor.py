@@ -1,36 +1,56 @@
+from threading import Lock
+
 from binance.streams import ThreadedWebsocketManager
 from binance.enums import *
 from twisted.internet import reactor
 
-from config import ASSETS_TO_TRADE, logger
+from config import ASSETS_TO_TRADE, LOG_TICKS, PRICE_SOURCE, CONFLATE_TICKS, logger
+from metrics import ticks_total
 from price_statistics import PriceStatistics
-from utils import MonitoringStartError
+from replay import ReplayFeed
+from market_data import MarketDataFeed
+from stream_supervisor import StreamSupervisor
+from tick_conflator import TickConflator
+from tick import Tick
+from utils import MonitoringStartError, get_client
 
 
 class PriceMonitor:
 
     def __init__(self):
 
-        self._asset_price_data = {}
         self._assets_traded = ASSETS_TO_TRADE
+        self._ticks = {symbol: Tick(symbol) for symbol in self._assets_traded}
         self._socket_mgr = ThreadedWebsocketManager()
+        self._local_feed = self._get_local_feed()
         self._price_statistics = PriceStatistics()
-        self._total_errors = 0
+        self._conflator = self._get_conflator()
+        self._handler_lock = Lock()
+        self._supervisor = StreamSupervisor(self._socket_mgr, self._assets_traded,
+                                            self._get_message_handler(), get_client(),
+                                            backfill_handler=self._get_backfill_handler())
 
     def start_monitoring(self):
         """Start monitoring prices for traded symbols
 
         Raises MonitoringStartError if at least one of the sockets
-        is not started successfully.
+        is not started successfully. Sockets failing later are
+        reconnected by the StreamSupervisor.
         """
 
         logger.info("Start monitoring prices...")
 
+        if self._conflator is not None:
+            self._conflator.start()
+
+        if self._local_feed is not None:
+            self._local_feed.run(self._get_message_handler())
+            return
+
         try:
             self._socket_mgr.start()
 
-            for asset in self._assets_traded:
-                self._socket_mgr.start_symbol_ticker_socket(callback=self._price_msg_handler, symbol=asset)
+            self._supervisor.start()
 
             self._socket_mgr.join()
 
@@ -41,6 +61,11 @@ class PriceMonitor:
         """Close the websocket connections and stop monitoring"""
 
         logger.info("Stop monitoring prices...")
+
+        if self._local_feed is not None:
+            self._local_feed.stop()
+
+        self._supervisor.stop()
         self._socket_mgr.stop()
 
         # properly terminate WebSocket
@@ -51,52 +76,112 @@ class PriceMonitor:
 
         self._conn_keys = []
 
+    def get_price_statistics(self):
+        """Get the statistics updated by the monitored prices
+
+        :rtype: PriceStatistics
+        :returns: Price statistics
+        """
+
+        return self._price_statistics
+
     def _price_msg_handler(self, message):
         """Handle message from symbol ticker socket
 
         Symbol, close price, previous day close price, price change, and
         price change percent values are used from the incoming message.
-        They are sent to PriceStatistics instance to process.
+        They are written in place into the preallocated Tick of the symbol
+        and sent to PriceStatistics instance to process. Error messages
+        are handled by the StreamSupervisor before reaching here.
 
         :type message: dict
         :param message: Socket message dictionary
         """
 
-        if message['e'] != 'error':
-            self._asset_price_data["symbol"] = message["s"]
-            self._asset_price_data["close"] = float(message["c"])
-            self._asset_price_data["close_prev_day"] = float(message["x"])
-            self._asset_price_data["change"] = float(message["p"])
-            self._asset_price_data["change_percent"] = float(message["P"])
+        ticks_total.inc()
 
-            self._log_incoming_message(self._asset_price_data)
+        tick = self._ticks.get(message["s"])
+        if tick is None:
+            tick = self._ticks[message["s"]] = Tick(message["s"])
 
-            self._price_statistics.process_price(self._asset_price_data)
+        tick.update_from_message(message)
 
-        else:
-            logger.error(f"Error received from symbol ticker socket!")
-            self._total_errors += 1
+        if LOG_TICKS:
+            self._log_incoming_message(tick)
 
-            if self._total_errors > 10:
-                self._handle_msg_error()
+        self._price_statistics.process_price(tick)
 
-    def _log_incoming_message(self, msg_data):
-        """Print asset price message details
+    def _get_conflator(self):
+        """Get the conflation stage in front of the message handler
+
+        Replays process every recorded tick so their results do not
+        depend on processing speed.
+
+        :rtype: TickConflator
+        :returns: Conflator or None if ticks are not conflated
+        """
+
+        if CONFLATE_TICKS and PRICE_SOURCE != "replay":
+            return TickConflator(self._price_msg_handler)
+
+        return None
+
+    def _get_message_handler(self):
+        """Get the handler receiving ticker messages
+
+        :rtype: callable
+        :returns: TickConflator.submit or the serialized message handler
+        """
 
-        :type msg_data: dict
-        :param msg_data: Asset price data dictionary
+        if self._conflator is not None:
+            return self._conflator.submit
+
+        return self._handle_message_serialized
+
+    def _get_backfill_handler(self):
+        """Get the handler receiving backfilled ticker messages
+
+        Backfilled ticks skip conflation so every tick of the gap is
+        recorded, but are handled on the same thread as the live ticks.
+
+        :rtype: callable
+        :returns: TickConflator.submit_unconflated or the serialized message handler
+        """
+
+        if self._conflator is not None:
+            return self._conflator.submit_unconflated
+
+        return self._handle_message_serialized
+
+    def _handle_message_serialized(self, message):
+        """Handle messages of the socket and backfill threads one at a time
+
+        :type message: dict
+        :param message: Socket message dictionary
         """
 
-        logger.info(f"Symbol: {msg_data['symbol']}, "
-                    f"Close Price: {msg_data['close']}, "
-                    f"Prev. Day Close Price: {msg_data['close_prev_day']}, "
-                    f"Change: {msg_data['change']}, "
-                    f"Change percent: {msg_data['change_percent']}")
+        with self._handler_lock:
+            self._price_msg_handler(message)
+
+    def _get_local_feed(self):
+        """Get the feed replacing the Binance sockets for PRICE_SOURCE
+
+        :rtype: ReplayFeed or MarketDataFeed
+        :returns: Local feed or None for the Binance sockets
+        """
 
-    def _handle_msg_error(self):
-        """Handle message error"""
+        if PRICE_SOURCE == "replay":
+            return ReplayFeed(self._assets_traded)
+        if PRICE_SOURCE == "daemon":
+            return MarketDataFeed(self._assets_traded)
 
-        logger.error("Total errors from symbol ticker socket reached 10!")
-        self._total_errors = 0
+        return None
+
+    def _log_incoming_message(self, tick):
+        """Print asset price message details
+
+        :type tick: Tick
+        :param tick: Latest tick of the symbol
+        """
 
-        self.stop_monitoring()
\ No newline at end of file
+        logger.info(tick)
\ No newline at end of file
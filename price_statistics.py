@@ -1,6 +1,11 @@
 from threading import Lock
 
-from config import logger
+from config import logger, LOG_TICKS, EXCHANGE_MODE
+from portfolio import portfolio
+from tick import AssetStats
+from trade_store import trade_store
+from utils import get_client
+from state_snapshot import state_snapshot
 from price_evaluator import PriceEvaluator
 
 
@@ -8,35 +13,38 @@ class PriceStatistics:
 
     def __init__(self):
 
-        self._traded_asset_stats = {}
+        restored = state_snapshot.get_restored_state()
+
+        self._traded_asset_stats = dict(restored.asset_stats) if restored is not None else {}
         self._stats_read_lock = Lock()
+        self._paper_exchange = get_client() if EXCHANGE_MODE == "paper" else None
         self._evaluator = PriceEvaluator(self)
 
-    def process_price(self, asset_price_data):
+    def process_price(self, tick):
         """Process asset price data
 
-        :type asset_price_data: dict
-        :param asset_price_data: Asset price data in the following format
-            {
-                "symbol": str,
-                "close": float,
-                "close_prev_day": float,
-                "change": float,
-                "change_percent": float
-            }
+        Statistics of the symbol are updated in place, so no objects are
+        created per tick once the symbol has been seen.
+
+        :type tick: Tick
+        :param tick: Latest tick of the symbol
         """
 
-        symbol = asset_price_data["symbol"]
-        if symbol not in self._traded_asset_stats:
-            self._traded_asset_stats[symbol] = {}
+        asset_stats = self._traded_asset_stats.get(tick.symbol)
+        if asset_stats is None:
+            asset_stats = self._traded_asset_stats[tick.symbol] = AssetStats()
+
+        asset_stats.update_from_tick(tick)
+
+        portfolio.update_price(tick.symbol, tick.close)
 
-        self._traded_asset_stats[symbol]["prev_price"]     = self._traded_asset_stats[symbol].get("latest_price", 0.0)
-        self._traded_asset_stats[symbol]["latest_price"]   = asset_price_data["close"]
-        self._traded_asset_stats[symbol]["prev_day_price"] = asset_price_data["close_prev_day"]
-        self._traded_asset_stats[symbol]["price_change"]   = asset_price_data["change"]
-        self._traded_asset_stats[symbol]["change_percent"] = asset_price_data["change_percent"]
+        if self._paper_exchange is not None:
+            self._paper_exchange.update_price(tick.symbol, tick.close)
 
-        logger.debug(self)
+        trade_store.record_tick(tick.symbol, tick.event_time, tick.close, tick.change_percent)
+
+        if LOG_TICKS:
+            logger.debug(self)
 
     def get_asset_stats(self):
         """Get current statistics for all symbols
@@ -46,13 +54,7 @@ class PriceStatistics:
         :rtype: dict
         :returns: Asset price statistics in the following format
             {
-                "symbol": {
-                    "prev_price": float,
-                    "latest_price": float,
-                    "prev_day_price": float,
-                    "price_change": float,
-                    "change_percent": float
-                }
+                "symbol": AssetStats
             }
         """
 
@@ -62,17 +64,21 @@ class PriceStatistics:
 
         return stats
 
+    def get_evaluator(self):
+        """Get the evaluator of the statistics
+
+        :rtype: PriceEvaluator
+        :returns: Price evaluator
+        """
+
+        return self._evaluator
+
     def __str__(self):
 
         result = "+++++++ PriceStatistics +++++++\n"
 
         for symbol in self._traded_asset_stats:
             result += f"*** {symbol} ***\n"
-
-            result += f"Previous price: {self._traded_asset_stats[symbol]['prev_price']}\n"
-            result += f"Latest price: {self._traded_asset_stats[symbol]['latest_price']}\n"
-            result += f"Previous day price: {self._traded_asset_stats[symbol]['prev_day_price']}\n"
-            result += f"Price change: {self._traded_asset_stats[symbol]['price_change']}\n"
-            result += f"Price change percent: {self._traded_asset_stats[symbol]['change_percent']}\n\n"
+            result += f"{self._traded_asset_stats[symbol]}\n"
 
         return result
\ No newline at end of file
@@ -0,0 +1,154 @@
+import sys
+import atexit
+import threading
+from time import sleep, perf_counter
+from functools import wraps
+from collections import Counter
+
+from config import (logger,
+                    PROFILE_SAMPLE_INTERVAL,
+                    PROFILE_DUMP_INTERVAL,
+                    PROFILE_STACKS_FILE,
+                    PROFILE_TIMINGS_FILE)
+
+
+class SamplingProfiler:
+
+    def __init__(self):
+
+        self._stack_counts = Counter()
+        self._timings = {}
+        self._lock = threading.Lock()
+        self._running = False
+
+    def start(self):
+        """Instrument hot path functions and start sampling all threads"""
+
+        self._instrument_hot_path()
+        self._running = True
+
+        threading.Thread(target=self._sample, daemon=True).start()
+        threading.Thread(target=self._dump_periodically, daemon=True).start()
+
+        # results are also written when the process exits without a KeyboardInterrupt
+        atexit.register(self.stop)
+
+        logger.info(f"Profiling started, sampling every {PROFILE_SAMPLE_INTERVAL} seconds")
+
+    def stop(self):
+        """Stop sampling and write final results"""
+
+        if not self._running:
+            return
+
+        self._running = False
+        self.dump()
+
+    def timed(self, name, function):
+        """Wrap function to record its call count and duration
+
+        :type name: str
+        :param name: Name used in the timing report
+        :type function: callable
+        :param function: Function to wrap
+        :rtype: callable
+        :returns: Wrapped function
+        """
+
+        timing = self._timings.setdefault(name, {"calls": 0, "total": 0.0, "max": 0.0})
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                with self._lock:
+                    timing["calls"] += 1
+                    timing["total"] += elapsed
+                    if elapsed > timing["max"]:
+                        timing["max"] = elapsed
+
+        return wrapper
+
+    def dump(self):
+        """Write collapsed stacks and function timings to files
+
+        Collapsed stacks can be rendered with flamegraph.pl or speedscope.
+        """
+
+        with self._lock:
+            stack_counts = list(self._stack_counts.items())
+            timings = [(name, dict(timing)) for name, timing in sorted(self._timings.items())]
+
+        with open(PROFILE_STACKS_FILE, "w", encoding="utf8") as stacks_file:
+            for stack, count in stack_counts:
+                stacks_file.write(f"{stack} {count}\n")
+
+        with open(PROFILE_TIMINGS_FILE, "w", encoding="utf8") as timings_file:
+            timings_file.write(f"{'function':40} {'calls':>10} {'total(s)':>12} "
+                               f"{'mean(ms)':>10} {'max(ms)':>10}\n")
+
+            for name, timing in timings:
+                calls = timing["calls"]
+                mean = timing["total"] / calls * 1000 if calls else 0.0
+                timings_file.write(f"{name:40} {calls:>10} {timing['total']:>12.3f} "
+                                   f"{mean:>10.3f} {timing['max'] * 1000:>10.3f}\n")
+
+        logger.debug(f"Profile written to {PROFILE_STACKS_FILE} and {PROFILE_TIMINGS_FILE}")
+
+    def _sample(self):
+        """Record the current stack of every thread"""
+
+        own_ident = threading.get_ident()
+
+        while self._running:
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+
+                stack.append(thread_names.get(ident, str(ident)))
+                collapsed = ";".join(reversed(stack))
+
+                with self._lock:
+                    self._stack_counts[collapsed] += 1
+
+            sleep(PROFILE_SAMPLE_INTERVAL)
+
+    def _dump_periodically(self):
+        """Dump profile results every PROFILE_DUMP_INTERVAL seconds"""
+
+        while self._running:
+            sleep(PROFILE_DUMP_INTERVAL)
+            self.dump()
+
+    def _instrument_hot_path(self):
+        """Wrap tick handling, evaluation and order execution with timers"""
+
+        from price_monitor import PriceMonitor
+        from price_statistics import PriceStatistics
+        from price_evaluator import PriceEvaluator
+        from market_order.orders import MarketBuyOrder, MarketSellOrder, LimitOrder
+
+        hot_path = [(PriceMonitor, "_price_msg_handler"),
+                    (PriceStatistics, "process_price"),
+                    (PriceEvaluator, "_evaluate"),
+                    (MarketBuyOrder, "execute_order"),
+                    (MarketSellOrder, "execute_order"),
+                    (LimitOrder, "execute_order")]
+
+        for cls, method_name in hot_path:
+            name = f"{cls.__name__}.{method_name}"
+            setattr(cls, method_name, self.timed(name, getattr(cls, method_name)))
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,271 @@
+from time import time
+from threading import Condition, local
+
+from binance.exceptions import BinanceAPIException
+
+from config import (logger,
+                    REQUEST_WEIGHT_PER_MINUTE,
+                    ORDERS_PER_10_SEC,
+                    RATE_LIMIT_MAX_RETRIES)
+from metrics import (rate_limit_order_wait_seconds,
+                     rate_limit_info_wait_seconds,
+                     rate_limit_throttled_total,
+                     rate_limit_errors_total)
+
+
+ORDER_PRIORITY = 0
+INFO_PRIORITY = 1
+
+# request weights of the client methods used by the project
+METHOD_WEIGHTS = {
+    "get_symbol_ticker": 2,
+    "get_asset_balance": 20,
+    "get_account": 20,
+    "get_exchange_info": 20,
+    "get_system_status": 1,
+    "get_order": 4,
+    "get_open_orders": 6,
+    "get_my_trades": 20,
+    "order_market_buy": 1,
+    "order_market_sell": 1,
+    "order_limit_buy": 1,
+    "order_limit_sell": 1,
+    "create_order": 1,
+    "cancel_order": 1,
+    "get_klines": 2,
+    "get_aggregate_trades": 4,
+    "get_order_book": 50    # weight of a snapshot with limit=1000
+}
+
+ORDER_METHODS = {"order_market_buy", "order_market_sell",
+                 "order_limit_buy", "order_limit_sell",
+                 "create_order", "cancel_order"}
+
+DEFAULT_WEIGHT = 1
+
+WAIT_HISTOGRAMS = {ORDER_PRIORITY: rate_limit_order_wait_seconds,
+                   INFO_PRIORITY: rate_limit_info_wait_seconds}
+
+
+class TokenBucket:
+
+    def __init__(self, capacity, period):
+
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self._rate = capacity / period
+        self._last_refill = time()
+
+    def refill(self):
+        """Add tokens accumulated since the last refill"""
+
+        now = time()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
+
+    def wait_time_for(self, amount):
+        """Get seconds until the given amount of tokens is available
+
+        :type amount: float
+        :param amount: Amount of tokens
+        :rtype: float
+        :returns: Seconds to wait
+        """
+
+        if self.tokens >= amount:
+            return 0.0
+
+        return (amount - self.tokens) / self._rate
+
+
+class RateLimitedClient:
+
+    def __init__(self, client):
+
+        self._client = client
+        self._condition = Condition()
+        self._weight_bucket = TokenBucket(REQUEST_WEIGHT_PER_MINUTE, 60)
+        self._order_bucket = TokenBucket(ORDERS_PER_10_SEC, 10)
+        self._waiting = {ORDER_PRIORITY: 0, INFO_PRIORITY: 0}
+        self._banned_until = 0.0
+        self._last_response = local()
+        self._metrics = {
+            ORDER_PRIORITY: {"requests": 0, "total_wait": 0.0, "max_wait": 0.0},
+            INFO_PRIORITY: {"requests": 0, "total_wait": 0.0, "max_wait": 0.0}
+        }
+
+        # client.response is shared by all threads, the hook keeps the response per thread
+        session = getattr(client, "session", None)
+        if session is not None:
+            session.hooks["response"].append(self._store_response)
+
+    def __getattr__(self, name):
+
+        attribute = getattr(self._client, name)
+
+        if not callable(attribute):
+            return attribute
+
+        def governed_call(*args, **kwargs):
+            return self._call(name, attribute, *args, **kwargs)
+
+        return governed_call
+
+    def get_metrics(self):
+        """Get wait time metrics per priority
+
+        :rtype: dict
+        :returns: Request count, total and maximum wait time per priority
+        """
+
+        with self._condition:
+            return {"order": dict(self._metrics[ORDER_PRIORITY]),
+                    "info": dict(self._metrics[INFO_PRIORITY])}
+
+    def _call(self, name, method, *args, **kwargs):
+        """Call client method once rate limits allow it
+
+        Requests are queued instead of failing when limits are hit.
+        Order placement is served before informational calls. 418/429
+        responses pause all requests and are retried up to
+        RATE_LIMIT_MAX_RETRIES times before the error is raised.
+
+        :type name: str
+        :param name: Client method name
+        :type method: callable
+        :param method: Bound client method
+        """
+
+        is_order = name in ORDER_METHODS
+        priority = ORDER_PRIORITY if is_order else INFO_PRIORITY
+        weight = METHOD_WEIGHTS.get(name, DEFAULT_WEIGHT)
+
+        retries = 0
+
+        while True:
+            self._acquire(weight, is_order, priority)
+            self._last_response.value = None
+
+            try:
+                result = method(*args, **kwargs)
+            except BinanceAPIException as exc:
+                if exc.status_code in (418, 429):
+                    rate_limit_errors_total.inc()
+                    self._handle_ban(exc)
+
+                    if retries < RATE_LIMIT_MAX_RETRIES:
+                        retries += 1
+                        continue
+                raise
+            else:
+                self._sync_used_weight()
+                return result
+
+    def _acquire(self, weight, is_order, priority):
+        """Block until request weight and order count are available
+
+        :type weight: int
+        :param weight: Request weight
+        :type is_order: bool
+        :param is_order: Whether the request places an order
+        :type priority: int
+        :param priority: Request priority
+        """
+
+        start = time()
+        throttled = False
+
+        with self._condition:
+            self._waiting[priority] += 1
+
+            try:
+                while True:
+                    self._weight_bucket.refill()
+                    self._order_bucket.refill()
+
+                    wait_time = max(self._banned_until - time(),
+                                    self._weight_bucket.wait_time_for(weight))
+                    if is_order:
+                        wait_time = max(wait_time, self._order_bucket.wait_time_for(1))
+
+                    has_precedence = priority == ORDER_PRIORITY or not self._waiting[ORDER_PRIORITY]
+
+                    if wait_time <= 0 and has_precedence:
+                        break
+
+                    throttled = True
+                    self._condition.wait(wait_time if wait_time > 0 else None)
+
+                self._weight_bucket.tokens -= weight
+                if is_order:
+                    self._order_bucket.tokens -= 1
+            finally:
+                self._waiting[priority] -= 1
+                self._condition.notify_all()
+
+            waited = time() - start
+            metrics = self._metrics[priority]
+            metrics["requests"] += 1
+            metrics["total_wait"] += waited
+            metrics["max_wait"] = max(metrics["max_wait"], waited)
+
+        WAIT_HISTOGRAMS[priority].observe(waited)
+        if throttled:
+            rate_limit_throttled_total.inc()
+
+        if waited > 1:
+            logger.info(f"Request waited {waited:.2f} seconds for rate limit")
+
+    def _store_response(self, response, *args, **kwargs):
+        """Keep the response of the current thread's request
+
+        :type response: requests.Response
+        :param response: Response passed by the session hook
+        :rtype: requests.Response
+        :returns: Unchanged response
+        """
+
+        self._last_response.value = response
+
+        return response
+
+    def _sync_used_weight(self):
+        """Align local weight bucket with X-MBX-USED-WEIGHT header
+
+        The header is read from the response of the request just made by
+        the calling thread.
+        """
+
+        response = getattr(self._last_response, "value", None)
+
+        if response is None:
+            return
+
+        used_weight = response.headers.get("X-MBX-USED-WEIGHT-1M") or \
+            response.headers.get("X-MBX-USED-WEIGHT")
+
+        if used_weight is None:
+            return
+
+        with self._condition:
+            remaining = self._weight_bucket.capacity - int(used_weight)
+            if remaining < self._weight_bucket.tokens:
+                self._weight_bucket.tokens = remaining
+
+    def _handle_ban(self, exc):
+        """Pause all requests until the Retry-After period ends
+
+        :type exc: BinanceAPIException
+        :param exc: 418/429 error from Binance
+        """
+
+        retry_after = 60
+        if exc.response is not None:
+            retry_after = int(exc.response.headers.get("Retry-After", retry_after))
+
+        logger.error(f"Rate limit exceeded ({exc.status_code}), waiting {retry_after} seconds...")
+
+        with self._condition:
+            self._banned_until = max(self._banned_until, time() + retry_after)
+            self._weight_bucket.tokens = 0
+            self._condition.notify_all()
@@ -0,0 +1,104 @@
+import sqlite3
+from time import sleep
+
+from config import logger, REPLAY_DB_FILE, REPLAY_SPEED
+
+
+class ReplayFeed:
+
+    def __init__(self, symbols, db_file=REPLAY_DB_FILE, speed=REPLAY_SPEED):
+
+        self._symbols = tuple(symbols)
+        self._db_file = db_file
+        self._speed = speed
+        self._running = False
+
+    def run(self, callback):
+        """Replay recorded ticks as symbol ticker socket messages
+
+        Ticks are read from the ticks table of the given database and
+        passed to the callback in time order. With a speed above 0 the
+        original spacing of ticks is kept, divided by the speed.
+
+        :type callback: callable
+        :param callback: Socket message handler
+        """
+
+        placeholders = ",".join("?" * len(self._symbols))
+        query = (f"SELECT symbol, time, price, change_percent FROM ticks "
+                 f"WHERE symbol IN ({placeholders}) ORDER BY time")
+
+        logger.info(f"Replaying ticks from {self._db_file}...")
+
+        self._running = True
+        previous_time = None
+        replayed = 0
+
+        with sqlite3.connect(self._db_file) as connection:
+            for symbol, event_time, price, change_percent in connection.execute(query, self._symbols):
+                if not self._running:
+                    break
+
+                if self._speed > 0 and previous_time is not None and event_time > previous_time:
+                    sleep((event_time - previous_time) / 1000 / self._speed)
+                previous_time = event_time
+
+                callback(make_ticker_message(symbol, event_time, price, change_percent))
+                replayed += 1
+
+        logger.info(f"Replay finished after {replayed} ticks")
+
+    def stop(self):
+        """Stop replaying after the current tick"""
+
+        self._running = False
+
+
+def make_ticker_message(symbol, event_time, price, change_percent):
+    """Build a symbol ticker socket message from a recorded tick
+
+    :type symbol: str
+    :param symbol: Asset symbol
+    :type event_time: int
+    :param event_time: Event time in milliseconds
+    :type price: float
+    :param price: Close price
+    :type change_percent: float
+    :param change_percent: 24 hour price change percent
+    :rtype: dict
+    :returns: Symbol ticker socket message
+    """
+
+    change_percent = change_percent or 0.0
+    prev_day_price = price / (1 + change_percent / 100)
+
+    return {"e": "24hrTicker",
+            "E": event_time,
+            "s": symbol,
+            "c": str(price),
+            "x": str(prev_day_price),
+            "p": str(price - prev_day_price),
+            "P": str(change_percent)}
+
+
+def load_initial_prices(symbols, db_file=REPLAY_DB_FILE):
+    """Get the first recorded price of every symbol
+
+    :type symbols: tuple
+    :param symbols: Asset symbols
+    :type db_file: str
+    :param db_file: SQLite database with a ticks table
+    :rtype: dict
+    :returns: Dictionary of symbol: price pairs
+    """
+
+    query = "SELECT price FROM ticks WHERE symbol = ? ORDER BY time LIMIT 1"
+    initial_prices = {}
+
+    with sqlite3.connect(db_file) as connection:
+        for symbol in symbols:
+            row = connection.execute(query, (symbol,)).fetchone()
+            if row is not None:
+                initial_prices[symbol] = row[0]
+
+    return initial_prices
@@ -1,12 +1,30 @@
+import os
+import json
+import atexit
+from time import sleep
 from datetime import datetime
-from config import REPORT_FILENAME, TRADED_ASSET_AMOUNTS
+from threading import Lock, Thread
+
+import utils
+from config import (REPORT_FILENAME,
+                    REPORT_MAX_BYTES,
+                    REPORT_BACKUP_COUNT,
+                    REPORT_FLUSH_INTERVAL)
 
 
 class Reporter:
 
     def __init__(self):
 
-        self._separator = "*" * 80
+        self._lock = Lock()
+        self._report_file = None
+        self._opened_day = None
+        self._written_bytes = 0
+
+        flush_thread = Thread(target=self._flush_periodically, daemon=True)
+        flush_thread.start()
+
+        atexit.register(self.close)
 
     def log_current_account_info(self, account):
         """Log last state of the user account
@@ -15,11 +33,7 @@ class Reporter:
         :param account: User account to report
         """
 
-        log_str = (f"{self._get_current_date()}\n"
-                   f"{str(account)}"
-                   f"{self._separator}\n\n")
-
-        self._write_log(log_str)
+        self._write_record("account", account.to_dict())
 
     def log_execution_result(self, order_result):
         """Log result of the market order execution
@@ -28,42 +42,107 @@ class Reporter:
         :param order_result: Result of the order execution
         """
 
-        log_str = (f"{self._get_current_date()}\n"
-                   f"{order_result}\n"
-                   f"{self._separator}\n\n")
-
-        self._write_log(log_str)
+        self._write_record("fill", order_result)
 
     def log_traded_asset_amounts(self):
         """Log last state of the traded assets"""
 
-        log_str = (f"{self._get_current_date()}\n"
-                   f"TRADED_ASSET_AMOUNTS: {TRADED_ASSET_AMOUNTS}\n"
-                   f"{self._separator}\n\n")
+        self._write_record("traded_assets", utils.TRADED_ASSET_AMOUNTS)
+
+    def flush(self):
+        """Flush buffered records to the report file"""
 
-        self._write_log(log_str)
+        with self._lock:
+            if self._report_file is not None:
+                self._report_file.flush()
+
+    def close(self):
+        """Flush and close the report file"""
+
+        with self._lock:
+            if self._report_file is not None:
+                self._report_file.close()
+                self._report_file = None
 
     def _get_current_date(self):
-        """Get current date and time in human readable format
+        """Get current date and time in ISO format
 
         :rtype: str
         :returns: Current date and time information
         """
 
-        now = datetime.now()
-        formatted_date = now.strftime("%d/%m/%Y %H:%M:%S")
+        return datetime.now().isoformat(timespec="milliseconds")
+
+    def _write_record(self, record_type, data):
+        """Append a JSON Lines record to the report file
+
+        Writes are buffered; the file is flushed by a background thread
+        every REPORT_FLUSH_INTERVAL seconds.
+
+        :type record_type: str
+        :param record_type: fill, account or traded_assets
+        :type data: dict
+        :param data: Record payload
+        """
+
+        line = json.dumps({"time": self._get_current_date(),
+                           "type": record_type,
+                           "data": data}, default=str) + "\n"
+
+        size = len(line.encode())
+
+        with self._lock:
+            self._rotate_if_needed(size)
+            self._report_file.write(line)
+            self._written_bytes += size
 
-        return formatted_date
+    def _rotate_if_needed(self, next_write_size):
+        """Open the report file and rotate it by size or day
 
-    def _write_log(self, log_str):
-        """Write the given log to report.txt file
+        The size is counted as records are written, since tell() would
+        flush the buffer on every record.
 
-        :type log_str: str
-        :param log_str: Log string
+        :type next_write_size: int
+        :param next_write_size: Size of the record to be written in bytes
         """
 
-        with open(REPORT_FILENAME, "a") as report_file:
-            report_file.write(log_str)
+        today = datetime.now().date()
+
+        if self._report_file is not None:
+            size_exceeded = self._written_bytes + next_write_size > REPORT_MAX_BYTES
+            if not size_exceeded and today == self._opened_day:
+                return
+
+            self._report_file.close()
+            self._rotate_files()
+
+        elif os.path.exists(REPORT_FILENAME):
+            # a restart on a later day starts a new file instead of appending to the old day's one
+            modified_day = datetime.fromtimestamp(os.path.getmtime(REPORT_FILENAME)).date()
+            if modified_day != today or os.path.getsize(REPORT_FILENAME) + next_write_size > REPORT_MAX_BYTES:
+                self._rotate_files()
+
+        self._report_file = open(REPORT_FILENAME, "a", encoding="utf8", buffering=64 * 1024)
+        self._written_bytes = os.path.getsize(REPORT_FILENAME)
+        self._opened_day = today
+
+    def _rotate_files(self):
+        """Shift report backups like report.jsonl.1 -> report.jsonl.2"""
+
+        for index in range(REPORT_BACKUP_COUNT - 1, 0, -1):
+            source = f"{REPORT_FILENAME}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{REPORT_FILENAME}.{index + 1}")
+
+        if os.path.exists(REPORT_FILENAME):
+            os.replace(REPORT_FILENAME, f"{REPORT_FILENAME}.1")
+
+    def _flush_periodically(self):
+        """Flush buffered records every REPORT_FLUSH_INTERVAL seconds"""
+
+        while True:
+            sleep(REPORT_FLUSH_INTERVAL)
+            self.flush()
 
 
-reporter = Reporter()
\ No newline at end of file
+reporter = Reporter()
@@ -0,0 +1,141 @@
+import numpy as np
+
+
+class RollingCorrelation:
+
+    def __init__(self, symbol_count, window):
+
+        self.window = window
+        self.count = 0
+        self._returns = np.zeros((window, symbol_count))
+        self._position = 0
+        self._updates = 0
+        self._sum = np.zeros(symbol_count)
+        self._cross = np.zeros((symbol_count, symbol_count))
+        self._lagged_cross = np.zeros((symbol_count, symbol_count))
+
+    def update(self, returns):
+        """Add the returns of a bar, dropping the oldest bar of a full window
+
+        Sums of returns, of their products and of the products with the
+        previous bar are updated with rank one terms, O(n^2) per bar.
+        They are recomputed from the window once per window length so
+        rounding errors do not accumulate.
+
+        :type returns: numpy.ndarray
+        :param returns: Return of every symbol, in symbol order
+        """
+
+        window = self.window
+        position = self._position
+
+        # rank one terms of the sums, negated for the dropped bar, applied as one product per sum
+        left, right = [returns], [returns]
+        lagged_left, lagged_right = [], []
+
+        if self.count:
+            lagged_left.append(self._returns[(position - 1) % window])
+            lagged_right.append(returns)
+
+        if self.count == window:
+            oldest = self._returns[position]
+            left.append(-oldest)
+            right.append(oldest)
+            lagged_left.append(-oldest)
+            lagged_right.append(self._returns[(position + 1) % window])
+            self._sum -= oldest
+        else:
+            self.count += 1
+
+        self._cross += np.array(left).T @ np.array(right)
+        if lagged_left:
+            self._lagged_cross += np.array(lagged_left).T @ np.array(lagged_right)
+
+        self._returns[position] = returns
+        self._position = (position + 1) % window
+        self._sum += returns
+
+        self._updates += 1
+        if self._updates % window == 0:
+            self._recompute()
+
+    def get_latest_returns(self):
+        """Get the returns of the latest bar
+
+        :rtype: numpy.ndarray
+        :returns: Return of every symbol
+        """
+
+        return self._returns[(self._position - 1) % self.window]
+
+    def get_correlation(self):
+        """Get the correlation matrix of the returns in the window
+
+        :rtype: numpy.ndarray
+        :returns: Symmetric matrix, 0 where a symbol has no variance
+        """
+
+        count = self.count
+        mean = self._sum / count
+        covariance = self._cross / count - np.outer(mean, mean)
+        deviation = np.sqrt(np.clip(np.diag(covariance), 0, None))
+
+        return self._normalize(covariance, deviation, deviation)
+
+    def get_lead_lag(self, leaders=None):
+        """Get correlations and betas of returns with the next bar's returns
+
+        Entry [i, j] relates the return of leader i to the return of
+        symbol j one bar later. Only the rows of the given leaders are
+        computed, O(k * n) for k leaders.
+
+        :type leaders: list
+        :param leaders: Indexes of the leading symbols (all if None)
+        :rtype: tuple
+        :returns: (correlation matrix, beta matrix) with a row per leader
+        """
+
+        if leaders is None:
+            leaders = np.arange(len(self._sum))
+
+        pairs = self.count - 1
+        newest = self.get_latest_returns()
+        oldest = self._returns[self._position % self.window] if self.count == self.window else self._returns[0]
+        squares = np.diag(self._cross)
+
+        leader_mean = (self._sum[leaders] - newest[leaders]) / pairs
+        follower_mean = (self._sum - oldest) / pairs
+        leader_variance = np.clip((squares[leaders] - newest[leaders] ** 2) / pairs - leader_mean ** 2, 0, None)
+        follower_variance = np.clip((squares - oldest ** 2) / pairs - follower_mean ** 2, 0, None)
+
+        covariance = self._lagged_cross[leaders] / pairs - np.outer(leader_mean, follower_mean)
+        correlation = self._normalize(covariance, np.sqrt(leader_variance), np.sqrt(follower_variance))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            beta = np.where(leader_variance[:, None] > 0, covariance / leader_variance[:, None], 0.0)
+
+        return correlation, beta
+
+    def _normalize(self, covariance, row_deviation, column_deviation):
+        """Divide covariances by the deviations of their row and column
+
+        :rtype: numpy.ndarray
+        :returns: Correlations clipped to [-1, 1], 0 for zero deviations
+        """
+
+        scale = np.outer(row_deviation, column_deviation)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            correlation = np.where(scale > 0, covariance / scale, 0.0)
+
+        return np.clip(correlation, -1, 1)
+
+    def _recompute(self):
+        """Recompute the sums from the returns in the window"""
+
+        returns = np.roll(self._returns, -self._position, axis=0) if self.count == self.window \
+            else self._returns[:self.count]
+
+        self._sum = returns.sum(axis=0)
+        self._cross = returns.T @ returns
+        self._lagged_cross = returns[:-1].T @ returns[1:]
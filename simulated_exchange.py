@@ -0,0 +1,492 @@
+import random
+from time import time, sleep
+from itertools import count
+from threading import Lock
+
+from binance.exceptions import BinanceOrderException
+
+from config import (logger,
+                    ASSETS_TO_TRADE,
+                    PAPER_BALANCES,
+                    PAPER_LATENCY,
+                    PAPER_SLIPPAGE_BPS,
+                    PAPER_COMMISSION_RATE,
+                    PAPER_MAKER_COMMISSION_RATE,
+                    PAPER_MAX_FILLS,
+                    PAPER_MIN_FILL_RATIO)
+
+
+QUOTE_ASSET = "USDT"
+
+
+class SimulatedOrderBook:
+
+    def __init__(self):
+
+        self._orders = {}
+        self._open_orders = {}
+
+    def add(self, order):
+        """Add a resting limit order
+
+        :type order: dict
+        :param order: Order in Binance format
+        """
+
+        self._orders[order["orderId"]] = order
+        self._open_orders.setdefault(order["symbol"], {})[order["orderId"]] = order
+
+    def get(self, order_id):
+        """Get an order by id, including closed orders
+
+        :type order_id: int
+        :param order_id: Order id
+        :rtype: dict
+        :returns: Order or None if unknown
+        """
+
+        return self._orders.get(order_id)
+
+    def close(self, order):
+        """Remove the order from the resting orders
+
+        :type order: dict
+        :param order: Filled or cancelled order
+        """
+
+        self._open_orders.get(order["symbol"], {}).pop(order["orderId"], None)
+
+    def has_open_orders(self, symbol):
+        """Check whether the symbol has resting orders
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :rtype: bool
+        :returns: Whether there are resting orders
+        """
+
+        return bool(self._open_orders.get(symbol))
+
+    def get_crossed_orders(self, symbol, price):
+        """Get resting orders the given trade price executes against
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :type price: float
+        :param price: Trade price
+        :rtype: list
+        :returns: Crossed orders
+        """
+
+        crossed = []
+        for order in self._open_orders.get(symbol, {}).values():
+            limit_price = float(order["price"])
+            if (order["side"] == "BUY" and price <= limit_price) or (order["side"] == "SELL" and price >= limit_price):
+                crossed.append(order)
+
+        return crossed
+
+
+class SimulatedExchange:
+
+    def __init__(self, price_client=None, seed=None):
+
+        self._lock = Lock()
+        self._prices = {}
+        self._balances = {asset: float(amount) for asset, amount in PAPER_BALANCES.items()}
+        self._locked = {}
+        self._order_book = SimulatedOrderBook()
+        self._trades = {}
+        self._price_client = price_client
+        self._random = random.Random(seed)
+        self._order_ids = count(1)
+        self._trade_ids = count(1)
+
+    def update_price(self, symbol, price):
+        """Update the last traded price used for fills
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :type price: float
+        :param price: Latest price from the live or replayed stream
+        """
+
+        self._prices[symbol] = price
+
+        if self._order_book.has_open_orders(symbol):
+            with self._lock:
+                for order in self._order_book.get_crossed_orders(symbol, price):
+                    self._fill_limit_order(order)
+
+    def ping(self):
+
+        return {}
+
+    def get_system_status(self):
+
+        return {"status": 0, "msg": "normal (paper trading)"}
+
+    def get_symbol_ticker(self, symbol):
+
+        return {"symbol": symbol, "price": f"{self._get_price(symbol):.8f}"}
+
+    def get_aggregate_trades(self, symbol, **params):
+
+        if self._price_client is not None:
+            return self._price_client.get_aggregate_trades(symbol=symbol, **params)
+
+        return []
+
+    def get_order_book(self, symbol, **params):
+
+        if self._price_client is not None:
+            return self._price_client.get_order_book(symbol=symbol, **params)
+
+        return {"lastUpdateId": 0, "bids": [], "asks": []}
+
+    def get_asset_balance(self, asset):
+
+        with self._lock:
+            free = self._balances.get(asset, 0.0)
+            locked = self._locked.get(asset, 0.0)
+
+        return {"asset": asset, "free": f"{free:.8f}", "locked": f"{locked:.8f}"}
+
+    def get_exchange_info(self):
+
+        symbols = []
+        for symbol in set(ASSETS_TO_TRADE) | set(self._prices):
+            symbols.append({
+                "symbol": symbol,
+                "status": "TRADING",
+                "filters": [
+                    {"filterType": "PRICE_FILTER", "minPrice": "0.00000001",
+                     "maxPrice": "1000000.00000000", "tickSize": "0.00000001"},
+                    {"filterType": "LOT_SIZE", "minQty": "0.00000001",
+                     "maxQty": "9000000.00000000", "stepSize": "0.00000001"},
+                    {"filterType": "MIN_NOTIONAL", "minNotional": "0.00000000"}
+                ]
+            })
+
+        return {"symbols": symbols}
+
+    def order_market_buy(self, symbol, quantity, **params):
+
+        return self._execute_market_order(symbol, "BUY", float(quantity))
+
+    def order_market_sell(self, symbol, quantity, **params):
+
+        return self._execute_market_order(symbol, "SELL", float(quantity))
+
+    def create_order(self, symbol, side, type, quantity, price=None, timeInForce=None,
+                     newClientOrderId=None, **params):
+        """Place a market, LIMIT or LIMIT_MAKER order
+
+        Limit orders crossing the last price are filled at once as taker,
+        except LIMIT_MAKER orders which are rejected. Other limit orders
+        rest in the order book until a later price crosses them.
+        """
+
+        if type == "MARKET":
+            return self._execute_market_order(symbol, side, float(quantity))
+
+        sleep(self._random.uniform(*PAPER_LATENCY))
+
+        quantity = float(quantity)
+        limit_price = float(price)
+        last_price = self._get_price(symbol)
+        crosses = limit_price >= last_price if side == "BUY" else limit_price <= last_price
+
+        if crosses and type == "LIMIT_MAKER":
+            raise BinanceOrderException(-2010, "Order would immediately match and take.")
+
+        if crosses:
+            return self._execute_market_order(symbol, side, quantity, order_type=type,
+                                              client_order_id=newClientOrderId)
+
+        base_asset = symbol[:-len(QUOTE_ASSET)]
+        locked_asset, locked_amount = ((QUOTE_ASSET, quantity * limit_price) if side == "BUY"
+                                       else (base_asset, quantity))
+
+        order_id = next(self._order_ids)
+        order = {"symbol": symbol,
+                 "orderId": order_id,
+                 "clientOrderId": newClientOrderId or f"paper-{order_id}",
+                 "transactTime": int(time() * 1000),
+                 "price": f"{limit_price:.8f}",
+                 "origQty": f"{quantity:.8f}",
+                 "executedQty": "0.00000000",
+                 "cummulativeQuoteQty": "0.00000000",
+                 "status": "NEW",
+                 "timeInForce": timeInForce or "GTC",
+                 "type": type,
+                 "side": side,
+                 "fills": []}
+
+        with self._lock:
+            self._lock_balance(locked_asset, locked_amount)
+            self._order_book.add(order)
+
+        return dict(order)
+
+    def get_order(self, symbol, orderId, **params):
+
+        with self._lock:
+            return self._get_order_state(orderId)
+
+    def cancel_order(self, symbol, orderId, **params):
+
+        with self._lock:
+            order = self._order_book.get(orderId)
+
+            if order is None or order["status"] not in ("NEW", "PARTIALLY_FILLED"):
+                raise BinanceOrderException(-2011, "Unknown order sent.")
+
+            remaining = float(order["origQty"]) - float(order["executedQty"])
+            if order["side"] == "BUY":
+                self._unlock_balance(QUOTE_ASSET, remaining * float(order["price"]))
+            else:
+                self._unlock_balance(symbol[:-len(QUOTE_ASSET)], remaining)
+
+            order["status"] = "CANCELED"
+            self._order_book.close(order)
+
+            return self._get_order_state(orderId)
+
+    def get_my_trades(self, symbol, orderId=None, **params):
+
+        with self._lock:
+            if orderId is not None:
+                return list(self._trades.get(orderId, []))
+
+            return [trade for trades in self._trades.values() for trade in trades if trade["symbol"] == symbol]
+
+    def _get_order_state(self, order_id):
+        """Get a copy of the order without fills, as returned by get_order
+
+        :type order_id: int
+        :param order_id: Order id
+        :rtype: dict
+        :returns: Order state
+        """
+
+        order = self._order_book.get(order_id)
+
+        if order is None:
+            raise BinanceOrderException(-2013, "Order does not exist.")
+
+        return {key: value for key, value in order.items() if key != "fills"}
+
+    def _lock_balance(self, asset, amount):
+        """Move free balance to locked for a resting order
+
+        :type asset: str
+        :param asset: Asset to lock
+        :type amount: float
+        :param amount: Amount to lock
+        """
+
+        if self._balances.get(asset, 0.0) < amount:
+            raise BinanceOrderException(-2010, "Account has insufficient balance for requested action.")
+
+        self._balances[asset] -= amount
+        self._locked[asset] = self._locked.get(asset, 0.0) + amount
+
+    def _unlock_balance(self, asset, amount):
+        """Move locked balance back to free
+
+        :type asset: str
+        :param asset: Asset to unlock
+        :type amount: float
+        :param amount: Amount to unlock
+        """
+
+        self._locked[asset] = self._locked.get(asset, 0.0) - amount
+        self._balances[asset] = self._balances.get(asset, 0.0) + amount
+
+    def _fill_limit_order(self, order):
+        """Fill a crossed resting order at its limit price as maker
+
+        At least PAPER_MIN_FILL_RATIO of the remaining quantity is filled.
+
+        :type order: dict
+        :param order: Crossed resting order
+        """
+
+        symbol = order["symbol"]
+        base_asset = symbol[:-len(QUOTE_ASSET)]
+        limit_price = float(order["price"])
+        executed = float(order["executedQty"])
+        remaining = float(order["origQty"]) - executed
+
+        quantity = remaining * self._random.uniform(PAPER_MIN_FILL_RATIO, 1.0)
+        quote_quantity = quantity * limit_price
+
+        if order["side"] == "BUY":
+            commission, commission_asset = quantity * PAPER_MAKER_COMMISSION_RATE, base_asset
+            self._locked[QUOTE_ASSET] -= quote_quantity
+            self._balances[base_asset] = self._balances.get(base_asset, 0.0) + quantity - commission
+        else:
+            commission, commission_asset = quote_quantity * PAPER_MAKER_COMMISSION_RATE, QUOTE_ASSET
+            self._locked[base_asset] -= quantity
+            self._balances[QUOTE_ASSET] = self._balances.get(QUOTE_ASSET, 0.0) + quote_quantity - commission
+
+        executed += quantity
+        order["executedQty"] = f"{executed:.8f}"
+        order["cummulativeQuoteQty"] = f"{float(order['cummulativeQuoteQty']) + quote_quantity:.8f}"
+        order["status"] = "FILLED" if quantity >= remaining else "PARTIALLY_FILLED"
+
+        self._trades.setdefault(order["orderId"], []).append({"symbol": symbol,
+                                                              "id": next(self._trade_ids),
+                                                              "orderId": order["orderId"],
+                                                              "price": order["price"],
+                                                              "qty": f"{quantity:.8f}",
+                                                              "quoteQty": f"{quote_quantity:.8f}",
+                                                              "commission": f"{commission:.8f}",
+                                                              "commissionAsset": commission_asset,
+                                                              "time": int(time() * 1000),
+                                                              "isBuyer": order["side"] == "BUY",
+                                                              "isMaker": True})
+
+        if order["status"] == "FILLED":
+            self._order_book.close(order)
+
+    def _get_price(self, symbol):
+        """Get last price of the symbol, asking the price client if unknown
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :rtype: float
+        :returns: Last price
+        """
+
+        price = self._prices.get(symbol)
+
+        if price is None and self._price_client is not None:
+            price = float(self._price_client.get_symbol_ticker(symbol=symbol)["price"])
+            self._prices[symbol] = price
+
+        if price is None:
+            logger.warning(f"No price for {symbol} in paper exchange, using 0")
+            price = 0.0
+
+        return price
+
+    def _execute_market_order(self, symbol, side, quantity, order_type="MARKET", client_order_id=None):
+        """Fill a market order against the last price
+
+        The order waits for a random latency, fills in up to
+        PAPER_MAX_FILLS parts with increasing slippage, and may be only
+        partially executed when PAPER_MIN_FILL_RATIO is below 1. The
+        fills are recorded as taker trades of the order.
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :type side: str
+        :param side: BUY/SELL
+        :type quantity: float
+        :param quantity: Order quantity
+        :type order_type: str
+        :param order_type: MARKET, or LIMIT for a limit order crossing the last price
+        :type client_order_id: str
+        :param client_order_id: Client order id, generated if None
+        :rtype: dict
+        :returns: Order response in Binance FULL format
+        """
+
+        if order_type == "MARKET":
+            sleep(self._random.uniform(*PAPER_LATENCY))
+
+        base_asset = symbol[:-len(QUOTE_ASSET)]
+        price = self._get_price(symbol)
+        direction = 1 if side == "BUY" else -1
+
+        executed_quantity = quantity * self._random.uniform(PAPER_MIN_FILL_RATIO, 1.0)
+        fill_count = self._random.randint(1, PAPER_MAX_FILLS)
+        fill_quantity = executed_quantity / fill_count
+
+        fills = []
+        quote_quantity = 0.0
+
+        for index in range(fill_count):
+            slippage = PAPER_SLIPPAGE_BPS / 10000 * (index + 1) / fill_count
+            fill_price = price * (1 + direction * slippage)
+            quote_quantity += fill_quantity * fill_price
+
+            if side == "BUY":
+                commission, commission_asset = fill_quantity * PAPER_COMMISSION_RATE, base_asset
+            else:
+                commission, commission_asset = fill_quantity * fill_price * PAPER_COMMISSION_RATE, QUOTE_ASSET
+
+            fills.append({"price": f"{fill_price:.8f}",
+                          "qty": f"{fill_quantity:.8f}",
+                          "commission": f"{commission:.8f}",
+                          "commissionAsset": commission_asset,
+                          "tradeId": next(self._trade_ids)})
+
+        order_id = next(self._order_ids)
+        status = "FILLED" if executed_quantity >= quantity else "EXPIRED"
+        transact_time = int(time() * 1000)
+
+        order = {"symbol": symbol,
+                 "orderId": order_id,
+                 "clientOrderId": client_order_id or f"paper-{order_id}",
+                 "transactTime": transact_time,
+                 "price": "0.00000000",
+                 "origQty": f"{quantity:.8f}",
+                 "executedQty": f"{executed_quantity:.8f}",
+                 "cummulativeQuoteQty": f"{quote_quantity:.8f}",
+                 "status": status,
+                 "timeInForce": "GTC",
+                 "type": order_type,
+                 "side": side,
+                 "fills": fills}
+
+        with self._lock:
+            self._settle(side, base_asset, executed_quantity, quote_quantity, fills)
+
+            self._order_book.add(order)
+            self._order_book.close(order)
+            self._trades[order_id] = [{"symbol": symbol,
+                                       "id": fill["tradeId"],
+                                       "orderId": order_id,
+                                       "price": fill["price"],
+                                       "qty": fill["qty"],
+                                       "quoteQty": f"{float(fill['qty']) * float(fill['price']):.8f}",
+                                       "commission": fill["commission"],
+                                       "commissionAsset": fill["commissionAsset"],
+                                       "time": transact_time,
+                                       "isBuyer": side == "BUY",
+                                       "isMaker": False} for fill in fills]
+
+        return dict(order)
+
+    def _settle(self, side, base_asset, executed_quantity, quote_quantity, fills):
+        """Check and update balances for an executed order
+
+        :type side: str
+        :param side: BUY/SELL
+        :type base_asset: str
+        :param base_asset: Base asset of the symbol
+        :type executed_quantity: float
+        :param executed_quantity: Executed base quantity
+        :type quote_quantity: float
+        :param quote_quantity: Executed quote quantity
+        :type fills: list
+        :param fills: Fills of the order
+        """
+
+        commission = sum(float(fill["commission"]) for fill in fills)
+
+        if side == "BUY":
+            if self._balances.get(QUOTE_ASSET, 0.0) < quote_quantity:
+                raise BinanceOrderException(-2010, "Account has insufficient balance for requested action.")
+
+            self._balances[QUOTE_ASSET] -= quote_quantity
+            self._balances[base_asset] = self._balances.get(base_asset, 0.0) + executed_quantity - commission
+        else:
+            if self._balances.get(base_asset, 0.0) < executed_quantity:
+                raise BinanceOrderException(-2010, "Account has insufficient balance for requested action.")
+
+            self._balances[base_asset] -= executed_quantity
+            self._balances[QUOTE_ASSET] = self._balances.get(QUOTE_ASSET, 0.0) + quote_quantity - commission
@@ -0,0 +1,279 @@
+"""Checkpoints of the in-memory trading state for warm restarts
+
+The snapshot file starts with a fixed header followed by a JSON document
+describing the state and a float64 matrix with one row per symbol:
+
+    magic (8 bytes) | JSON length (uint32) | symbol count (uint32)
+    JSON (padded to 8 bytes)
+    float64[symbol count, len(STAT_COLUMNS) + len(INTERVALS)]
+
+The matrix holds the price statistics followed by the reference price
+of every interval (NaN where missing) and is read with numpy.memmap.
+"""
+
+import os
+import json
+import struct
+import tempfile
+from math import isnan
+from time import time, sleep, perf_counter
+from threading import Lock, Thread
+
+import numpy as np
+
+from config import (logger,
+                    EXCHANGE_MODE,
+                    TRADED_ASSETS_FILE,
+                    STATE_SNAPSHOT_FILE,
+                    STATE_SNAPSHOT_INTERVAL,
+                    STATE_SNAPSHOT_MAX_AGE)
+from metrics import state_snapshot_write_seconds
+from tick import AssetStats
+from utils import CheckInterval, get_traded_asset_amounts, set_traded_asset_amounts
+
+
+SNAPSHOT_MAGIC = b"TRSNAP01"
+SNAPSHOT_HEADER = struct.Struct("<8sII")
+
+STAT_COLUMNS = ("prev_price", "latest_price", "prev_day_price", "price_change", "change_percent")
+INTERVALS = (CheckInterval.INTERVAL_10_SEC,
+             CheckInterval.INTERVAL_10_MIN,
+             CheckInterval.INTERVAL_30_MIN,
+             CheckInterval.INTERVAL_1_HOUR,
+             CheckInterval.INTERVAL_12_HOURS)
+
+
+class RestoredState:
+
+    __slots__ = ("saved_at", "asset_stats", "reference_prices", "last_evaluated_at",
+                 "traded_asset_amounts", "queued_orders", "tracked_orders")
+
+    def __init__(self, saved_at):
+
+        self.saved_at = saved_at
+        self.asset_stats = {}
+        self.reference_prices = {interval: {} for interval in INTERVALS}
+        self.last_evaluated_at = {}
+        self.traded_asset_amounts = {}
+        self.queued_orders = []
+        self.tracked_orders = []
+
+
+def write_snapshot(path, state):
+    """Write a snapshot atomically by replacing the file
+
+    :type path: str
+    :param path: Snapshot file path
+    :type state: RestoredState
+    :param state: State to write
+    """
+
+    symbols = sorted(set(state.asset_stats).union(*state.reference_prices.values()))
+
+    values = np.full((len(symbols), len(STAT_COLUMNS) + len(INTERVALS)), np.nan)
+    for row, symbol in enumerate(symbols):
+        asset_stats = state.asset_stats.get(symbol)
+        if asset_stats is not None:
+            values[row, :len(STAT_COLUMNS)] = [getattr(asset_stats, column) for column in STAT_COLUMNS]
+
+        for column, interval in enumerate(INTERVALS, len(STAT_COLUMNS)):
+            price = state.reference_prices.get(interval, {}).get(symbol)
+            if price is not None:
+                values[row, column] = price
+
+    document = json.dumps({"saved_at": state.saved_at,
+                           "symbols": symbols,
+                           "last_evaluated_at": {str(interval): evaluated_at
+                                                 for interval, evaluated_at in state.last_evaluated_at.items()},
+                           "traded_asset_amounts": state.traded_asset_amounts,
+                           "queued_orders": state.queued_orders,
+                           "tracked_orders": state.tracked_orders}).encode()
+    document += b" " * (-(SNAPSHOT_HEADER.size + len(document)) % 8)
+
+    # a unique temporary file, so concurrent writers never replace the snapshot with a mixed file
+    descriptor, temp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.",
+                                             dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(descriptor, "wb") as snapshot_file:
+            snapshot_file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(document), len(symbols)))
+            snapshot_file.write(document)
+            snapshot_file.write(values.tobytes())
+
+        os.replace(temp_path, path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+
+
+def read_snapshot(path):
+    """Read a snapshot written by write_snapshot
+
+    :type path: str
+    :param path: Snapshot file path
+    :rtype: RestoredState
+    :returns: State in the snapshot
+    """
+
+    with open(path, "rb") as snapshot_file:
+        magic, document_length, symbol_count = SNAPSHOT_HEADER.unpack(snapshot_file.read(SNAPSHOT_HEADER.size))
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a state snapshot")
+
+        document = json.loads(snapshot_file.read(document_length))
+
+    state = RestoredState(document["saved_at"])
+    state.last_evaluated_at = {int(interval): evaluated_at
+                               for interval, evaluated_at in document["last_evaluated_at"].items()}
+    state.traded_asset_amounts = document["traded_asset_amounts"]
+    state.queued_orders = document["queued_orders"]
+    state.tracked_orders = document["tracked_orders"]
+
+    if not symbol_count:
+        return state
+
+    values = np.memmap(path, dtype=np.float64, mode="r", offset=SNAPSHOT_HEADER.size + document_length,
+                       shape=(symbol_count, len(STAT_COLUMNS) + len(INTERVALS)))
+
+    for symbol, row in zip(document["symbols"], values.tolist()):
+        # symbols known only by their reference prices have no statistics
+        if not isnan(row[0]):
+            asset_stats = state.asset_stats[symbol] = AssetStats()
+            for column, value in zip(STAT_COLUMNS, row):
+                setattr(asset_stats, column, value)
+
+        for interval, price in zip(INTERVALS, row[len(STAT_COLUMNS):]):
+            if not isnan(price):
+                state.reference_prices[interval][symbol] = price
+
+    del values
+
+    return state
+
+
+class StateSnapshot:
+
+    def __init__(self, path=STATE_SNAPSHOT_FILE):
+
+        self._path = path
+        self._lock = Lock()
+        self._restored = None
+        self._price_statistics = None
+
+    def load(self):
+        """Load the snapshot of the previous run if it is recent enough
+
+        The ledger is taken from the snapshot only if TRADED_ASSETS_FILE
+        is missing, since that file is written on every fill.
+
+        :rtype: RestoredState
+        :returns: Restored state or None for a cold start
+        """
+
+        if not os.path.exists(self._path):
+            return None
+
+        try:
+            state = read_snapshot(self._path)
+        except (OSError, ValueError, KeyError) as exc:
+            logger.error(f"Failed to read state snapshot {self._path}: {exc}")
+            return None
+
+        age = time() - state.saved_at
+        if age > STATE_SNAPSHOT_MAX_AGE:
+            logger.info(f"State snapshot is {age:.0f} seconds old, starting without it")
+            return None
+
+        logger.info(f"Restoring state of {len(state.asset_stats)} symbols from {self._path}...")
+
+        if not os.path.exists(TRADED_ASSETS_FILE) and state.traded_asset_amounts:
+            set_traded_asset_amounts(state.traded_asset_amounts)
+
+        self._restored = state
+
+        return state
+
+    def get_restored_state(self):
+        """Get the state loaded at startup
+
+        :rtype: RestoredState
+        :returns: Restored state or None for a cold start
+        """
+
+        return self._restored
+
+    def resume_orders(self):
+        """Queue the pending orders of the restored state again
+
+        Queued orders are re-evaluated by the executor as expired orders.
+        Open limit orders are tracked again except in paper mode, where
+        the simulated exchange does not survive the restart.
+        """
+
+        if self._restored is None:
+            return
+
+        from market_order.lifecycle import order_lifecycle
+        from market_order.orders import restore_order
+
+        for order_state in self._restored.queued_orders:
+            restore_order(order_state).add()
+
+        if EXCHANGE_MODE != "paper":
+            order_lifecycle.restore_state(self._restored.tracked_orders)
+
+    def start_checkpoints(self, price_statistics):
+        """Write a snapshot every STATE_SNAPSHOT_INTERVAL seconds in the background
+
+        :type price_statistics: PriceStatistics
+        :param price_statistics: Statistics and evaluator to checkpoint
+        """
+
+        self._price_statistics = price_statistics
+
+        Thread(target=self._run_checkpoints, daemon=True).start()
+
+    def checkpoint(self):
+        """Write the current state to the snapshot file
+
+        Checkpoints of the periodic thread and of the shutdown handler
+        run one at a time, so the latest state is written last.
+        """
+
+        if self._price_statistics is None:
+            return
+
+        with self._lock:
+            self._checkpoint()
+
+    def _checkpoint(self):
+
+        from executor import order_executor
+        from market_order.lifecycle import order_lifecycle
+
+        evaluator = self._price_statistics.get_evaluator()
+
+        state = RestoredState(time())
+        state.asset_stats = dict(self._price_statistics.get_asset_stats())
+        state.reference_prices = evaluator.get_reference_prices()
+        state.last_evaluated_at = evaluator.get_last_evaluated_times()
+        state.traded_asset_amounts = get_traded_asset_amounts()
+        state.queued_orders = [order.get_state() for order in order_executor.get_queued_orders()]
+        state.tracked_orders = order_lifecycle.get_state()
+
+        start = perf_counter()
+        write_snapshot(self._path, state)
+        state_snapshot_write_seconds.observe(perf_counter() - start)
+
+    def _run_checkpoints(self):
+        """Checkpoint until the process exits"""
+
+        while True:
+            sleep(STATE_SNAPSHOT_INTERVAL)
+
+            try:
+                self.checkpoint()
+            except Exception as exc:
+                logger.error(f"Failed to write state snapshot: {exc}")
+
+
+state_snapshot = StateSnapshot()
@@ -1,36 +1,26 @@
 from config import logger
-from utils import CheckInterval
 
-from strategy.strategies import (Interval10SecStrategy,
-                                 Interval10MinStrategy,
-                                 Interval30MinStrategy,
-                                 Interval1HourStrategy,
-                                 Interval12HoursStrategy)
+from strategy.registry import strategy_registry
+
 
 class StrategyFactory:
 
     def get_strategy(self, interval):
         """Get strategy according to interval
 
+        Strategies are looked up in the strategy registry, so the same
+        instance is returned for every call with the same interval.
+
         :type interval: CheckInterval
         :param interval: Price evaluation interval
         :rtype: Strategy
         :returns: Concrete strategy object
         """
 
-        strategy = None
-
-        if interval == CheckInterval.INTERVAL_10_SEC:
-            strategy = Interval10SecStrategy()
-        elif interval == CheckInterval.INTERVAL_10_MIN:
-            strategy = Interval10MinStrategy()
-        elif interval == CheckInterval.INTERVAL_30_MIN:
-            strategy = Interval30MinStrategy()
-        elif interval == CheckInterval.INTERVAL_1_HOUR:
-            strategy = Interval1HourStrategy()
-        elif interval == CheckInterval.INTERVAL_12_HOURS:
-            strategy = Interval12HoursStrategy()
-        else:
+        strategies = strategy_registry.get_strategies(interval)
+
+        if not strategies:
             logger.error("Invalid interval!")
+            return None
 
-        return strategy
\ No newline at end of file
+        return strategies[0]
@@ -0,0 +1,79 @@
+from importlib import import_module
+from threading import Lock
+
+from config import logger, STRATEGY_PLUGINS
+
+
+BUILTIN_STRATEGY_MODULES = ("strategy.strategies",)
+
+
+class StrategyRegistry:
+
+    def __init__(self):
+
+        self._lock = Lock()
+        self._registrations = []
+        self._instances = {}
+        self._discovered = False
+
+    def register(self, interval, symbols=None):
+        """Class decorator registering a strategy for an interval
+
+        :type interval: CheckInterval
+        :param interval: Price evaluation interval the strategy runs on
+        :type symbols: list
+        :param symbols: Symbol group the strategy decides for (all if None)
+        :rtype: callable
+        :returns: Decorator returning the class unchanged
+        """
+
+        def decorator(strategy_class):
+            group = tuple(symbols) if symbols is not None else None
+            self._registrations.append((interval, group, strategy_class))
+            return strategy_class
+
+        return decorator
+
+    def discover(self):
+        """Import built-in strategy modules and STRATEGY_PLUGINS once"""
+
+        with self._lock:
+            if self._discovered:
+                return
+
+            for module_name in BUILTIN_STRATEGY_MODULES + tuple(STRATEGY_PLUGINS):
+                logger.debug(f"Loading strategies from {module_name}...")
+                import_module(module_name)
+
+            self._discovered = True
+
+    def get_strategies(self, interval):
+        """Get strategy instances of the interval
+
+        Instances are created on the first call, one per registered
+        (strategy, symbol group), and reused afterwards.
+
+        :type interval: CheckInterval
+        :param interval: Price evaluation interval
+        :rtype: list
+        :returns: Strategy instances
+        """
+
+        strategies = self._instances.get(interval)
+
+        if strategies is None:
+            self.discover()
+
+            strategies = [strategy_class(interval, group)
+                          for registered_interval, group, strategy_class in self._registrations
+                          if registered_interval == interval]
+
+            if not strategies:
+                logger.error(f"No strategy registered for interval {interval}!")
+
+            self._instances[interval] = strategies
+
+        return strategies
+
+
+strategy_registry = StrategyRegistry()
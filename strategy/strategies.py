@@ -1,21 +1,59 @@
 from abc import ABC, abstractmethod
 
-from config import logger
+from config import logger, MAX_EXPECTED_SLIPPAGE_PERCENT
 from utils import (OrderType,
                    CheckInterval,
                    get_asset_interval_strategy,
+                   calculate_total_for_traded_assets,
                    is_stop_condition_reached,
                    is_assets_available_for_decision,
+                   get_traded_asset_amount,
                    stop_trading)
 from account import account
+from pre_trade import pre_trade_checker
+from depth_monitor import depth_monitor
+from trade_store import trade_store
 from reporter import reporter
 from market_order.factory import MarketOrderFactory
+from strategy.registry import strategy_registry
+from executor import order_executor, OrderPriority
+from tracing import tracer
+
+
+class MarketSnapshot:
+
+    __slots__ = ("interval", "change_percents", "asset_stats", "lead_lag_signals")
+
+    def __init__(self, interval):
+
+        self.interval = interval
+        self.change_percents = {}
+        self.asset_stats = {}
+        self.lead_lag_signals = {}
+
+    def update(self, change_percents, asset_stats, lead_lag_signals=None):
+        """Point the snapshot to the latest evaluation results
+
+        :type change_percents: dict
+        :param change_percents: Change percentages for the traded symbols
+        :type asset_stats: dict
+        :param asset_stats: Asset price statistics
+        :type lead_lag_signals: dict
+        :param lead_lag_signals: Dictionary of follower: LeadLagSignal pairs,
+            only given for CROSS_ASSET_INTERVAL
+        """
+
+        self.change_percents = change_percents
+        self.asset_stats = asset_stats
+        self.lead_lag_signals = lead_lag_signals or {}
 
 
 class Strategy(ABC):
 
-    def __init__(self):
+    def __init__(self, interval=None, symbols=None):
 
+        self.interval = interval
+        self.symbols = symbols
         self.order_factory = MarketOrderFactory()
 
     @abstractmethod
@@ -29,49 +67,104 @@ class Strategy(ABC):
         """
         pass
 
+    def perform_many(self, snapshot):
+        """Perform strategy for all symbols of the snapshot at once
+
+        Strategies deciding for all symbols together (e.g. with array
+        operations) override this. By default perform is called with the
+        change percents of the symbol group of the strategy.
+
+        :type snapshot: MarketSnapshot
+        :param snapshot: Latest evaluation results of the interval
+        """
+
+        change_percents = snapshot.change_percents
+        if self.symbols is not None:
+            change_percents = {symbol: change_percents[symbol]
+                               for symbol in self.symbols if symbol in change_percents}
+
+        self.perform(change_percents, snapshot.asset_stats)
+
     def _perform_strategy_for(self, interval, change_percents, asset_stats):
 
         symbol = None
         amount = None
         order_type = OrderType.NO_ORDER
 
+        calculate_total_for_traded_assets()
+
+        if is_stop_condition_reached():
+            logger.info("===== STOP CONDITION REACHED =====")
+            order_executor.drop_orders(OrderPriority.BUY)
+            reporter.log_current_account_info(account)
+            reporter.log_traded_asset_amounts()
+            stop_trading()
+
         for asset, change_percent in change_percents.items():
-            logger.info(f"{asset} has change percent value of {change_percent}")
-
-            asset_strategy = get_asset_interval_strategy(asset, interval, change_percent)
-            logger.debug(f"{asset} - asset_strategy: {asset_strategy}")
-
-            decision = asset_strategy[0]
-            if decision == "BUY":
-                logger.info(f"Decided to buy for {asset}")
-                order_type = OrderType.BUY_ORDER
-                symbol = asset
-                amount = asset_strategy[1]
-
-            elif decision == "SELL":
-                logger.info(f"Decided to sell for {asset}")
-                order_type = OrderType.SELL_ORDER
-                symbol = asset
-                amount = asset_strategy[1]
-
-            else:
-                logger.info(f"Decided NOT to buy or sell for {asset}")
-
-            if is_stop_condition_reached(asset_stats):
-                logger.info("===== STOP CONDITION REACHED =====")
-                reporter.log_current_account_info(account)
-                reporter.log_traded_asset_amounts()
-                stop_trading()
-            else:
-                if decision:
-                    if is_assets_available_for_decision(asset, amount, decision, asset_stats):
-                        order = self.order_factory.get_order(order_type)
-                        order.set_parameters(symbol, amount, asset_stats[asset].get("latest_price"))
-                        order.add()
+            with tracer.span("strategy", tracer.get_correlation_id(asset), symbol=asset, interval=interval):
+                logger.info(f"{asset} has change percent value of {change_percent}")
+
+                asset_strategy = get_asset_interval_strategy(asset, interval, change_percent)
+                logger.debug(f"{asset} - asset_strategy: {asset_strategy}")
+
+                decision = asset_strategy[0]
+                if decision == "BUY":
+                    logger.info(f"Decided to buy for {asset}")
+                    order_type = OrderType.BUY_ORDER
+                    symbol = asset
+                    amount = asset_strategy[1]
+
+                elif decision == "SELL":
+                    logger.info(f"Decided to sell for {asset}")
+                    order_type = OrderType.SELL_ORDER
+                    symbol = asset
+                    amount = asset_strategy[1]
+
+                else:
+                    logger.info(f"Decided NOT to buy or sell for {asset}")
+
+                if decision == "BUY" and order_executor.is_congested():
+                    logger.info(f"Order queue is congested, skipping buy for {asset}")
+                elif decision:
+                    latest_price = asset_stats[asset].latest_price
+                    amount = self._limit_to_liquidity(asset, decision, amount)
+                    amount = pre_trade_checker.get_valid_quantity(asset, amount, decision, latest_price,
+                                                                  get_traded_asset_amount(asset))
+                    if amount is None:
+                        logger.info(f"Order for {asset} rejected by pre-trade checks!")
+                    elif is_assets_available_for_decision(asset, amount, decision, asset_stats):
+                        trade_store.record_decision(asset, interval, decision, amount, latest_price)
+                        order = self.order_factory.get_order(order_type, interval)
+                        order.set_parameters(symbol, amount, latest_price, interval)
+                        if not order.add():
+                            logger.info(f"Order for {asset} rejected by the executor queue!")
                     else:
                         logger.info("There is not enough amount of assets to buy/sell!")
 
 
+    def _limit_to_liquidity(self, asset, decision, amount):
+        """Reduce amount to what the order book fills within the allowed slippage
+
+        :type asset: str
+        :param asset: Asset symbol
+        :type decision: str
+        :param decision: BUY/SELL
+        :type amount: float
+        :param amount: Asset amount to buy/sell
+        :rtype: float
+        :returns: Amount limited by liquidity
+        """
+
+        max_quantity = depth_monitor.get_max_quantity(asset, decision, MAX_EXPECTED_SLIPPAGE_PERCENT)
+
+        if max_quantity is not None and max_quantity < amount:
+            logger.info(f"Reducing {decision} amount for {asset} from {amount} to {max_quantity} by book depth")
+            return max_quantity
+
+        return amount
+
+
+@strategy_registry.register(CheckInterval.INTERVAL_10_SEC)
 class Interval10SecStrategy(Strategy):
 
     def perform(self, change_percents, asset_stats):
@@ -80,6 +173,8 @@ class Interval10SecStrategy(Strategy):
         logger.info("Performing strategy for 10 seconds interval...")
         self._perform_strategy_for(CheckInterval.INTERVAL_10_SEC, change_percents, asset_stats)
 
+
+@strategy_registry.register(CheckInterval.INTERVAL_10_MIN)
 class Interval10MinStrategy(Strategy):
 
     def perform(self, change_percents, asset_stats):
@@ -88,6 +183,8 @@ class Interval10MinStrategy(Strategy):
         logger.info("Performing strategy for 10 minutes interval...")
         self._perform_strategy_for(CheckInterval.INTERVAL_10_MIN, change_percents, asset_stats)
 
+
+@strategy_registry.register(CheckInterval.INTERVAL_30_MIN)
 class Interval30MinStrategy(Strategy):
 
     def perform(self, change_percents, asset_stats):
@@ -96,6 +193,8 @@ class Interval30MinStrategy(Strategy):
         logger.info("Performing strategy for 30 minutes interval...")
         self._perform_strategy_for(CheckInterval.INTERVAL_30_MIN, change_percents, asset_stats)
 
+
+@strategy_registry.register(CheckInterval.INTERVAL_1_HOUR)
 class Interval1HourStrategy(Strategy):
 
     def perform(self, change_percents, asset_stats):
@@ -104,6 +203,8 @@ class Interval1HourStrategy(Strategy):
         logger.info("Performing strategy for 1 hour interval...")
         self._perform_strategy_for(CheckInterval.INTERVAL_1_HOUR, change_percents, asset_stats)
 
+
+@strategy_registry.register(CheckInterval.INTERVAL_12_HOURS)
 class Interval12HoursStrategy(Strategy):
 
     def perform(self, change_percents, asset_stats):
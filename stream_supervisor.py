@@ -0,0 +1,273 @@
+import random
+from time import time
+from queue import Queue
+from functools import partial
+from threading import Lock, Thread, Timer, Event
+
+from config import (logger,
+                    STREAM_GAP_THRESHOLD,
+                    STREAM_STALE_TIMEOUT,
+                    STREAM_BACKOFF_BASE,
+                    STREAM_BACKOFF_MAX,
+                    STREAM_BACKFILL_MAX_SECONDS)
+from metrics import (tick_errors_total,
+                     stream_reconnects_total,
+                     stream_gaps_total,
+                     stream_downtime_seconds)
+from replay import make_ticker_message
+
+
+AGG_TRADES_LIMIT = 1000
+
+
+class SupervisedStream:
+
+    __slots__ = ("symbol", "conn_key", "last_event_time", "last_message_at",
+                 "prev_day_price", "attempts", "reconnecting", "held_messages")
+
+    def __init__(self, symbol):
+
+        self.symbol = symbol
+        self.conn_key = None
+        self.last_event_time = None
+        self.last_message_at = time()
+        self.prev_day_price = None
+        self.attempts = 0
+        self.reconnecting = False
+        # messages received while the stream is backfilled, None otherwise
+        self.held_messages = None
+
+
+class StreamSupervisor:
+
+    def __init__(self, socket_mgr, symbols, handler, backfill_client, backfill_handler=None):
+
+        self._socket_mgr = socket_mgr
+        self._handler = handler
+        self._backfill_handler = backfill_handler or handler
+        self._backfill_client = backfill_client
+        self._backfill_queue = Queue()
+        self._streams = {symbol: SupervisedStream(symbol) for symbol in symbols}
+        self._lock = Lock()
+        self._random = random.Random()
+        self._stop_event = Event()
+
+    def start(self):
+        """Start a symbol ticker socket per symbol and watch them"""
+
+        for stream in self._streams.values():
+            self._connect(stream)
+
+        Thread(target=self._watch, daemon=True).start()
+        Thread(target=self._backfill, daemon=True).start()
+
+    def stop(self):
+        """Stop reconnecting and watching the sockets"""
+
+        self._stop_event.set()
+
+    def _connect(self, stream):
+        """Start the ticker socket of the stream
+
+        :type stream: SupervisedStream
+        :param stream: Supervised stream
+        """
+
+        stream.conn_key = self._socket_mgr.start_symbol_ticker_socket(callback=partial(self._on_message, stream),
+                                                                      symbol=stream.symbol)
+        stream.last_message_at = time()
+
+    def _on_message(self, stream, message):
+        """Check the message for errors and gaps before passing it on
+
+        :type stream: SupervisedStream
+        :param stream: Stream the message is received from
+        :type message: dict
+        :param message: Socket message dictionary
+        """
+
+        if message.get("e") == "error":
+            logger.error(f"Error received from {stream.symbol} ticker socket: {message.get('m')}")
+            tick_errors_total.inc()
+            self._restart(stream)
+            return
+
+        event_time = message["E"]
+        stream.last_message_at = time()
+
+        with self._lock:
+            if stream.last_event_time is not None and event_time - stream.last_event_time > STREAM_GAP_THRESHOLD * 1000:
+                self._recover(stream, event_time)
+
+            stream.prev_day_price = message["x"]
+            stream.last_event_time = event_time
+
+            if stream.held_messages is not None:
+                stream.held_messages.append(message)
+                return
+
+        self._handler(message)
+
+    def _recover(self, stream, event_time):
+        """Record the incident and queue the gap for the backfill thread
+
+        Messages of the stream are held back until the gap is backfilled,
+        so the handler receives them in time order.
+
+        :type stream: SupervisedStream
+        :param stream: Recovered stream
+        :type event_time: int
+        :param event_time: Event time of the first message after the gap
+        """
+
+        downtime = (event_time - stream.last_event_time) / 1000
+        logger.warning(f"{stream.symbol} ticker stream was down for {downtime:.1f} seconds, backfilling...")
+
+        stream_gaps_total.inc()
+        stream_downtime_seconds.observe(downtime)
+        stream.attempts = 0
+
+        if stream.held_messages is None:
+            stream.held_messages = []
+            self._backfill_queue.put((stream, stream.last_event_time + 1, event_time, stream.prev_day_price))
+
+    def _backfill(self):
+        """Backfill queued gaps off the socket thread
+
+        The backfilled ticks are passed to the backfill handler, then the
+        messages held back meanwhile to the handler.
+        """
+
+        while True:
+            stream, start_time, end_time, prev_day_price = self._backfill_queue.get()
+
+            try:
+                backfilled = 0
+                for message in self._get_backfill(stream.symbol, start_time, end_time, prev_day_price):
+                    self._backfill_handler(message)
+                    backfilled += 1
+
+                logger.info(f"Backfilled {backfilled} ticks for {stream.symbol}")
+            except Exception as exc:
+                logger.error(f"Failed to backfill {stream.symbol}: {exc}")
+
+            while True:
+                with self._lock:
+                    held_messages = stream.held_messages
+                    stream.held_messages = [] if held_messages else None
+
+                if not held_messages:
+                    break
+
+                for message in held_messages:
+                    self._handler(message)
+
+    def _restart(self, stream):
+        """Close the socket and connect again after a jittered backoff
+
+        :type stream: SupervisedStream
+        :param stream: Stream to restart
+        """
+
+        with self._lock:
+            if stream.reconnecting or self._stop_event.is_set():
+                return
+            stream.reconnecting = True
+
+        self._socket_mgr.stop_socket(stream.conn_key)
+
+        delay = self._get_backoff(stream.attempts)
+        stream.attempts += 1
+        stream_reconnects_total.inc()
+
+        logger.info(f"Reconnecting {stream.symbol} ticker socket in {delay:.1f} seconds...")
+        Timer(delay, self._reconnect, args=(stream,)).start()
+
+    def _reconnect(self, stream):
+        """Start a new socket for the stream
+
+        :type stream: SupervisedStream
+        :param stream: Stream to reconnect
+        """
+
+        if self._stop_event.is_set():
+            return
+
+        try:
+            self._connect(stream)
+        except Exception as exc:
+            logger.error(f"Failed to reconnect {stream.symbol} ticker socket: {exc}")
+            stream.reconnecting = False
+            self._restart(stream)
+            return
+
+        stream.reconnecting = False
+
+    def _get_backoff(self, attempts):
+        """Get exponential backoff delay with equal jitter
+
+        :type attempts: int
+        :param attempts: Reconnect attempts since the last received message
+        :rtype: float
+        :returns: Delay in seconds
+        """
+
+        delay = min(STREAM_BACKOFF_MAX, STREAM_BACKOFF_BASE * 2 ** attempts)
+
+        return self._random.uniform(delay / 2, delay)
+
+    def _watch(self):
+        """Restart streams without any message for STREAM_STALE_TIMEOUT seconds"""
+
+        while not self._stop_event.wait(STREAM_STALE_TIMEOUT / 2):
+            now = time()
+
+            for stream in self._streams.values():
+                if not stream.reconnecting and now - stream.last_message_at > STREAM_STALE_TIMEOUT:
+                    logger.warning(f"No message from {stream.symbol} ticker socket "
+                                   f"for {STREAM_STALE_TIMEOUT} seconds")
+                    self._restart(stream)
+
+    def _get_backfill(self, symbol, start_time, end_time, prev_day_price):
+        """Build ticker messages for the gap from aggregated trades
+
+        Trades are conflated to the last one per second like the ticker
+        stream. The gap is limited to its last STREAM_BACKFILL_MAX_SECONDS
+        and change percents use the previous day price of the last tick.
+
+        :type symbol: str
+        :param symbol: Asset symbol of the recovered stream
+        :type start_time: int
+        :param start_time: Time after the last message before the gap
+        :type end_time: int
+        :param end_time: Event time of the first message after the gap
+        :type prev_day_price: str
+        :param prev_day_price: Previous day price of the last message
+        :rtype: list
+        :returns: Ticker messages in time order
+        """
+
+        start_time = max(start_time, end_time - STREAM_BACKFILL_MAX_SECONDS * 1000)
+        prev_day_price = float(prev_day_price)
+
+        last_trades = {}
+        while start_time < end_time:
+            trades = self._backfill_client.get_aggregate_trades(symbol=symbol,
+                                                                startTime=start_time,
+                                                                endTime=end_time - 1,
+                                                                limit=AGG_TRADES_LIMIT)
+            for trade in trades:
+                last_trades[trade["T"] // 1000] = trade
+
+            if len(trades) < AGG_TRADES_LIMIT:
+                break
+            start_time = trades[-1]["T"] + 1
+
+        messages = []
+        for second in sorted(last_trades):
+            trade = last_trades[second]
+            price = float(trade["p"])
+            change_percent = (price - prev_day_price) / prev_day_price * 100 if prev_day_price else 0.0
+            messages.append(make_ticker_message(symbol, trade["T"], price, change_percent))
+
+        return messages
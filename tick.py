@@ -0,0 +1,77 @@
+from time import time
+
+
+class Tick:
+
+    __slots__ = ("symbol", "close", "close_prev_day", "change", "change_percent", "event_time", "received_at")
+
+    def __init__(self, symbol):
+
+        self.symbol = symbol
+        self.close = 0.0
+        self.close_prev_day = 0.0
+        self.change = 0.0
+        self.change_percent = 0.0
+        self.event_time = 0
+        self.received_at = 0.0
+
+    def update_from_message(self, message):
+        """Update fields in place from a symbol ticker socket message
+
+        :type message: dict
+        :param message: Socket message dictionary
+        """
+
+        self.close = float(message["c"])
+        self.close_prev_day = float(message["x"])
+        self.change = float(message["p"])
+        self.change_percent = float(message["P"])
+        self.event_time = message["E"]
+        self.received_at = time()
+
+    def __str__(self):
+
+        return (f"Symbol: {self.symbol}, "
+                f"Close Price: {self.close}, "
+                f"Prev. Day Close Price: {self.close_prev_day}, "
+                f"Change: {self.change}, "
+                f"Change percent: {self.change_percent}")
+
+
+class AssetStats:
+
+    __slots__ = ("prev_price", "latest_price", "prev_day_price", "price_change", "change_percent",
+                 "event_time", "received_at")
+
+    def __init__(self):
+
+        self.prev_price = 0.0
+        self.latest_price = 0.0
+        self.prev_day_price = 0.0
+        self.price_change = 0.0
+        self.change_percent = 0.0
+        self.event_time = 0
+        self.received_at = 0.0
+
+    def update_from_tick(self, tick):
+        """Update statistics in place from the latest tick
+
+        :type tick: Tick
+        :param tick: Latest tick of the symbol
+        """
+
+        self.prev_price = self.latest_price
+        self.latest_price = tick.close
+        self.prev_day_price = tick.close_prev_day
+        self.price_change = tick.change
+        self.change_percent = tick.change_percent
+        self.event_time = tick.event_time
+        self.received_at = tick.received_at
+
+    def __str__(self):
+
+        return (f"Previous price: {self.prev_price}\n"
+                f"Latest price: {self.latest_price}\n"
+                f"Previous day price: {self.prev_day_price}\n"
+                f"Price change: {self.price_change}\n"
+                f"Price change percent: {self.change_percent}\n")
@@ -0,0 +1,97 @@
+from threading import Condition, Thread
+
+from config import logger
+from metrics import ticks_conflated_total, ticks_dropped_total, tick_batch_size
+
+
+class TickConflator:
+
+    def __init__(self, handler):
+
+        self._handler = handler
+        self._condition = Condition()
+        self._pending = {}
+        self._unconflated = []
+        self._latest_event_times = {}
+        self._thread = None
+
+    def start(self):
+        """Start passing the pending messages to the handler"""
+
+        if self._thread is None:
+            self._thread = Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def submit(self, message):
+        """Keep the message as the pending update of its symbol
+
+        A pending message not yet taken by the handler is replaced, and
+        messages older than the latest one seen for the symbol are dropped.
+
+        :type message: dict
+        :param message: Symbol ticker socket message
+        """
+
+        symbol = message["s"]
+        event_time = message["E"]
+
+        with self._condition:
+            if event_time < self._latest_event_times.get(symbol, event_time):
+                ticks_dropped_total.inc()
+                return
+
+            if symbol in self._pending:
+                ticks_conflated_total.inc()
+
+            self._latest_event_times[symbol] = event_time
+            self._pending[symbol] = message
+            self._condition.notify()
+
+    def submit_unconflated(self, message):
+        """Queue the message to be handled without conflation
+
+        Used for backfilled ticks, which are all kept. They are handled
+        in order before the pending messages, and a pending message of
+        the symbol older than the message is dropped.
+
+        :type message: dict
+        :param message: Symbol ticker socket message
+        """
+
+        symbol = message["s"]
+        event_time = message["E"]
+
+        with self._condition:
+            pending = self._pending.get(symbol)
+            if pending is not None and pending["E"] <= event_time:
+                ticks_dropped_total.inc()
+                del self._pending[symbol]
+
+            self._latest_event_times[symbol] = max(event_time, self._latest_event_times.get(symbol, event_time))
+            self._unconflated.append(message)
+            self._condition.notify()
+
+    def _run(self):
+        """Pass the latest message of every updated symbol to the handler
+
+        Messages arriving while the handler runs are conflated, so a
+        batch has at most one message per symbol, after the unconflated
+        messages queued meanwhile.
+        """
+
+        while True:
+            with self._condition:
+                while not self._pending and not self._unconflated:
+                    self._condition.wait()
+
+                pending, self._pending = self._pending, {}
+                unconflated, self._unconflated = self._unconflated, []
+
+            if pending:
+                tick_batch_size.observe(len(pending))
+
+            for message in unconflated + list(pending.values()):
+                try:
+                    self._handler(message)
+                except Exception as exc:
+                    logger.error(f"Failed to process {message['s']} tick: {exc}")
@@ -0,0 +1,241 @@
+"""Tick to fill latency tracing
+
+Every evaluated symbol gets a correlation id which is carried to the
+strategy decision, the order and its fills. Stages are recorded as
+Chrome trace events (open with chrome://tracing or ui.perfetto.dev),
+with the correlation id in the args of each event.
+
+Stages of a correlation id:
+
+    tick                exchange event time -> receipt of the ticker message
+    tick_to_evaluation  receipt -> evaluation of the interval
+    evaluate            change percent calculation of the symbol
+    strategy            strategy decision for the symbol
+    order_add           adding the order to the executor queue
+    queue_wait          time in the executor queue
+    execute_order       order placement round trip
+    fill                fills of the order (instant event)
+
+Usage: python tracing.py [trace.json] prints per stage latencies of a
+written trace and the latency from tick receipt to the first fill.
+"""
+
+import os
+import sys
+import json
+import threading
+from time import time
+from itertools import count
+from collections import deque
+
+from config import logger, TRACING_ENABLED, TRACE_FILE, TRACE_MAX_EVENTS
+
+
+class Span:
+
+    __slots__ = ("_tracer", "_name", "_correlation_id", "_args", "_start")
+
+    def __init__(self, tracer, name, correlation_id, args):
+
+        self._tracer = tracer
+        self._name = name
+        self._correlation_id = correlation_id
+        self._args = args
+        self._start = None
+
+    def __enter__(self):
+
+        self._start = time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self._tracer.record(self._name, self._correlation_id, self._start, time(), **self._args)
+
+
+class NoSpan:
+
+    __slots__ = ()
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        pass
+
+
+NO_SPAN = NoSpan()
+
+
+class Tracer:
+
+    def __init__(self, enabled=TRACING_ENABLED):
+
+        self.enabled = enabled
+        self._events = deque(maxlen=TRACE_MAX_EVENTS)
+        self._local = threading.local()
+        self._ids = count(1)
+        self._pid = os.getpid()
+
+    def start(self):
+        """Start recording trace events"""
+
+        self.enabled = True
+        logger.info(f"Tracing started, keeping the last {TRACE_MAX_EVENTS} events")
+
+    def stop(self):
+        """Stop recording and write the trace file"""
+
+        self.enabled = False
+        self.export()
+
+    def new_correlation_id(self):
+        """Create a correlation id unique within the process
+
+        :rtype: str
+        :returns: Correlation id
+        """
+
+        return f"{self._pid}-{next(self._ids)}"
+
+    def set_correlation_ids(self, correlation_ids):
+        """Set the correlation ids of the symbols evaluated by the current thread
+
+        :type correlation_ids: dict
+        :param correlation_ids: Dictionary of symbol: correlation id pairs
+        """
+
+        self._local.correlation_ids = correlation_ids
+
+    def get_correlation_id(self, symbol):
+        """Get the correlation id of the symbol evaluated by the current thread
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :rtype: str
+        :returns: Correlation id or None if the symbol is not traced
+        """
+
+        correlation_ids = getattr(self._local, "correlation_ids", None)
+
+        return correlation_ids.get(symbol) if correlation_ids else None
+
+    def span(self, name, correlation_id, **args):
+        """Get a context manager recording the duration of its block
+
+        :type name: str
+        :param name: Stage name
+        :type correlation_id: str
+        :param correlation_id: Correlation id of the traced tick
+        :rtype: Span
+        :returns: Span, or a no-op context manager when tracing is off
+        """
+
+        if not self.enabled or correlation_id is None:
+            return NO_SPAN
+
+        return Span(self, name, correlation_id, args)
+
+    def record(self, name, correlation_id, start, end, **args):
+        """Record a stage with wall clock start and end times
+
+        :type name: str
+        :param name: Stage name
+        :type correlation_id: str
+        :param correlation_id: Correlation id of the traced tick
+        :type start: float
+        :param start: Start time in seconds since the epoch
+        :type end: float
+        :param end: End time in seconds since the epoch
+        """
+
+        if not self.enabled or correlation_id is None:
+            return
+
+        args["correlation_id"] = correlation_id
+        self._events.append({"name": name, "cat": "trader", "ph": "X",
+                             "ts": start * 1e6, "dur": max(0.0, end - start) * 1e6,
+                             "pid": self._pid, "tid": threading.get_ident(), "args": args})
+
+    def instant(self, name, correlation_id, **args):
+        """Record a point in time of a traced tick
+
+        :type name: str
+        :param name: Event name
+        :type correlation_id: str
+        :param correlation_id: Correlation id of the traced tick
+        """
+
+        if not self.enabled or correlation_id is None:
+            return
+
+        args["correlation_id"] = correlation_id
+        self._events.append({"name": name, "cat": "trader", "ph": "i", "s": "t",
+                             "ts": time() * 1e6, "pid": self._pid,
+                             "tid": threading.get_ident(), "args": args})
+
+    def export(self, path=TRACE_FILE):
+        """Write the recorded events in Chrome trace event format
+
+        :type path: str
+        :param path: Trace file path
+        """
+
+        events = list(self._events)
+
+        with open(path, "w", encoding="utf8") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+
+        logger.info(f"Wrote {len(events)} trace events to {path}")
+
+
+tracer = Tracer()
+
+
+def summarize(events):
+    """Get latency percentiles per stage and from tick receipt to fill
+
+    :type events: list
+    :param events: Chrome trace events written by Tracer.export
+    :rtype: dict
+    :returns: Dictionary of stage: (count, p50, p99, max) in milliseconds
+    """
+
+    durations = {}
+    receipt_times = {}
+    fill_times = {}
+
+    for event in events:
+        correlation_id = event["args"]["correlation_id"]
+
+        if event["ph"] == "X":
+            durations.setdefault(event["name"], []).append(event["dur"] / 1000)
+            if event["name"] == "tick":
+                receipt_times[correlation_id] = event["ts"] + event["dur"]
+        elif event["name"] == "fill":
+            fill_times.setdefault(correlation_id, event["ts"])
+
+    durations["receipt_to_fill"] = [(fill_time - receipt_times[correlation_id]) / 1000
+                                    for correlation_id, fill_time in fill_times.items()
+                                    if correlation_id in receipt_times]
+
+    summary = {}
+    for stage, values in durations.items():
+        if values:
+            values.sort()
+            summary[stage] = (len(values), values[len(values) // 2],
+                              values[min(len(values) - 1, int(len(values) * 0.99))], values[-1])
+
+    return summary
+
+
+if __name__ == "__main__":
+
+    with open(sys.argv[1] if len(sys.argv) > 1 else TRACE_FILE, "r", encoding="utf8") as trace_file:
+        trace_events = json.load(trace_file)["traceEvents"]
+
+    print(f"{'stage':20} {'count':>8} {'p50(ms)':>10} {'p99(ms)':>10} {'max(ms)':>10}")
+    for stage_name, (stage_count, p50, p99, maximum) in summarize(trace_events).items():
+        print(f"{stage_name:20} {stage_count:>8} {p50:>10.3f} {p99:>10.3f} {maximum:>10.3f}")
@@ -0,0 +1,278 @@
+import sqlite3
+from time import time, monotonic
+from queue import Queue, Empty
+from threading import Thread
+
+from config import (logger,
+                    TRADE_DB_FILE,
+                    TRADE_DB_BATCH_SIZE,
+                    TRADE_DB_FLUSH_INTERVAL,
+                    TRADE_DB_RECORD_TICKS)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ticks (
+    symbol TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    price REAL NOT NULL,
+    change_percent REAL
+);
+CREATE TABLE IF NOT EXISTS evaluations (
+    symbol TEXT NOT NULL,
+    interval INTEGER NOT NULL,
+    time INTEGER NOT NULL,
+    price REAL NOT NULL,
+    change_percent REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS decisions (
+    symbol TEXT NOT NULL,
+    interval INTEGER NOT NULL,
+    time INTEGER NOT NULL,
+    decision TEXT NOT NULL,
+    amount REAL NOT NULL,
+    price REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fills (
+    order_id INTEGER,
+    symbol TEXT NOT NULL,
+    interval INTEGER,
+    side TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    quantity REAL NOT NULL,
+    price REAL NOT NULL,
+    commission REAL NOT NULL,
+    commission_asset TEXT
+);
+CREATE INDEX IF NOT EXISTS ticks_symbol_time ON ticks (symbol, time);
+CREATE INDEX IF NOT EXISTS evaluations_symbol_time ON evaluations (symbol, time);
+CREATE INDEX IF NOT EXISTS decisions_symbol_time ON decisions (symbol, time);
+CREATE INDEX IF NOT EXISTS fills_symbol_time ON fills (symbol, time);
+"""
+
+INSERTS = {
+    "ticks": "INSERT INTO ticks VALUES (?, ?, ?, ?)",
+    "evaluations": "INSERT INTO evaluations VALUES (?, ?, ?, ?, ?)",
+    "decisions": "INSERT INTO decisions VALUES (?, ?, ?, ?, ?, ?)",
+    "fills": "INSERT INTO fills VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+}
+
+PNL_QUERY = """
+SELECT symbol, interval,
+       SUM(CASE WHEN side = 'BUY' THEN quantity ELSE 0 END) AS bought,
+       SUM(CASE WHEN side = 'SELL' THEN quantity ELSE 0 END) AS sold,
+       SUM(CASE WHEN side = 'BUY' THEN quantity * price ELSE 0 END) AS spent,
+       SUM(CASE WHEN side = 'SELL' THEN quantity * price ELSE 0 END) AS earned,
+       SUM(CASE WHEN commission_asset = 'USDT' THEN commission ELSE 0 END) AS usdt_commission,
+       COUNT(*) AS fill_count,
+       (SELECT price FROM ticks t WHERE t.symbol = fills.symbol
+        ORDER BY time DESC LIMIT 1) AS last_price
+FROM fills
+WHERE time >= ? AND time < ?
+GROUP BY symbol, interval
+"""
+
+PNL_FIELDS = ("bought", "sold", "spent", "earned", "usdt_commission",
+              "fill_count", "cash_flow", "position_value", "pnl")
+
+
+def now_ms():
+    """Get current epoch time in milliseconds
+
+    :rtype: int
+    :returns: Current time in milliseconds
+    """
+
+    return int(time() * 1000)
+
+
+class TradeStore:
+
+    def __init__(self):
+
+        self._queue = Queue()
+
+        with sqlite3.connect(TRADE_DB_FILE) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+
+        self._writer_thread = Thread(target=self._write, daemon=True)
+        self._writer_thread.start()
+
+    def record_tick(self, symbol, event_time, price, change_percent):
+        """Queue a tick for storing
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :type event_time: int
+        :param event_time: Exchange event time in milliseconds
+        :type price: float
+        :param price: Close price
+        :type change_percent: float
+        :param change_percent: 24 hour price change percent
+        """
+
+        if TRADE_DB_RECORD_TICKS:
+            self._queue.put(("ticks", (symbol, event_time, price, change_percent)))
+
+    def record_evaluation(self, symbol, interval, price, change_percent):
+        """Queue an evaluation result for storing
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :type interval: CheckInterval
+        :param interval: Price evaluation interval
+        :type price: float
+        :param price: Evaluated price
+        :type change_percent: float
+        :param change_percent: Change percent for the interval
+        """
+
+        self._queue.put(("evaluations", (symbol, interval, now_ms(), price, change_percent)))
+
+    def record_decision(self, symbol, interval, decision, amount, price):
+        """Queue a strategy decision for storing
+
+        :type symbol: str
+        :param symbol: Asset symbol
+        :type interval: CheckInterval
+        :param interval: Price evaluation interval
+        :type decision: str
+        :param decision: BUY/SELL
+        :type amount: float
+        :param amount: Asset amount to buy/sell
+        :type price: float
+        :param price: Price at decision time
+        """
+
+        self._queue.put(("decisions", (symbol, interval, now_ms(), decision, amount, price)))
+
+    def record_fills(self, order_result, interval=None):
+        """Queue every fill of an executed order for storing
+
+        :type order_result: dict
+        :param order_result: Result of the order execution
+        :type interval: CheckInterval
+        :param interval: Interval of the strategy that created the order
+        """
+
+        transact_time = order_result.get("transactTime", now_ms())
+
+        for fill in order_result.get("fills", []):
+            self._queue.put(("fills", (order_result.get("orderId"),
+                                       order_result["symbol"],
+                                       interval,
+                                       order_result["side"],
+                                       transact_time,
+                                       float(fill["qty"]),
+                                       float(fill["price"]),
+                                       float(fill.get("commission", 0)),
+                                       fill.get("commissionAsset"))))
+
+    def get_pnl_per_symbol(self, start=0, end=None):
+        """Get profit and loss per symbol for the given time range
+
+        :type start: int
+        :param start: Start time in milliseconds
+        :type end: int
+        :param end: End time in milliseconds (now if None)
+        :rtype: list
+        :returns: List of PnL dictionaries
+        """
+
+        return self._query_pnl("symbol", start, end)
+
+    def get_pnl_per_interval(self, start=0, end=None):
+        """Get profit and loss per strategy interval for the given time range
+
+        :type start: int
+        :param start: Start time in milliseconds
+        :type end: int
+        :param end: End time in milliseconds (now if None)
+        :rtype: list
+        :returns: List of PnL dictionaries
+        """
+
+        return self._query_pnl("interval", start, end)
+
+    def flush(self):
+        """Block until all queued records are written"""
+
+        self._queue.join()
+
+    def _query_pnl(self, group_column, start, end):
+        """Aggregate fills grouped by the given column
+
+        PnL is the cash flow of the fills plus the net position valued
+        with the latest recorded tick price.
+
+        :type group_column: str
+        :param group_column: symbol or interval
+        :type start: int
+        :param start: Start time in milliseconds
+        :type end: int
+        :param end: End time in milliseconds (now if None)
+        :rtype: list
+        :returns: List of PnL dictionaries
+        """
+
+        if end is None:
+            end = now_ms() + 1
+
+        with sqlite3.connect(TRADE_DB_FILE) as connection:
+            connection.row_factory = sqlite3.Row
+            rows = connection.execute(PNL_QUERY, (start, end)).fetchall()
+
+        results = {}
+        for row in rows:
+            key = row[group_column]
+            result = results.setdefault(key, dict.fromkeys(PNL_FIELDS, 0))
+            result[group_column] = key
+
+            for field in ("bought", "sold", "spent", "earned", "usdt_commission", "fill_count"):
+                result[field] += row[field]
+
+            cash_flow = row["earned"] - row["spent"] - row["usdt_commission"]
+            position_value = (row["bought"] - row["sold"]) * (row["last_price"] or 0.0)
+            result["cash_flow"] += cash_flow
+            result["position_value"] += position_value
+            result["pnl"] += cash_flow + position_value
+
+        return list(results.values())
+
+    def _write(self):
+        """Write queued records in batches from a single connection"""
+
+        connection = sqlite3.connect(TRADE_DB_FILE)
+        connection.execute("PRAGMA synchronous=NORMAL")
+
+        while True:
+            batch = {}
+            batch_size = 0
+
+            try:
+                table, row = self._queue.get()
+                batch.setdefault(table, []).append(row)
+                batch_size += 1
+
+                # the first record of a batch waits at most TRADE_DB_FLUSH_INTERVAL seconds
+                deadline = monotonic() + TRADE_DB_FLUSH_INTERVAL
+
+                while batch_size < TRADE_DB_BATCH_SIZE:
+                    table, row = self._queue.get(timeout=max(0, deadline - monotonic()))
+                    batch.setdefault(table, []).append(row)
+                    batch_size += 1
+            except Empty:
+                pass
+
+            try:
+                with connection:
+                    for table, rows in batch.items():
+                        connection.executemany(INSERTS[table], rows)
+            except sqlite3.Error as exc:
+                logger.error(f"Failed to store {batch_size} records: {exc}")
+            finally:
+                for _ in range(batch_size):
+                    self._queue.task_done()
+
+
+trade_store = TradeStore()
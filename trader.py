@@ -1,9 +1,25 @@
+import argparse
+
 from twisted.internet.error import ReactorNotRunning
 
 from account import account
 from price_monitor import PriceMonitor
 from reporter import reporter
-from config import logger
+from market_order.lifecycle import order_lifecycle
+from config import (logger,
+                    METRICS_PORT,
+                    EXCHANGE_MODE,
+                    PRICE_SOURCE,
+                    ASSETS_TO_TRADE,
+                    USE_USER_DATA_STREAM,
+                    USE_DEPTH_STREAM,
+                    TRACING_ENABLED,
+                    TRACE_FILE)
+from depth_monitor import depth_monitor
+from state_snapshot import state_snapshot
+from metrics import registry
+from profiler import profiler
+from tracing import tracer
 from utils import (MonitoringStartError,
                    get_client,
                    restore_traded_asset_amounts,
@@ -11,13 +27,32 @@ from utils import (MonitoringStartError,
                    stop_trading)
 
 
-def main():
+def main(profile=False, trace=False):
+
+    if profile:
+        profiler.start()
+
+    if trace:
+        tracer.start()
+
+    if METRICS_PORT is not None:
+        registry.start_server(METRICS_PORT)
 
     client = get_client()
 
     logger.info(f"System status: {client.get_system_status()['msg'].upper()}")
 
     restore_traded_asset_amounts()
+    state_snapshot.load()
+
+    if USE_USER_DATA_STREAM and EXCHANGE_MODE != "paper":
+        from user_stream import UserDataStream
+        UserDataStream().start()
+    elif USE_USER_DATA_STREAM:
+        logger.warning("The user data stream is not available in paper mode, order results update the ledger")
+
+    if USE_DEPTH_STREAM and PRICE_SOURCE == "binance":
+        depth_monitor.start_monitoring(ASSETS_TO_TRADE)
 
     reporter.log_current_account_info(account)
     reporter.log_traded_asset_amounts()
@@ -25,6 +60,8 @@ def main():
     try:
         price_monitor = PriceMonitor()
         set_price_monitor(price_monitor)
+        state_snapshot.resume_orders()
+        state_snapshot.start_checkpoints(price_monitor.get_price_statistics())
         price_monitor.start_monitoring()
     except MonitoringStartError as err:
         logger.error(err)
@@ -37,10 +74,23 @@ def main():
 
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", action="store_true",
+                        help="sample all threads and time hot path functions")
+    parser.add_argument("--trace", action="store_true", default=TRACING_ENABLED,
+                        help=f"trace ticks to fills and write them to {TRACE_FILE} on exit")
+    args = parser.parse_args()
+
     try:
-        main()
+        main(profile=args.profile, trace=args.trace)
     except KeyboardInterrupt:
         logger.info("Script stopped manually!")
+        if args.profile:
+            profiler.stop()
+        if args.trace:
+            tracer.stop()
+        order_lifecycle.cancel_all()
+        state_snapshot.checkpoint()
         reporter.log_current_account_info(account)
         reporter.log_traded_asset_amounts()
         stop_trading()
@@ -0,0 +1,70 @@
+from binance.streams import ThreadedWebsocketManager
+
+from config import logger, BINANCE_KEY, BINANCE_SCR
+from balance_book import balance_book
+from execution import process_execution_report, set_user_stream_active
+from market_order.lifecycle import order_lifecycle
+from utils import get_client
+
+
+class UserDataStream:
+
+    def __init__(self):
+
+        self._socket_mgr = ThreadedWebsocketManager(api_key=BINANCE_KEY, api_secret=BINANCE_SCR)
+        self._handlers = {"executionReport": self._handle_execution_report,
+                          "outboundAccountPosition": balance_book.update_from_account_position,
+                          "balanceUpdate": balance_book.update_from_balance_update}
+
+    def start(self):
+        """Start listening to the user data websocket
+
+        The socket is started before the initial balance snapshot so no
+        account update between the two is missed.
+        """
+
+        logger.info("Starting user data stream...")
+
+        self._socket_mgr.start()
+        self._socket_mgr.start_user_socket(callback=self._user_msg_handler)
+        set_user_stream_active(True)
+
+        balance_book.start_reconciliation(get_client())
+
+    def stop(self):
+        """Close the user data websocket"""
+
+        logger.info("Stopping user data stream...")
+
+        set_user_stream_active(False)
+        balance_book.stop_reconciliation()
+        self._socket_mgr.stop()
+
+    def _handle_execution_report(self, event):
+        """Apply trades to the ledger and update tracked limit orders
+
+        :type event: dict
+        :param event: executionReport event
+        """
+
+        process_execution_report(event)
+        order_lifecycle.on_execution_report(event)
+
+    def _user_msg_handler(self, message):
+        """Dispatch user data stream events to their handlers
+
+        :type message: dict
+        :param message: Socket message dictionary
+        """
+
+        if message.get("e") == "error":
+            logger.error(f"Error received from user data stream: {message}")
+            return
+
+        handler = self._handlers.get(message.get("e"))
+
+        if handler is not None:
+            try:
+                handler(message)
+            except Exception as exc:
+                logger.error(f"Failed to handle {message.get('e')} event: {exc}")
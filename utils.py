@@ -9,10 +9,14 @@ from twisted.internet.error import ReactorNotRunning
 
 from config import (logger,
                     BINANCE_KEY, BINANCE_SCR,
+                    EXCHANGE_MODE,
+                    PRICE_SOURCE,
+                    FIXED_DOLLAR_EXCHANGE_RATE,
                     INITIAL_USDT_INVESTMENT,
                     ASSETS_TO_TRADE,
                     TRADED_ASSET_AMOUNTS,
-                    TRADED_ASSETS_FILE)
+                    TRADED_ASSETS_FILE,
+                    MAX_EXPECTED_SLIPPAGE_PERCENT)
 
 
 price_monitor_instance = None
@@ -79,10 +83,22 @@ def is_assets_available_for_decision(asset, amount, decision, asset_stats):
     :returns: Whether there are enough amounts to execute decision
     """
 
+    from balance_book import balance_book
+    from depth_monitor import depth_monitor
+
     remaining_asset = TRADED_ASSET_AMOUNTS[asset]
-    asset_current_price = asset_stats[asset].get("latest_price")
+    asset_current_price = asset_stats[asset].latest_price
     current_usdt_amount = get_current_usdt_amount()
 
+    if balance_book.is_synced():
+        remaining_asset = min(remaining_asset, balance_book.get_free(asset[:-len("USDT")]))
+        current_usdt_amount = min(current_usdt_amount, balance_book.get_free("USDT"))
+
+    expected_slippage = depth_monitor.get_expected_slippage(asset, decision, amount)
+    if expected_slippage is not None and expected_slippage > MAX_EXPECTED_SLIPPAGE_PERCENT:
+        logger.info(f"Expected slippage of {expected_slippage:.3f}% for {amount} {asset} is too high")
+        return False
+
     if decision == "BUY":
         if amount * asset_current_price > current_usdt_amount:
             return False
@@ -95,38 +111,33 @@ def is_assets_available_for_decision(asset, amount, decision, asset_stats):
     return True
 
 
-def is_stop_condition_reached(asset_stats):
+def is_stop_condition_reached():
     """Check if stop condition is reached
 
-    If amount of total traded assets decreases more than half,
-    stop trading.
+    If total traded assets fall below the drawdown or trailing stop
+    limits, stop trading. The check is answered from the running
+    portfolio total in constant time.
 
-    :type asset_stats: dict
-    :param asset_stats: Asset price statistics
     :rtype: bool
     :returns: Whether stop trading or not
     """
 
-    total_assets_as_usdt = calculate_total_for_traded_assets(asset_stats)
+    from portfolio import portfolio
 
-    return total_assets_as_usdt < (INITIAL_USDT_INVESTMENT / 2)
+    return portfolio.is_stop_condition_reached()
 
 
-def calculate_total_for_traded_assets(asset_stats):
-    """Calculate total as usdt
+def calculate_total_for_traded_assets():
+    """Get running total as usdt and log it
 
-    :type asset_stats: dict
-    :param asset_stats: Asset price statistics
     :rtype: float
     :returns: Total assets as usdt
     """
 
-    total_as_usdt = get_current_usdt_amount()
-
-    for asset in ASSETS_TO_TRADE:
-        total_as_usdt += TRADED_ASSET_AMOUNTS[asset] * asset_stats[asset].get("latest_price")
+    from portfolio import portfolio
 
-    change = ((total_as_usdt - INITIAL_USDT_INVESTMENT) / INITIAL_USDT_INVESTMENT) * 100
+    total_as_usdt = portfolio.get_total_as_usdt()
+    change = portfolio.get_change_percent()
 
     logger.info(f"Total traded asset amounts as usdt: {total_as_usdt}, change: {change} %")
 
@@ -145,6 +156,18 @@ def get_current_usdt_amount():
     return TRADED_ASSET_AMOUNTS["USDT"]
 
 
+def get_traded_asset_amount(symbol):
+    """Get traded amount of the given asset
+
+    :type symbol: str
+    :param symbol: Asset symbol
+    :rtype: float
+    :returns: Traded asset amount
+    """
+
+    return TRADED_ASSET_AMOUNTS[symbol]
+
+
 def update_traded_asset_amounts(symbol, amount, usdt_update_value):
     """Update asset amounts and save to the file
 
@@ -156,8 +179,11 @@ def update_traded_asset_amounts(symbol, amount, usdt_update_value):
     :param usdt_update_value: USDT earned or spent from trade
     """
 
+    from portfolio import portfolio
+
     TRADED_ASSET_AMOUNTS[symbol] += amount
     TRADED_ASSET_AMOUNTS["USDT"] += usdt_update_value
+    portfolio.apply_fill(symbol, amount, usdt_update_value)
 
     usdt_amount = get_current_usdt_amount()
     logger.info(f"Updated {symbol} with amount={amount}. Current USDT amount={usdt_amount}")
@@ -187,9 +213,39 @@ def restore_traded_asset_amounts():
             logger.info(f"Restoring current values from {TRADED_ASSETS_FILE}...")
             TRADED_ASSET_AMOUNTS = json.load(traded_assets_file)
 
+    from portfolio import portfolio
+    portfolio.set_amounts(TRADED_ASSET_AMOUNTS)
+
     logger.debug(f"Traded asset amounts at beginning: {TRADED_ASSET_AMOUNTS}")
 
 
+def set_traded_asset_amounts(traded_asset_amounts):
+    """Replace traded asset amounts and write them to file
+
+    :type traded_asset_amounts: dict
+    :param traded_asset_amounts: Amounts of traded assets and USDT
+    """
+
+    global TRADED_ASSET_AMOUNTS
+
+    TRADED_ASSET_AMOUNTS = dict(traded_asset_amounts)
+
+    from portfolio import portfolio
+    portfolio.set_amounts(TRADED_ASSET_AMOUNTS)
+
+    store_traded_asset_amounts()
+
+
+def get_traded_asset_amounts():
+    """Get a copy of the current traded asset amounts
+
+    :rtype: dict
+    :returns: Amounts of traded assets and USDT
+    """
+
+    return dict(TRADED_ASSET_AMOUNTS)
+
+
 def set_price_monitor(price_monitor):
     """Set price monitor instance globally
 
@@ -216,15 +272,56 @@ def stop_trading():
 
 
 def get_client():
+    """Get shared Binance client governed by the rate limiter
+
+    In paper mode a SimulatedExchange is returned instead. It is primed
+    with the first replayed prices or asks Binance for unknown prices.
+
+    :rtype: RateLimitedClient
+    :returns: Rate limited Binance client or SimulatedExchange
+    """
+
+    from http_transport import configure_session, get_requests_params
+    from rate_limiter import RateLimitedClient
 
     global client
 
     if client is None:
-        client = Client(BINANCE_KEY, BINANCE_SCR)
+        if EXCHANGE_MODE == "paper":
+            from simulated_exchange import SimulatedExchange
+
+            if PRICE_SOURCE == "replay":
+                from replay import load_initial_prices
+
+                client = SimulatedExchange()
+                for symbol, price in load_initial_prices(ASSETS_TO_TRADE).items():
+                    client.update_price(symbol, price)
+            else:
+                client = SimulatedExchange(price_client=create_public_client())
+        else:
+            binance_client = Client(BINANCE_KEY, BINANCE_SCR, requests_params=get_requests_params())
+            configure_session(binance_client.session)
+            client = RateLimitedClient(binance_client)
 
     return client
 
 
+def create_public_client():
+    """Create a rate limited Binance client for public market data
+
+    :rtype: RateLimitedClient
+    :returns: Rate limited Binance client without API keys
+    """
+
+    from http_transport import configure_session, get_requests_params
+    from rate_limiter import RateLimitedClient
+
+    public_client = Client(requests_params=get_requests_params())
+    configure_session(public_client.session)
+
+    return RateLimitedClient(public_client)
+
+
 def get_current_dollar_exchange_rate():
     """Get current dollar exchange rate in TL
 
@@ -232,6 +329,9 @@ def get_current_dollar_exchange_rate():
     :returns: current dollar value
     """
 
+    if FIXED_DOLLAR_EXCHANGE_RATE is not None:
+        return FIXED_DOLLAR_EXCHANGE_RATE
+
     parsed_page = _parse_page()
 
     assets = parsed_page.select(".item")[:3]
@@ -254,8 +354,10 @@ def _parse_page():
         "Pragma": "no-cache"
     }
 
+    from http_transport import get_session, get_requests_params
+
     try:
-        response = requests.get(PAGE_URL, headers=headers)
+        response = get_session().get(PAGE_URL, headers=headers, **get_requests_params())
     except requests.exceptions.RequestException as exc:
         logger.error(exc)
         raise SystemExit("Failed to get page!")